@@ -9,6 +9,7 @@ export async function GET(request: Request) {
   const symbols = (searchParams.get("symbols") ?? "").trim();
   const start = (searchParams.get("start") ?? "").trim();
   const end = (searchParams.get("end") ?? "").trim();
+  const format = (searchParams.get("format") ?? "").trim();
 
   if (!symbols) {
     return NextResponse.json({ series: [], start: null, end: null, asOf: null });
@@ -19,6 +20,7 @@ export async function GET(request: Request) {
   upstream.searchParams.set("symbols", symbols);
   if (start) upstream.searchParams.set("start", start);
   if (end) upstream.searchParams.set("end", end);
+  if (format) upstream.searchParams.set("format", format);
 
   try {
     const response = await fetch(upstream.toString(), { cache: "no-store" });
@@ -30,10 +32,11 @@ export async function GET(request: Request) {
       });
     }
 
-    const body = await response.text();
+    const contentType = response.headers.get("content-type") ?? "application/json";
+    const body = contentType.includes("json") ? await response.text() : await response.arrayBuffer();
     return new NextResponse(body, {
       status: 200,
-      headers: { "content-type": "application/json" }
+      headers: { "content-type": contentType }
     });
   } catch (error) {
     console.error("[NEXT HISTORY UNAVAILABLE]", error);
@@ -0,0 +1,46 @@
+export const runtime = "nodejs";
+export const dynamic = "force-dynamic";
+
+const DEFAULT_SERVICE_URL = "http://127.0.0.1:8000";
+
+export async function GET(request: Request) {
+  const { searchParams } = new URL(request.url);
+  const symbols = (searchParams.get("symbols") ?? "").trim();
+
+  if (!symbols) {
+    return new Response(JSON.stringify({ error: "symbols-required" }), {
+      status: 400,
+      headers: { "content-type": "application/json" }
+    });
+  }
+
+  const baseUrl = process.env.QUOTE_SERVICE_URL || DEFAULT_SERVICE_URL;
+  const upstream = new URL(`${baseUrl}/quotes/stream`);
+  upstream.searchParams.set("symbols", symbols);
+
+  try {
+    const response = await fetch(upstream.toString(), { cache: "no-store", signal: request.signal });
+    if (!response.ok || !response.body) {
+      console.error("[NEXT QUOTES STREAM UPSTREAM ERROR]", response.status, response.statusText);
+      return new Response(JSON.stringify({ error: "quote-service-error" }), {
+        status: 502,
+        headers: { "content-type": "application/json" }
+      });
+    }
+
+    return new Response(response.body, {
+      status: 200,
+      headers: {
+        "content-type": "text/event-stream",
+        "cache-control": "no-cache",
+        connection: "keep-alive"
+      }
+    });
+  } catch (error) {
+    console.error("[NEXT QUOTES STREAM UNAVAILABLE]", error);
+    return new Response(JSON.stringify({ error: "quote-service-unavailable" }), {
+      status: 503,
+      headers: { "content-type": "application/json" }
+    });
+  }
+}
@@ -0,0 +1,624 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+BENCH_FORMAT_VERSION = 1
+DEFAULT_ENDPOINTS = "quotes,history,investor-flows"
+DEFAULT_SYMBOL_COUNTS = "1,10,50"
+DEFAULT_CONCURRENCY_LEVELS = "1,8,32"
+DEFAULT_CACHE_MODES = "cold,warm"
+DEFAULT_REQUESTS = 20
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parent / ".bench-results"
+HISTORY_BENCH_DAYS = 365
+KIS_TOKEN_PATH = "/oauth2/tokenP"
+NAVER_FX_PATH = "/naver/fx"
+YAHOO_CHART_PREFIX = "/v8/finance/chart/"
+DEGRADED_QUOTE_STATUSES = ("STALE", "ERROR")
+
+
+def _parse_int_list(raw: str) -> List[int]:
+    return [int(part) for part in raw.split(",") if part.strip()]
+
+
+def _parse_str_list(raw: str) -> List[str]:
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _round_ms(value: float | None) -> float | None:
+    return None if value is None else round(value * 1000.0, 3)
+
+
+def _is_degraded(body: Any) -> bool:
+    # A 200 can still carry fallbacks (stale or errored quotes, series with a warning such as token-unavailable).
+    if not isinstance(body, dict):
+        return False
+    items = body.get("quotes") or body.get("series") or []
+    return any(
+        item.get("warning") or item.get("guardReason") or item.get("status") in DEGRADED_QUOTE_STATUSES
+        for item in items
+        if isinstance(item, dict)
+    )
+
+
+def _price_for(code: str) -> int:
+    return 1000 + (sum(ord(ch) * (idx + 1) for idx, ch in enumerate(code)) * 37) % 90000
+
+
+def _trading_days_until(end: str, start: str | None, limit: int) -> List[date]:
+    cursor = datetime.strptime(end, "%Y%m%d").date()
+    floor = datetime.strptime(start, "%Y%m%d").date() if start else cursor - timedelta(days=limit * 2)
+    days: List[date] = []
+    while cursor >= floor and len(days) < limit:
+        if cursor.weekday() < 5:
+            days.append(cursor)
+        cursor -= timedelta(days=1)
+    return days
+
+
+class _MockUpstream:
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, token_ttl_requests: int, seed: int) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.token_ttl_requests = token_ttl_requests
+        self.calls: Counter[str] = Counter()
+        self.token = ""
+        self.token_uses = 0
+        self.token_serial = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _mock_handler(self))
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, name="bench-mock-upstream", daemon=True)
+        thread.start()
+        self._server = server
+        self._thread = thread
+        host, port = server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def take_calls(self) -> Dict[str, int]:
+        with self._lock:
+            calls = dict(self.calls)
+            self.calls.clear()
+        return calls
+
+    def _sleep(self) -> None:
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        delay = max(0.0, self.latency_ms + jitter) / 1000.0
+        if delay:
+            time.sleep(delay)
+
+    def handle(self, path: str, params: Dict[str, str], headers: Any) -> Tuple[int, str, bytes]:
+        tr_id = headers.get("tr_id") or ""
+        with self._lock:
+            self.calls[f"{path}|{tr_id}" if tr_id else path] += 1
+        self._sleep()
+
+        if path == KIS_TOKEN_PATH:
+            with self._lock:
+                self.token_serial += 1
+                self.token = f"bench-token-{self.token_serial}"
+                self.token_uses = 0
+                token = self.token
+            return _json_response(200, {"access_token": token, "token_type": "Bearer", "expires_in": 86400})
+        if path == NAVER_FX_PATH:
+            body = "<div class='rate'>미국 USD 1,385.50 원 전일대비 +2.50 원 +0.18%</div>"
+            return 200, "text/html; charset=utf-8", body.encode("utf-8")
+        if path.startswith(YAHOO_CHART_PREFIX):
+            now = int(time.time())
+            return _json_response(
+                200,
+                {
+                    "chart": {
+                        "result": [
+                            {
+                                "meta": {
+                                    "currency": "USD",
+                                    "regularMarketPrice": 5000.25,
+                                    "chartPreviousClose": 4990.0,
+                                    "regularMarketDayHigh": 5010.0,
+                                    "regularMarketDayLow": 4980.0,
+                                    "regularMarketTime": now,
+                                }
+                            }
+                        ],
+                        "error": None,
+                    }
+                },
+            )
+        if not path.startswith("/uapi/"):
+            return _json_response(404, {"error": "not-found"})
+
+        authorization = headers.get("Authorization") or ""
+        with self._lock:
+            valid = bool(self.token) and authorization == f"Bearer {self.token}"
+            if valid and self.token_ttl_requests:
+                self.token_uses += 1
+                if self.token_uses > self.token_ttl_requests:
+                    self.token = ""
+                    valid = False
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+        if not valid:
+            return _json_response(401, {"rt_cd": "1", "msg_cd": "EGW00123", "msg1": "기간이 만료된 token 입니다."})
+        if failed:
+            return _json_response(500, {"rt_cd": "1", "msg_cd": "EGW00201", "msg1": "초당 거래건수를 초과하였습니다."})
+        return _json_response(200, _kis_payload(path, params))
+
+
+def _json_response(status: int, payload: Any) -> Tuple[int, str, bytes]:
+    return status, "application/json; charset=utf-8", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _kis_payload(path: str, params: Dict[str, str]) -> Dict[str, Any]:
+    code = params.get("fid_input_iscd") or params.get("symb") or ""
+    price = _price_for(code)
+    if path.endswith("inquire-index-price"):
+        return {
+            "rt_cd": "0",
+            "msg_cd": "MCA00000",
+            "output": {
+                "bstp_nmix_prpr": "2650.12",
+                "bstp_nmix_prdy_vrss": "12.30",
+                "prdy_vrss_sign": "2",
+                "bstp_nmix_prdy_ctrt": "0.47",
+                "bstp_nmix_hgpr": "2660.00",
+                "bstp_nmix_lwpr": "2630.00",
+            },
+        }
+    if path.endswith("inquire-investor"):
+        days = _trading_days_until(date.today().strftime("%Y%m%d"), None, 30)
+        return {
+            "rt_cd": "0",
+            "msg_cd": "MCA00000",
+            "output": [
+                {
+                    "stck_bsop_date": day.strftime("%Y%m%d"),
+                    "stck_clpr": str(price),
+                    "prsn_ntby_qty": str((idx * 131) % 5000 - 2500),
+                    "frgn_ntby_qty": str((idx * 71) % 4000 - 2000),
+                    "orgn_ntby_qty": str((idx * 53) % 3000 - 1500),
+                }
+                for idx, day in enumerate(days)
+            ],
+        }
+    if path.endswith("inquire-daily-itemchartprice"):
+        days = _trading_days_until(params.get("fid_input_date_2", ""), params.get("fid_input_date_1"), 100)
+        return {
+            "rt_cd": "0",
+            "msg_cd": "MCA00000",
+            "output1": {"hts_kor_isnm": f"BENCH{code}", "stck_prpr": str(price)},
+            "output2": [
+                {
+                    "stck_bsop_date": day.strftime("%Y%m%d"),
+                    "stck_oprc": str(price - 10),
+                    "stck_hgpr": str(price + 50),
+                    "stck_lwpr": str(price - 50),
+                    "stck_clpr": str(price + (day.toordinal() % 21) - 10),
+                    "acml_vol": str(100000 + day.toordinal() % 5000),
+                }
+                for day in days
+            ],
+        }
+    if path.endswith("overseas-price/v1/quotations/dailyprice"):
+        days = _trading_days_until(params.get("bymd", "") or date.today().strftime("%Y%m%d"), None, 100)
+        last = price / 100.0
+        return {
+            "rt_cd": "0",
+            "msg_cd": "MCA00000",
+            "output2": [
+                {
+                    "xymd": day.strftime("%Y%m%d"),
+                    "open": f"{last - 0.5:.2f}",
+                    "high": f"{last + 1.0:.2f}",
+                    "low": f"{last - 1.0:.2f}",
+                    "clos": f"{last + (day.toordinal() % 7) * 0.1:.2f}",
+                    "tvol": str(200000 + day.toordinal() % 9000),
+                }
+                for day in days
+            ],
+        }
+    if path.endswith("overseas-price/v1/quotations/price"):
+        last = price / 100.0
+        return {
+            "rt_cd": "0",
+            "msg_cd": "MCA00000",
+            "output": {
+                "rsym": f"DNAS{code}",
+                "last": f"{last:.2f}",
+                "diff": "0.45",
+                "sign": "2",
+                "rate": "0.35",
+                "base": f"{last - 0.45:.2f}",
+                "tvol": "1250000",
+                "high": f"{last + 1.0:.2f}",
+                "low": f"{last - 1.0:.2f}",
+            },
+        }
+    if path.endswith("intstock-multprice"):
+        rows = []
+        for index in range(1, 31):
+            item = params.get(f"fid_input_iscd_{index}")
+            if not item:
+                continue
+            item_price = _price_for(item)
+            rows.append(
+                {
+                    "inter_shrn_iscd": item,
+                    "inter_kor_isnm": f"BENCH{item}",
+                    "inter2_prpr": str(item_price),
+                    "inter2_prdy_vrss": "150",
+                    "prdy_vrss_sign": "2",
+                    "prdy_ctrt": "0.21",
+                    "inter2_oprc": str(item_price - 100),
+                    "inter2_hgpr": str(item_price + 200),
+                    "inter2_lwpr": str(item_price - 200),
+                    "inter2_askp": str(item_price + 10),
+                    "inter2_bidp": str(item_price - 10),
+                    "acml_vol": "1523400",
+                }
+            )
+        return {"rt_cd": "0", "msg_cd": "MCA00000", "output": rows}
+    if path.endswith("inquire-price"):
+        return {
+            "rt_cd": "0",
+            "msg_cd": "MCA00000",
+            "output": {
+                "hts_kor_isnm": f"BENCH{code}",
+                "stck_prpr": str(price),
+                "prdy_vrss": "150",
+                "prdy_vrss_sign": "2",
+                "prdy_ctrt": "0.21",
+                "stck_oprc": str(price - 100),
+                "stck_hgpr": str(price + 200),
+                "stck_lwpr": str(price - 200),
+                "acml_vol": "1523400",
+            },
+        }
+    return {"rt_cd": "1", "msg_cd": "OPSQ0002", "msg1": "없는 서비스 코드 입니다"}
+
+
+def _mock_handler(mock: _MockUpstream) -> type:
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            self._respond()
+
+        def do_POST(self) -> None:
+            self._respond()
+
+        def _respond(self) -> None:
+            length = int(self.headers.get("content-length") or 0)
+            if length:
+                self.rfile.read(length)
+            parsed = urlparse(self.path)
+            params = {key.lower(): values[-1] for key, values in parse_qs(parsed.query).items()}
+            status, content_type, body = mock.handle(parsed.path, params, self.headers)
+            self.send_response(status)
+            self.send_header("content-type", content_type)
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    return _Handler
+
+
+class _SymbolPool:
+    def __init__(self) -> None:
+        self._next = 100000
+
+    def _take(self) -> int:
+        value = self._next
+        self._next += 1
+        return value
+
+    def kr(self, count: int) -> List[str]:
+        return [f"{self._take():06d}" for _ in range(count)]
+
+    def us(self, count: int) -> List[str]:
+        symbols = []
+        for _ in range(count):
+            value = self._take()
+            letters = ""
+            for _ in range(3):
+                value, rem = divmod(value, 26)
+                letters = chr(ord("A") + rem) + letters
+            symbols.append(f"ZB{letters}")
+        return symbols
+
+
+def _request_params(endpoint: str, symbols_per_request: int, pool: _SymbolPool) -> Dict[str, str]:
+    if endpoint == "quotes":
+        us_count = symbols_per_request // 2
+        symbols = pool.kr(symbols_per_request - us_count) + pool.us(us_count)
+        return {"symbols": ",".join(symbols)}
+    if endpoint == "history":
+        end = date.today()
+        start = end - timedelta(days=HISTORY_BENCH_DAYS)
+        return {"symbols": ",".join(pool.kr(symbols_per_request)), "start": start.isoformat(), "end": end.isoformat()}
+    if endpoint == "investor-flows":
+        return {"symbols": ",".join(pool.kr(symbols_per_request))}
+    raise ValueError(f"unknown endpoint: {endpoint}")
+
+
+def _scenario_key(result: Dict[str, Any]) -> Tuple[str, str, int, int]:
+    return (result["endpoint"], result["cache"], result["symbols"], result["concurrency"])
+
+
+def _reset_service_state(service: Any) -> None:
+    service._quote_hot_symbols.clear()
+    service._stream_latest.clear()
+    service._metric_counters.clear()
+    service._upstream_latency.clear()
+
+
+async def _run_scenario(
+    service: Any,
+    mock: _MockUpstream,
+    pool: _SymbolPool,
+    endpoint: str,
+    cache_mode: str,
+    symbols_per_request: int,
+    concurrency: int,
+    total_requests: int,
+) -> Dict[str, Any]:
+    import httpx
+
+    _reset_service_state(service)
+    async with service._lifespan(service.app):
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://quote-service", timeout=120.0) as client:
+            if cache_mode == "warm":
+                shared = _request_params(endpoint, symbols_per_request, pool)
+                await client.get(f"/{endpoint}", params=shared)
+                plan = [shared] * total_requests
+            else:
+                plan = [_request_params(endpoint, symbols_per_request, pool) for _ in range(total_requests)]
+            mock.take_calls()
+
+            latencies: List[float] = []
+            statuses: Counter[int] = Counter()
+            degraded = 0
+            cursor = 0
+
+            async def _worker() -> None:
+                nonlocal cursor, degraded
+                while cursor < len(plan):
+                    params = plan[cursor]
+                    cursor += 1
+                    started = time.perf_counter()
+                    try:
+                        resp = await client.get(f"/{endpoint}", params=params)
+                        statuses[resp.status_code] += 1
+                        if resp.status_code == 200 and _is_degraded(resp.json()):
+                            degraded += 1
+                    except Exception:
+                        statuses[0] += 1
+                    latencies.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(_worker() for _ in range(min(concurrency, total_requests))))
+            elapsed = time.perf_counter() - started
+    _reset_service_state(service)
+
+    calls = mock.take_calls()
+    upstream_total = sum(calls.values())
+    ordered = sorted(latencies)
+    return {
+        "endpoint": endpoint,
+        "cache": cache_mode,
+        "symbols": symbols_per_request,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": sum(count for status, count in statuses.items() if status != 200) + degraded,
+        "degraded": degraded,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "durationSec": round(elapsed, 4),
+        "throughputRps": round(total_requests / elapsed, 3) if elapsed > 0 else None,
+        "latencyMs": {
+            "p50": _round_ms(_percentile(ordered, 50)),
+            "p90": _round_ms(_percentile(ordered, 90)),
+            "p99": _round_ms(_percentile(ordered, 99)),
+            "max": _round_ms(ordered[-1] if ordered else None),
+            "mean": _round_ms(sum(ordered) / len(ordered) if ordered else None),
+        },
+        "upstreamCalls": dict(sorted(calls.items())),
+        "upstreamTotal": upstream_total,
+        "upstreamPerRequest": round(upstream_total / total_requests, 3) if total_requests else None,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except Exception:
+        return None
+    return out.stdout.strip() or None
+
+
+def _configure_environment(base_url: str, work_dir: Path, args: argparse.Namespace) -> None:
+    os.environ.update(
+        {
+            "KIS_APP_KEY": "bench-app-key",
+            "KIS_APP_SECRET": "bench-app-secret",
+            "KIS_BASE_URL": base_url,
+            "NAVER_FX_URL": f"{base_url}{NAVER_FX_PATH}",
+            "YAHOO_CHART_URL": f"{base_url}{YAHOO_CHART_PREFIX}{{symbol}}?range=1d&interval=1m",
+            "QUOTE_STATE_DIR": str(work_dir / "state"),
+            "QUOTE_HISTORY_STORE_DIR": str(work_dir / "history"),
+            "QUOTE_CACHE_BACKEND": "memory",
+            "KIS_RATE_LIMIT_PER_SEC": str(args.kis_rate),
+            "KIS_RATE_LIMIT_BURST": str(args.kis_burst),
+        }
+    )
+    os.environ.setdefault("QUOTE_LOG_LEVEL", "WARNING")
+
+
+def _print_results(results: List[Dict[str, Any]]) -> None:
+    header = f"{'endpoint':<15}{'cache':<6}{'syms':>5}{'conc':>5}{'rps':>10}{'p50ms':>10}{'p99ms':>10}{'up/req':>8}{'err':>5}"
+    print(header)
+    for result in results:
+        latency = result["latencyMs"]
+        print(
+            f"{result['endpoint']:<15}{result['cache']:<6}{result['symbols']:>5}{result['concurrency']:>5}"
+            f"{result['throughputRps'] or 0:>10.1f}{latency['p50'] or 0:>10.1f}{latency['p99'] or 0:>10.1f}"
+            f"{result['upstreamPerRequest'] or 0:>8.2f}{result['errors']:>5}"
+        )
+
+
+def _pct_change(current: float | None, baseline: float | None) -> str:
+    if current is None or not baseline:
+        return "n/a"
+    return f"{(current - baseline) / baseline * 100.0:+.1f}%"
+
+
+def _print_comparison(results: List[Dict[str, Any]], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {_scenario_key(result): result for result in baseline.get("results", [])}
+    print(f"\ncompared with {baseline_path} (rev {baseline.get('meta', {}).get('gitRevision')})")
+    print(f"{'endpoint':<15}{'cache':<6}{'syms':>5}{'conc':>5}{'rps':>10}{'p50':>10}{'p99':>10}{'up/req':>10}")
+    for result in results:
+        before = previous.get(_scenario_key(result))
+        if before is None:
+            continue
+        print(
+            f"{result['endpoint']:<15}{result['cache']:<6}{result['symbols']:>5}{result['concurrency']:>5}"
+            f"{_pct_change(result['throughputRps'], before.get('throughputRps')):>10}"
+            f"{_pct_change(result['latencyMs']['p50'], before.get('latencyMs', {}).get('p50')):>10}"
+            f"{_pct_change(result['latencyMs']['p99'], before.get('latencyMs', {}).get('p99')):>10}"
+            f"{_pct_change(result['upstreamPerRequest'], before.get('upstreamPerRequest')):>10}"
+        )
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    mock = _MockUpstream(args.latency_ms, args.jitter_ms, args.error_rate, args.token_ttl_requests, args.seed)
+    base_url = mock.start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="quote-bench-") as work_dir:
+            _configure_environment(base_url, Path(work_dir), args)
+            sys.path.insert(0, str(Path(__file__).resolve().parent))
+            import main as service
+
+            pool = _SymbolPool()
+            results: List[Dict[str, Any]] = []
+            for endpoint in _parse_str_list(args.endpoints):
+                for cache_mode in _parse_str_list(args.cache):
+                    for symbols_per_request in _parse_int_list(args.symbols):
+                        for concurrency in _parse_int_list(args.concurrency):
+                            result = await _run_scenario(
+                                service,
+                                mock,
+                                pool,
+                                endpoint,
+                                cache_mode,
+                                symbols_per_request,
+                                concurrency,
+                                args.requests,
+                            )
+                            results.append(result)
+                            if args.verbose:
+                                _print_results([result])
+    finally:
+        mock.stop()
+
+    return {
+        "formatVersion": BENCH_FORMAT_VERSION,
+        "meta": {
+            "createdAt": datetime.now().astimezone().isoformat(timespec="seconds"),
+            "gitRevision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "mock": {
+                "latencyMs": args.latency_ms,
+                "jitterMs": args.jitter_ms,
+                "errorRate": args.error_rate,
+                "tokenTtlRequests": args.token_ttl_requests,
+                "seed": args.seed,
+            },
+            "service": {
+                "kisRateLimitPerSec": args.kis_rate,
+                "kisRateLimitBurst": args.kis_burst,
+                "concurrency": os.getenv("QUOTE_CONCURRENCY"),
+            },
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the quote service against a local mock KIS/Yahoo/Naver upstream.")
+    parser.add_argument("--endpoints", default=DEFAULT_ENDPOINTS, help="quotes,history,investor-flows")
+    parser.add_argument("--symbols", default=DEFAULT_SYMBOL_COUNTS, help="Symbols per request, comma-separated")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY_LEVELS, help="Concurrent clients, comma-separated")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_MODES, help="cold (new symbols per request) and/or warm")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="Timed requests per scenario")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Mock upstream base latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Mock upstream latency jitter (+/-)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of KIS data calls answered with HTTP 500")
+    parser.add_argument(
+        "--token-ttl-requests", type=int, default=0, help="Expire the KIS token (HTTP 401) after this many calls, 0 = never"
+    )
+    parser.add_argument("--kis-rate", type=float, default=100.0, help="KIS_RATE_LIMIT_PER_SEC for the service under test")
+    parser.add_argument("--kis-burst", type=float, default=100.0, help="KIS_RATE_LIMIT_BURST for the service under test")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for mock jitter and error injection")
+    parser.add_argument("--out", default="", help="Result JSON path (default .bench-results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", default="", help="Earlier result JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Print each scenario as it finishes")
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args))
+    out_path = Path(args.out) if args.out else DEFAULT_RESULTS_DIR / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    _print_results(report["results"])
+    print(f"\nresults written to {out_path}")
+    if args.compare:
+        _print_comparison(report["results"], Path(args.compare))
+
+
+if __name__ == "__main__":
+    main()
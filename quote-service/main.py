@@ -1,19 +1,39 @@
 import asyncio
+import atexit
+import bisect
+import hashlib
+import heapq
+import hmac
+import json
+import logging
+import logging.handlers
 import os
+import queue
 import re
+import sys
 import time
 import random
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Tuple
-from urllib.parse import quote as url_quote
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from functools import lru_cache, partial
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, NamedTuple, Set, Tuple
+from urllib.parse import quote as url_quote, unquote, urlparse
+from zoneinfo import ZoneInfo
 
 import httpx
-from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
+import numpy as np
+from dotenv import dotenv_values, find_dotenv, load_dotenv
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 
+_process_env_keys = frozenset(os.environ)
 load_dotenv()
-
-app = FastAPI()
+_env_file_keys = {key for key in dotenv_values(find_dotenv()) if key not in _process_env_keys}
 
 KIS_TOKEN_PATH = "/oauth2/tokenP"
 KIS_PRICE_PATH = "/uapi/domestic-stock/v1/quotations/inquire-price"
@@ -30,6 +50,11 @@ KIS_ETF_ETN_PRICE_PATH = (
     os.getenv("KIS_ETF_ETN_PRICE_PATH", "/uapi/domestic-etf/v1/quotations/inquire-price").strip()
 )
 KIS_TR_ID_ETF_ETN_PRICE = os.getenv("KIS_TR_ID_ETF_ETN_PRICE", "FHKST02400000").strip()
+KIS_MULTI_PRICE_PATH = (
+    os.getenv("KIS_MULTI_PRICE_PATH", "/uapi/domestic-stock/v1/quotations/intstock-multprice").strip()
+)
+KIS_TR_ID_MULTI_PRICE = os.getenv("KIS_TR_ID_MULTI_PRICE", "FHKST11300006").strip()
+KIS_MULTI_PRICE_MAX_CODES = 30
 KIS_OVERSEAS_PRICE_PATH = "/uapi/overseas-price/v1/quotations/price"
 KIS_TR_ID_OVERSEAS_PRICE = "HHDFS00000300"
 KIS_DAILY_PRICE_PATH = (
@@ -41,11 +66,56 @@ KIS_OVERSEAS_DAILY_PRICE_PATH = (
     os.getenv("KIS_OVERSEAS_DAILY_PRICE_PATH", "/uapi/overseas-price/v1/quotations/dailyprice").strip()
 )
 KIS_TR_ID_OVERSEAS_DAILY_PRICE = os.getenv("KIS_TR_ID_OVERSEAS_DAILY_PRICE", "HHDFS76240000").strip()
-NAVER_FX_URL = (
+NAVER_FX_URL = os.getenv(
+    "NAVER_FX_URL",
     "https://m.search.naver.com/p/csearch/content/qapirender.nhn"
-    "?key=calculator&pkid=141&q=%ED%99%98%EC%9C%A8&where=m&u1=keb&u6=standardUnit&u7=0&u3=USD&u4=KRW&u8=down&u2=1"
-)
-YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=1d&interval=1m"
+    "?key=calculator&pkid=141&q=%ED%99%98%EC%9C%A8&where=m&u1=keb&u6=standardUnit&u7=0&u3=USD&u4=KRW&u8=down&u2=1",
+).strip()
+YAHOO_CHART_URL = os.getenv(
+    "YAHOO_CHART_URL", "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?range=1d&interval=1m"
+).strip()
+
+KST = ZoneInfo("Asia/Seoul")
+US_EASTERN = ZoneInfo("America/New_York")
+
+WHITESPACE_RE = re.compile(r"\s+")
+KR_STOCK_CODE_RE = re.compile(r"\d{6}")
+KR_SHORT_CODE_RE = re.compile(r"\d[0-9A-Z]{5}")
+KR_PREFIXED_CODE_RE = re.compile(r"A\d{6}")
+KR_ETF_ETN_CODE_RE = re.compile(r"\d{4}[0-9A-Z]{2}")
+UPPER_ALPHA_RE = re.compile(r"[A-Z]")
+NON_DIGIT_RE = re.compile(r"[^0-9]")
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+NAVER_FX_RATE_RE = re.compile(r"([0-9]{1,3}(?:,[0-9]{3})*(?:\\.[0-9]+)?)")
+NAVER_FX_PERCENT_RE = re.compile(r"([+-]?\\d+(?:\\.\\d+)?)\\s*%")
+NAVER_FX_CHANGE_RE = re.compile(r"([+-]?\\d+(?:\\.\\d+)?)(?=\\s*원)")
+HISTORY_STORE_NAME_RE = re.compile(r"[^0-9A-Z_.-]")
+KIS_APP_KEY_POOL_RE = re.compile(r"KIS_APP_KEY_(\d+)")
+SYMBOL_CLASSIFY_CACHE_MAX = 4096
+
+MARKET_KR = "KR"
+MARKET_US = "US"
+MARKET_FX = "FX"
+
+# (timezone, session open, session close) per market; FX follows KRX business days all day.
+MARKET_SESSIONS: Dict[str, Tuple[ZoneInfo, dt_time, dt_time]] = {
+    MARKET_KR: (KST, dt_time(9, 0), dt_time(15, 30)),
+    MARKET_US: (US_EASTERN, dt_time(9, 30), dt_time(16, 0)),
+    MARKET_FX: (KST, dt_time(0, 0), dt_time(23, 59, 59)),
+}
+
+# Lunar holidays (Seollal, Buddha's Birthday, Chuseok) cannot be derived from fixed dates.
+KRX_LUNAR_HOLIDAYS: Dict[int, Tuple[str, str, str]] = {
+    2024: ("2024-02-10", "2024-05-15", "2024-09-17"),
+    2025: ("2025-01-29", "2025-05-05", "2025-10-06"),
+    2026: ("2026-02-17", "2026-05-24", "2026-09-25"),
+    2027: ("2027-02-07", "2027-05-13", "2027-09-15"),
+    2028: ("2028-01-27", "2028-05-02", "2028-10-03"),
+    2029: ("2029-02-13", "2029-05-20", "2029-09-22"),
+    2030: ("2030-02-03", "2030-05-09", "2030-09-12"),
+}
+KRX_FIXED_HOLIDAYS = ("01-01", "03-01", "05-01", "05-05", "06-06", "08-15", "10-03", "10-09", "12-25", "12-31")
+SERVICE_DIR = Path(__file__).resolve().parent
 
 DEFAULT_TTL = 30
 DEFAULT_CONCURRENCY = 6
@@ -55,21 +125,188 @@ DEFAULT_GUARD_RANGE_MARGIN = 0.005
 DEFAULT_GUARD_MID_THRESHOLD = 0.05
 DEFAULT_GUARD_RETRY_COUNT = 2
 DEFAULT_GUARD_RETRY_BASE_DELAY_MS = 150
+DEFAULT_KIS_RATE_LIMIT_PER_SEC = 15.0
+DEFAULT_KIS_RATE_LIMIT_BURST = 3.0
+DEFAULT_STATE_DIR = SERVICE_DIR / ".state"
+STATE_DB_NAME = "quote-state.sqlite3"
+DEFAULT_STATE_FLUSH_SECONDS = 30
+STATE_LAST_GOOD_MAX_AGE = 7 * 24 * 60 * 60
+KIS_TOKEN_LEASE_SECONDS = 15.0
+# KIS issues at most one token per app key per minute.
+KIS_TOKEN_RETRY_SECONDS = 60.0
+KIS_TOKEN_RENEW_POLL_SECONDS = 60.0
+KIS_TOKEN_ERROR_CODES = ("EGW00121", "EGW00123")
+KIS_RATE_LIMIT_ERROR_CODES = ("EGW00201",)
+KIS_ERROR_AUTH = "auth"
+KIS_ERROR_RATE_LIMIT = "rate-limit"
+KIS_ERROR_UPSTREAM = "upstream"
+KIS_ERROR_REJECTED = "rejected"
+KIS_AUTH_RETRY_BUDGET = 1
+KIS_TRANSIENT_RETRY_BUDGET = 2
+KIS_TRANSIENT_RETRY_DELAY_SECONDS = 0.25
+DEFAULT_KIS_TOKEN_RENEW_SECONDS = 1800
+DEFAULT_KIS_TOKEN_RENEW_JITTER_SECONDS = 300
+DEFAULT_HISTORY_STORE_DIR = SERVICE_DIR / ".history-store"
+HISTORY_WARNING_TRUNCATED = "history-truncated"
+# KIS daily KR pages hold 100 bars; 140 calendar days is at most 100 weekdays.
+DEFAULT_HISTORY_PARTITION_DAYS = 140
+DEFAULT_CLOSED_MARKET_TTL = 1800
+DEFAULT_MARKET_CLOSE_GRACE_MINUTES = 10
+DEFAULT_SWR_MAX_STALE = 300
+DEFAULT_REFRESH_HOT_WINDOW = 120
+DEFAULT_REFRESH_LEAD_RATIO = 0.2
+REFRESH_TICK_SECONDS = 1.0
+DEFAULT_STREAM_CLOSED_INTERVAL = 300
+DEFAULT_STREAM_HEARTBEAT_SECONDS = 15
+DEFAULT_LOG_SAMPLE_RATE = 0.1
+DEFAULT_HTTP_MAX_CONNECTIONS = 20
+DEFAULT_HTTP_MAX_KEEPALIVE = 10
+DEFAULT_HTTP_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_CIRCUIT_FAILURES = 5
+DEFAULT_CIRCUIT_OPEN_SECONDS = 30
+CIRCUIT_FAILURE_STATUSES = (502, 503, 504)
+
+CACHE_NS_QUOTES = "quotes"
+CACHE_NS_INVESTOR_FLOWS = "investor-flows"
+CACHE_NS_SEARCH = "search"
+CACHE_NS_FX = "fx"
+CACHE_NS_FX_LAST_GOOD = "fx-last-good"
+CACHE_NS_LAST_GOOD = "last-good"
+CACHE_NS_HISTORY_ANALYTICS = "history-analytics"
+CACHE_NS_KIS_ROUTES = "kis-routes"
+KIS_ROUTE_TTL = 30 * 24 * 60 * 60
+KIS_ROUTE_REFRESH_SECONDS = 24 * 60 * 60
+DEFAULT_KIS_ROUTE_FAILURE_TTL = 6 * 60 * 60
+KIS_ROUTE_QUOTE = "quote"
+KIS_ROUTE_HISTORY = "history"
+KIS_ROUTE_QUOTE_BULK = "quote-bulk"
+KIS_MULTI_PRICE_ROUTE = (KIS_MULTI_PRICE_PATH, KIS_TR_ID_MULTI_PRICE, "J", "upper")
+# Cache namespaces mirrored into the state store when the cache backend itself is not persistent.
+STATE_PERSISTED_NAMESPACES: Dict[str, Tuple[str, int]] = {
+    CACHE_NS_LAST_GOOD: ("last_good_quotes", STATE_LAST_GOOD_MAX_AGE),
+    CACHE_NS_FX_LAST_GOOD: ("fx_last_good", STATE_LAST_GOOD_MAX_AGE),
+    CACHE_NS_KIS_ROUTES: ("kis_routes", KIS_ROUTE_TTL),
+}
+KEY_PATH_CACHE_MAX = 1024
+HISTORY_FORMAT_ROWS = "rows"
+HISTORY_FORMAT_COLUMNS = "columns"
+HISTORY_FORMAT_BINARY = "binary"
+HISTORY_COLUMN_FIELDS = ("open", "high", "low", "close", "volume")
+HISTORY_BINARY_MAGIC = b"LFHB"
+HISTORY_BINARY_VERSION = 1
+HISTORY_BINARY_MEDIA_TYPE = "application/vnd.lifnux.history+octet-stream"
+TRADING_DAYS_PER_YEAR = 252
+DEFAULT_ANALYTICS_VOL_WINDOW = 20
+DEFAULT_CACHE_SQLITE_NAME = "quote-cache.sqlite3"
+DEFAULT_CACHE_MAX_ENTRIES = 5000
+DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+CACHE_SIZE_SAMPLE_EVERY = 32
+DEFAULT_CACHE_SWEEP_SECONDS = 60
+DEFAULT_REDIS_URL = "redis://127.0.0.1:6379/0"
+DEFAULT_REDIS_PREFIX = "lifnux:quote:"
+DEFAULT_SETTINGS_WATCH_SECONDS = 0
+SETTINGS_SECRET_FIELDS = ("kis_app_secret", "admin_token")
+SETTINGS_RESTART_FIELDS = (
+    "ssl_verify",
+    "http2",
+    "http_max_connections",
+    "http_max_keepalive",
+    "http_keepalive_expiry",
+    "cache_backend",
+    "cache_sqlite_path",
+    "redis_url",
+    "redis_prefix",
+    "state_db_path",
+    "settings_watch_seconds",
+    "log_format",
+)
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_HELP: Dict[str, Tuple[str, str]] = {
+    "quote_upstream_request_duration_seconds": ("histogram", "Upstream HTTP latency until response headers."),
+    "quote_upstream_requests_total": ("counter", "Upstream HTTP requests by response status."),
+    "quote_upstream_inflight_requests": ("gauge", "Upstream HTTP requests currently in flight."),
+    "quote_upstream_slots_active": ("gauge", "Upstream concurrency slots currently held."),
+    "quote_upstream_slots_waiting": ("gauge", "Callers queued for an upstream concurrency slot."),
+    "quote_single_flight_inflight": ("gauge", "Deduplicated fetches currently in flight."),
+    "quote_stream_subscribers": ("gauge", "Open quote stream subscriptions."),
+    "quote_hot_symbols": ("gauge", "Symbols tracked for background refresh."),
+    "quote_kis_key_load": ("gauge", "KIS requests currently routed to each app key."),
+    "quote_kis_token_ttl_seconds": ("gauge", "Seconds until the cached KIS token of each app key expires."),
+    "quote_circuit_open": ("gauge", "1 while the circuit breaker of an upstream endpoint is open."),
+    "quote_circuit_rejections_total": ("counter", "Upstream requests failed fast by an open circuit breaker."),
+    "quote_price_guard_suspect_total": ("counter", "Quotes rejected by the price guard, by reason."),
+    "quote_fallback_total": ("counter", "Quotes answered from last-good state after a failed fetch."),
+    "quote_kis_token_refresh_total": ("counter", "KIS access token requests by result."),
+    "quote_kis_request_retries_total": ("counter", "KIS requests repeated by the shared executor, by reason."),
+    "quote_cache_lookups_total": ("counter", "Cache lookups by namespace and result."),
+    "quote_cache_evictions_total": ("counter", "Cache entries dropped by namespace and reason."),
+}
+
+UPSTREAM_KIS = "kis"
+UPSTREAM_YAHOO = "yahoo"
+UPSTREAM_NAVER = "naver"
+
+PRIORITY_QUOTE = 0
+PRIORITY_REFRESH = 1
+PRIORITY_FLOW = 2
+PRIORITY_HISTORY = 3
 
 QUOTE_STATUS_VALID = "VALID"
 QUOTE_STATUS_RETRYING = "RETRYING"
 QUOTE_STATUS_STALE = "STALE"
 QUOTE_STATUS_ERROR = "ERROR"
 
-_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
-_investor_flow_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
-_search_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
-_fx_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
-_fx_last_good: Dict[str, Dict[str, Any]] = {}
+QUOTE_CLASS_KR_STOCK = "KR_STOCK"
+QUOTE_CLASS_KR_ETF_ETN = "KR_ETF_ETN"
+QUOTE_CLASS_US = "US"
+QUOTE_CLASS_INDEX = "INDEX"
+QUOTE_CLASS_FX = "FX"
+
+QUOTE_CLASS_TTL_ENV: Dict[str, str] = {
+    QUOTE_CLASS_KR_STOCK: "QUOTE_CACHE_TTL_KR_STOCK",
+    QUOTE_CLASS_KR_ETF_ETN: "QUOTE_CACHE_TTL_KR_ETF_ETN",
+    QUOTE_CLASS_US: "QUOTE_CACHE_TTL_US",
+    QUOTE_CLASS_INDEX: "QUOTE_CACHE_TTL_INDEX",
+    QUOTE_CLASS_FX: "QUOTE_CACHE_TTL_FX",
+}
+
+_market_holiday_cache: Dict[Tuple[str, int], Set[date]] = {}
+_quote_hot_symbols: Dict[str, float] = {}
+_quote_refreshing: Set[str] = set()
+_quote_refresh_tasks: Set["asyncio.Task[None]"] = set()
+_quote_refresh_scheduler: "asyncio.Task[None] | None" = None
+_cache_backend: "_CacheBackend | None" = None
+_key_paths: Dict[Tuple[str, Tuple[str, ...]], Tuple[Any, ...]] = {}
+_cache_stats: Dict[str, Dict[str, int]] = {}
+_cache_sweeper: "asyncio.Task[None] | None" = None
+_metric_counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+_upstream_latency: Dict[Tuple[str, str, str, str], List[float]] = {}
+_upstream_inflight: Dict[str, int] = {}
+_circuit_breakers: Dict[Tuple[str, str], "_CircuitBreaker"] = {}
 _env_logged = False
-_kis_token: Dict[str, Any] = {"access_token": "", "expires_at": 0.0}
-_kis_token_lock = asyncio.Lock()
-_last_good_quotes: Dict[str, Dict[str, Any]] = {}
+_settings: "_Settings | None" = None
+_settings_issues: List[str] = []
+_settings_loaded_at = 0.0
+_settings_watcher: "asyncio.Task[None] | None" = None
+_logger = logging.getLogger("quote_service")
+_log_listener: logging.handlers.QueueListener | None = None
+_log_levels: Dict[str, int] = {}
+_log_default_level = logging.INFO
+_log_sample_rate = 1.0
+_kis_tokens: Dict[str, Dict[str, Any]] = {}
+_kis_token_locks: Dict[str, asyncio.Lock] = {}
+_kis_key_load: Dict[str, int] = {}
+_kis_token_renewer: "asyncio.Task[None] | None" = None
+_http_clients: Dict[str, httpx.AsyncClient] = {}
+_inflight_requests: Dict[Tuple[Any, ...], "asyncio.Future[Any]"] = {}
+_stream_subscriptions: Dict[str, Set["_QuoteStreamSubscription"]] = {}
+_stream_due: Dict[str, float] = {}
+_stream_latest: Dict[str, Dict[str, Any]] = {}
+_stream_poller: "asyncio.Task[None] | None" = None
+_stream_wakeup: asyncio.Event | None = None
+_persisted_cache_dirty = False
+_state_flusher: "asyncio.Task[None] | None" = None
 
 KR_INDEX_ALIASES: Dict[str, Dict[str, str]] = {
     "KOSPI": {"code": "0001", "name": "KOSPI"},
@@ -99,51 +336,456 @@ YAHOO_INDEX_ALIASES: Dict[str, Dict[str, str]] = {
 }
 
 
-def _get_kis_config() -> Tuple[str, str, str]:
+class _KisCredential(NamedTuple):
+    app_key: str
+    app_secret: str
+
+
+class _KisLease(NamedTuple):
+    app_key: str
+    app_secret: str
+    token: str
+
+    def headers(self, tr_id: str) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.token}",
+            "appkey": self.app_key,
+            "appsecret": self.app_secret,
+            "tr_id": tr_id,
+            "content-type": "application/json",
+        }
+
+
+class _Settings(NamedTuple):
+    kis_app_key: str
+    kis_app_secret: str
+    kis_base_url: str
+    kis_key_pool: Tuple[_KisCredential, ...]
+    kis_token_renew_seconds: int
+    kis_token_renew_jitter: int
+    default_excd: str
+    ttl_seconds: int
+    fx_cache_ttl: int
+    quote_class_ttls: Mapping[str, int]
+    swr_max_stale: int
+    refresh_hot_window: int
+    refresh_lead_ratio: float
+    closed_market_ttl: int
+    market_close_grace_minutes: int
+    stream_open_intervals: Mapping[str, int]
+    krx_holidays: Tuple[str, ...]
+    us_market_holidays: Tuple[str, ...]
+    stream_closed_interval: int
+    stream_heartbeat_seconds: int
+    concurrency: int
+    kis_rate_limit_per_sec: float
+    kis_rate_limit_burst: float
+    kis_route_failure_ttl: int
+    kis_bulk: bool
+    history_max_pages: int
+    history_partition_days: int
+    history_store_dir: Path | None
+    state_db_path: Path | None
+    state_flush_seconds: int
+    cache_backend: str
+    cache_sqlite_path: Path
+    redis_url: str
+    redis_prefix: str
+    cache_max_entries: int
+    cache_max_bytes: int
+    cache_sweep_seconds: int
+    guard_stale_ttl: int
+    guard_jump_threshold: float
+    guard_range_margin: float
+    guard_mid_threshold: float
+    guard_retry_count: int
+    guard_retry_base_delay_ms: int
+    ssl_verify: bool
+    http2: bool
+    http_max_connections: int
+    http_max_keepalive: int
+    http_keepalive_expiry: float
+    circuit_failures: int
+    circuit_open_seconds: int
+    log_level: str
+    log_levels: Mapping[str, str]
+    log_sample_rate: float
+    log_format: str
+    admin_token: str
+    settings_watch_seconds: int
+
+    def kis_config(self) -> Tuple[str, str, str]:
+        return self.kis_app_key, self.kis_app_secret, self.kis_base_url
+
+    def kis_credentials(self) -> Tuple[_KisCredential, ...]:
+        if not self.kis_base_url:
+            return ()
+        if self.kis_app_key and self.kis_app_secret:
+            return (_KisCredential(self.kis_app_key, self.kis_app_secret),) + self.kis_key_pool
+        return self.kis_key_pool
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name, "").strip().lower()
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off"):
+        return False
+    return default
+
+
+def _load_settings() -> Tuple[_Settings, List[str]]:
+    issues: List[str] = []
+
+    def _checked(name: str, parse: Callable[[str], Any], min_value: Any, max_value: Any) -> None:
+        raw = os.getenv(name, "").strip()
+        if not raw:
+            return
+        try:
+            value = parse(raw)
+        except ValueError:
+            issues.append(f"{name}={raw!r} is not a number, using the default")
+            return
+        if value < min_value or value > max_value:
+            issues.append(f"{name}={raw} is outside {min_value}..{max_value}, clamped")
+
+    def _int(name: str, fallback: int, min_value: int, max_value: int) -> int:
+        _checked(name, int, min_value, max_value)
+        return _get_int_env(name, fallback, min_value, max_value)
+
+    def _float(name: str, fallback: float, min_value: float, max_value: float) -> float:
+        _checked(name, float, min_value, max_value)
+        return _get_float_env(name, fallback, min_value, max_value)
+
+    ttl = _int("QUOTE_CACHE_TTL", DEFAULT_TTL, 15, 60)
+    fx_ttl = _int("FX_CACHE_TTL", ttl, 15, 60)
+    class_ttls = {
+        quote_class: _int(env_name, fx_ttl if quote_class == QUOTE_CLASS_FX else ttl, 5, 3600)
+        for quote_class, env_name in QUOTE_CLASS_TTL_ENV.items()
+    }
+    stream_open_interval = _int("QUOTE_STREAM_OPEN_INTERVAL", 0, 1, 600)
+
+    def _holidays(name: str) -> Tuple[str, ...]:
+        keys: Set[str] = set()
+        for item in os.getenv(name, "").split(","):
+            if not item.strip():
+                continue
+            key = _normalize_date_key(item)
+            try:
+                datetime.strptime(key or "", "%Y-%m-%d")
+            except ValueError:
+                issues.append(f"{name} entry {item.strip()!r} is not a date, skipped")
+                continue
+            keys.add(key)
+        return tuple(sorted(keys))
+
+    log_levels: Dict[str, str] = {}
+    for item in os.getenv("QUOTE_LOG_LEVELS", "").split(","):
+        category, _, level = item.partition("=")
+        if category.strip() and level.strip():
+            log_levels[category.strip().lower()] = level.strip().upper()
+    state_dir = os.getenv("QUOTE_STATE_DIR", "").strip()
+    state_root = Path(state_dir) if state_dir else DEFAULT_STATE_DIR
+    history_dir = os.getenv("QUOTE_HISTORY_STORE_DIR", "").strip()
+    cache_sqlite_path = os.getenv("QUOTE_CACHE_SQLITE_PATH", "").strip()
     app_key = os.getenv("KIS_APP_KEY") or ""
-    app_secret = os.getenv("KIS_APP_SECRET") or ""
-    base_url = (os.getenv("KIS_BASE_URL") or "").strip().rstrip("/")
-    return app_key, app_secret, base_url
+    key_pool: List[_KisCredential] = []
+    pool_names = [name for name in os.environ if KIS_APP_KEY_POOL_RE.fullmatch(name)]
+    for name in sorted(pool_names, key=lambda name: int(name.rsplit("_", 1)[1])):
+        pool_key = os.environ[name].strip()
+        secret_name = f"KIS_APP_SECRET_{name.rsplit('_', 1)[1]}"
+        pool_secret = (os.getenv(secret_name) or "").strip()
+        if not pool_key:
+            continue
+        if not pool_secret:
+            issues.append(f"{name} has no {secret_name}, skipped")
+        elif pool_key == app_key or any(credential.app_key == pool_key for credential in key_pool):
+            issues.append(f"{name} repeats an app key already in the pool, skipped")
+        else:
+            key_pool.append(_KisCredential(pool_key, pool_secret))
+
+    settings = _Settings(
+        kis_app_key=app_key,
+        kis_app_secret=os.getenv("KIS_APP_SECRET") or "",
+        kis_base_url=(os.getenv("KIS_BASE_URL") or "").strip().rstrip("/"),
+        kis_key_pool=tuple(key_pool),
+        kis_token_renew_seconds=_int(
+            "KIS_TOKEN_RENEW_SECONDS", DEFAULT_KIS_TOKEN_RENEW_SECONDS, 0, 6 * 60 * 60
+        ),
+        kis_token_renew_jitter=_int(
+            "KIS_TOKEN_RENEW_JITTER_SECONDS", DEFAULT_KIS_TOKEN_RENEW_JITTER_SECONDS, 0, 60 * 60
+        ),
+        default_excd=(os.getenv("KIS_DEFAULT_EXCD") or "NAS").strip().upper() or "NAS",
+        ttl_seconds=ttl,
+        fx_cache_ttl=fx_ttl,
+        quote_class_ttls=MappingProxyType(class_ttls),
+        swr_max_stale=_int("QUOTE_SWR_MAX_STALE", DEFAULT_SWR_MAX_STALE, 0, 3600),
+        refresh_hot_window=_int("QUOTE_REFRESH_HOT_WINDOW", DEFAULT_REFRESH_HOT_WINDOW, 0, 3600),
+        refresh_lead_ratio=_float("QUOTE_REFRESH_LEAD_RATIO", DEFAULT_REFRESH_LEAD_RATIO, 0.05, 0.9),
+        closed_market_ttl=_int("QUOTE_CACHE_TTL_CLOSED", DEFAULT_CLOSED_MARKET_TTL, 60, 6 * 60 * 60),
+        market_close_grace_minutes=_int(
+            "QUOTE_MARKET_CLOSE_GRACE_MINUTES", DEFAULT_MARKET_CLOSE_GRACE_MINUTES, 0, 120
+        ),
+        stream_open_intervals=MappingProxyType(
+            {quote_class: stream_open_interval or class_ttl for quote_class, class_ttl in class_ttls.items()}
+        ),
+        krx_holidays=_holidays("KRX_HOLIDAYS"),
+        us_market_holidays=_holidays("US_MARKET_HOLIDAYS"),
+        stream_closed_interval=_int("QUOTE_STREAM_CLOSED_INTERVAL", DEFAULT_STREAM_CLOSED_INTERVAL, 30, 3600),
+        stream_heartbeat_seconds=_int("QUOTE_STREAM_HEARTBEAT_SECONDS", DEFAULT_STREAM_HEARTBEAT_SECONDS, 5, 120),
+        concurrency=_int("QUOTE_CONCURRENCY", DEFAULT_CONCURRENCY, 1, 8),
+        kis_rate_limit_per_sec=_float("KIS_RATE_LIMIT_PER_SEC", DEFAULT_KIS_RATE_LIMIT_PER_SEC, 0.5, 100.0),
+        kis_rate_limit_burst=_float("KIS_RATE_LIMIT_BURST", DEFAULT_KIS_RATE_LIMIT_BURST, 1.0, 100.0),
+        kis_route_failure_ttl=_int("KIS_ROUTE_FAILURE_TTL", DEFAULT_KIS_ROUTE_FAILURE_TTL, 60, 7 * 24 * 60 * 60),
+        kis_bulk=_env_flag("QUOTE_KIS_BULK", True),
+        history_max_pages=_int("QUOTE_HISTORY_MAX_PAGES", 8, 1, 20),
+        history_partition_days=_int("QUOTE_HISTORY_PARTITION_DAYS", DEFAULT_HISTORY_PARTITION_DAYS, 20, 140),
+        history_store_dir=(
+            (Path(history_dir) if history_dir else DEFAULT_HISTORY_STORE_DIR)
+            if _env_flag("QUOTE_HISTORY_STORE", True)
+            else None
+        ),
+        state_db_path=state_root / STATE_DB_NAME if _env_flag("QUOTE_STATE_PERSIST", True) else None,
+        state_flush_seconds=_int("QUOTE_STATE_FLUSH_SECONDS", DEFAULT_STATE_FLUSH_SECONDS, 5, 600),
+        cache_backend=os.getenv("QUOTE_CACHE_BACKEND", "memory").strip().lower() or "memory",
+        cache_sqlite_path=Path(cache_sqlite_path) if cache_sqlite_path else state_root / DEFAULT_CACHE_SQLITE_NAME,
+        redis_url=os.getenv("QUOTE_REDIS_URL", DEFAULT_REDIS_URL).strip() or DEFAULT_REDIS_URL,
+        redis_prefix=os.getenv("QUOTE_REDIS_PREFIX", DEFAULT_REDIS_PREFIX),
+        cache_max_entries=_int("QUOTE_CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES, 100, 1_000_000),
+        cache_max_bytes=_int("QUOTE_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES, 1024 * 1024, 4 * 1024 * 1024 * 1024),
+        cache_sweep_seconds=_int("QUOTE_CACHE_SWEEP_SECONDS", DEFAULT_CACHE_SWEEP_SECONDS, 5, 3600),
+        guard_stale_ttl=_int("PRICE_GUARD_STALE_TTL", DEFAULT_GUARD_STALE_TTL, 30, 900),
+        guard_jump_threshold=_float("PRICE_GUARD_JUMP_THRESHOLD", DEFAULT_GUARD_JUMP_THRESHOLD, 0.03, 1.0),
+        guard_range_margin=_float("PRICE_GUARD_RANGE_MARGIN", DEFAULT_GUARD_RANGE_MARGIN, 0.0, 0.05),
+        guard_mid_threshold=_float("PRICE_GUARD_MID_THRESHOLD", DEFAULT_GUARD_MID_THRESHOLD, 0.01, 0.3),
+        guard_retry_count=_int("PRICE_GUARD_RETRY_COUNT", DEFAULT_GUARD_RETRY_COUNT, 0, 3),
+        guard_retry_base_delay_ms=_int(
+            "PRICE_GUARD_RETRY_BASE_DELAY_MS", DEFAULT_GUARD_RETRY_BASE_DELAY_MS, 50, 1000
+        ),
+        ssl_verify=_env_flag("QUOTE_SSL_VERIFY", True),
+        http2=_env_flag("QUOTE_HTTP2", False),
+        http_max_connections=_int("QUOTE_HTTP_MAX_CONNECTIONS", DEFAULT_HTTP_MAX_CONNECTIONS, 1, 200),
+        http_max_keepalive=_int("QUOTE_HTTP_MAX_KEEPALIVE", DEFAULT_HTTP_MAX_KEEPALIVE, 0, 200),
+        http_keepalive_expiry=_float("QUOTE_HTTP_KEEPALIVE_EXPIRY", DEFAULT_HTTP_KEEPALIVE_EXPIRY, 1.0, 600.0),
+        circuit_failures=_int("QUOTE_CIRCUIT_FAILURES", DEFAULT_CIRCUIT_FAILURES, 0, 100),
+        circuit_open_seconds=_int("QUOTE_CIRCUIT_OPEN_SECONDS", DEFAULT_CIRCUIT_OPEN_SECONDS, 1, 600),
+        log_level=(os.getenv("QUOTE_LOG_LEVEL") or "").strip().upper() or "INFO",
+        log_levels=MappingProxyType(log_levels),
+        log_sample_rate=_float("QUOTE_LOG_SAMPLE_RATE", DEFAULT_LOG_SAMPLE_RATE, 0.0, 1.0),
+        log_format=(os.getenv("QUOTE_LOG_FORMAT") or "").strip().lower() or "text",
+        admin_token=os.getenv("QUOTE_ADMIN_TOKEN", "").strip(),
+        settings_watch_seconds=_int("QUOTE_SETTINGS_WATCH_SECONDS", DEFAULT_SETTINGS_WATCH_SECONDS, 0, 3600),
+    )
+
+    if not (settings.kis_app_key and settings.kis_app_secret) and not settings.kis_key_pool:
+        issues.append("KIS_APP_KEY / KIS_APP_SECRET not set, KIS quotes are disabled")
+    if not settings.kis_base_url:
+        issues.append("KIS_BASE_URL not set, KIS quotes are disabled")
+    elif not settings.kis_base_url.startswith(("http://", "https://")):
+        issues.append(f"KIS_BASE_URL={settings.kis_base_url!r} has no http(s) scheme")
+    if settings.cache_backend not in ("memory", "sqlite", "redis"):
+        issues.append(f"QUOTE_CACHE_BACKEND={settings.cache_backend!r} is unknown, using memory")
+    if settings.http_max_keepalive > settings.http_max_connections:
+        issues.append("QUOTE_HTTP_MAX_KEEPALIVE is larger than QUOTE_HTTP_MAX_CONNECTIONS")
+    return settings, issues
+
+
+def _install_settings(settings: _Settings, issues: List[str]) -> List[str]:
+    global _settings, _settings_issues, _settings_loaded_at
+    previous = _settings
+    _settings = settings
+    _settings_issues = issues
+    _settings_loaded_at = time.time()
+    _apply_log_settings(settings)
+    if previous is None:
+        return []
+    changed = [field for field in _Settings._fields if getattr(previous, field) != getattr(settings, field)]
+    if changed:
+        _classify_symbol.cache_clear()
+    if "krx_holidays" in changed or "us_market_holidays" in changed:
+        _market_holiday_cache.clear()
+    if "kis_base_url" in changed:
+        _kis_tokens.clear()
+    else:
+        for credential in set(previous.kis_credentials()) - set(settings.kis_credentials()):
+            _kis_tokens.pop(credential.app_key, None)
+    return changed
+
+
+def _get_settings() -> _Settings:
+    if _settings is None:
+        _install_settings(*_load_settings())
+    return _settings
+
+
+def _reload_env_file() -> None:
+    global _env_file_keys
+    path = find_dotenv()
+    values = dotenv_values(path) if path else {}
+    file_keys = {key for key, value in values.items() if key not in _process_env_keys and value is not None}
+    for key in _env_file_keys - file_keys:
+        os.environ.pop(key, None)
+    for key in file_keys:
+        os.environ[key] = values[key]
+    _env_file_keys = file_keys
+
+
+def _reload_settings() -> Dict[str, Any]:
+    _reload_env_file()
+    settings, issues = _load_settings()
+    changed = _install_settings(settings, issues)
+    restart = [field for field in changed if field in SETTINGS_RESTART_FIELDS]
+    _log("SETTINGS RELOADED", changed=",".join(changed) or "-", restart_required=",".join(restart) or "-")
+    for issue in issues:
+        _log("SETTINGS WARNING", issue)
+    return {"changed": changed, "restartRequired": restart, "issues": issues}
+
+
+def _mask_app_key(app_key: str) -> str:
+    return f"***{app_key[-4:]}"
+
+
+def _settings_view(settings: _Settings) -> Dict[str, Any]:
+    view: Dict[str, Any] = {}
+    for field, value in settings._asdict().items():
+        if field in SETTINGS_SECRET_FIELDS:
+            value = "***" if value else ""
+        elif field == "kis_app_key" and value:
+            value = _mask_app_key(value)
+        elif field == "kis_key_pool":
+            value = [_mask_app_key(credential.app_key) for credential in value]
+        elif isinstance(value, Path):
+            value = str(value)
+        elif isinstance(value, MappingProxyType):
+            value = dict(value)
+        view[field] = value
+    return view
+
+
+async def _run_settings_watcher(interval: int) -> None:
+    path = find_dotenv()
+    last_mtime = os.path.getmtime(path) if path and os.path.exists(path) else None
+    while True:
+        await asyncio.sleep(interval)
+        path = find_dotenv()
+        mtime = os.path.getmtime(path) if path and os.path.exists(path) else None
+        if mtime == last_mtime:
+            continue
+        last_mtime = mtime
+        try:
+            _reload_settings()
+        except Exception as exc:
+            _log("SETTINGS RELOAD ERROR", err=repr(exc))
+
+
+def _start_settings() -> None:
+    global _settings_watcher
+    settings = _get_settings()
+    _log(
+        "SETTINGS LOADED",
+        kis_keys=len(settings.kis_credentials()),
+        cache_backend=settings.cache_backend,
+        concurrency=settings.concurrency,
+    )
+    for issue in _settings_issues:
+        _log("SETTINGS WARNING", issue)
+    if settings.settings_watch_seconds > 0 and _settings_watcher is None:
+        _settings_watcher = asyncio.create_task(_run_settings_watcher(settings.settings_watch_seconds))
+
+
+async def _stop_settings() -> None:
+    global _settings_watcher
+    if _settings_watcher is not None:
+        _settings_watcher.cancel()
+        await asyncio.gather(_settings_watcher, return_exceptions=True)
+        _settings_watcher = None
+
+
+def _get_kis_config() -> Tuple[str, str, str]:
+    return _get_settings().kis_config()
 
 
 def _get_default_excd() -> str:
-    raw = (os.getenv("KIS_DEFAULT_EXCD") or "NAS").strip().upper()
-    if not raw:
-        return "NAS"
-    return raw
+    return _get_settings().default_excd
 
 
 def _get_ttl_seconds() -> int:
-    raw = os.getenv("QUOTE_CACHE_TTL", str(DEFAULT_TTL))
-    try:
-        ttl = int(raw)
-    except ValueError:
-        ttl = DEFAULT_TTL
-    return max(15, min(60, ttl))
+    return _get_settings().ttl_seconds
 
 
-def _get_fx_cache_ttl() -> int:
-    raw = os.getenv("FX_CACHE_TTL", "").strip()
-    if not raw:
-        return _get_ttl_seconds()
-    try:
-        ttl = int(raw)
-    except ValueError:
-        ttl = _get_ttl_seconds()
-    return max(15, min(60, ttl))
+def _get_quote_class_ttl_seconds(quote_class: str) -> int:
+    settings = _get_settings()
+    fallback = settings.fx_cache_ttl if quote_class == QUOTE_CLASS_FX else settings.ttl_seconds
+    return settings.quote_class_ttls.get(quote_class, fallback)
+
+
+def _get_swr_max_stale_seconds() -> int:
+    return _get_settings().swr_max_stale
+
+
+def _get_refresh_hot_window_seconds() -> int:
+    return _get_settings().refresh_hot_window
+
+
+def _get_refresh_lead_ratio() -> float:
+    return _get_settings().refresh_lead_ratio
+
+
+def _get_closed_market_ttl_seconds() -> int:
+    return _get_settings().closed_market_ttl
+
+
+def _get_market_close_grace_minutes() -> int:
+    return _get_settings().market_close_grace_minutes
+
+
+def _get_stream_open_interval(quote_class: str) -> int:
+    settings = _get_settings()
+    return settings.stream_open_intervals.get(quote_class, settings.ttl_seconds)
+
+
+def _get_stream_closed_interval() -> int:
+    return _get_settings().stream_closed_interval
+
+
+def _get_stream_heartbeat_seconds() -> int:
+    return _get_settings().stream_heartbeat_seconds
 
 
 def _get_concurrency() -> int:
-    raw = os.getenv("QUOTE_CONCURRENCY", str(DEFAULT_CONCURRENCY))
-    try:
-        limit = int(raw)
-    except ValueError:
-        limit = DEFAULT_CONCURRENCY
-    return max(1, min(8, limit))
+    return _get_settings().concurrency
+
+
+def _get_kis_rate_limit_per_sec() -> float:
+    return _get_settings().kis_rate_limit_per_sec
+
+
+def _get_kis_rate_limit_burst() -> float:
+    return _get_settings().kis_rate_limit_burst
 
 
 def _get_history_max_pages() -> int:
-    return _get_int_env("QUOTE_HISTORY_MAX_PAGES", 8, 1, 20)
+    return _get_settings().history_max_pages
+
+
+def _get_history_partition_days() -> int:
+    return _get_settings().history_partition_days
+
+
+def _get_state_db_path() -> Path | None:
+    return _get_settings().state_db_path
+
+
+def _get_cache_sweep_seconds() -> int:
+    return _get_settings().cache_sweep_seconds
+
+
+def _get_state_flush_seconds() -> int:
+    return _get_settings().state_flush_seconds
+
+
+def _get_history_store_dir() -> Path | None:
+    return _get_settings().history_store_dir
 
 
 def _get_float_env(name: str, fallback: float, min_value: float, max_value: float) -> float:
@@ -161,6 +803,84 @@ def _get_float_env(name: str, fallback: float, min_value: float, max_value: floa
     return value
 
 
+def _parse_log_level(raw: str, fallback: int) -> int:
+    level = logging.getLevelName(raw.strip().upper())
+    return level if isinstance(level, int) else fallback
+
+
+class _TextLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [f"[{record.event}]"]
+        if record.text:
+            parts.append(record.text)
+        parts.extend(f"{key}={value}" for key, value in record.fields.items())
+        return " ".join(parts)
+
+
+class _JsonLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat().replace("+00:00", "Z"),
+            "level": record.levelname.lower(),
+            "category": record.category,
+            "event": record.event,
+        }
+        if record.text:
+            payload["message"] = record.text
+        payload.update(record.fields)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def _apply_log_settings(settings: _Settings) -> None:
+    global _log_levels, _log_default_level, _log_sample_rate
+    default_level = _parse_log_level(settings.log_level, logging.INFO)
+    _log_levels = {
+        category: _parse_log_level(level, default_level) for category, level in settings.log_levels.items()
+    }
+    _log_default_level = default_level
+    _log_sample_rate = settings.log_sample_rate
+
+
+def _configure_logging() -> None:
+    global _log_listener
+    if _log_listener is not None:
+        return
+    settings = _get_settings()
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_JsonLogFormatter() if settings.log_format == "json" else _TextLogFormatter())
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    _logger.setLevel(logging.DEBUG)
+    _logger.propagate = False
+    _log_listener = logging.handlers.QueueListener(log_queue, handler)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+
+
+def _log(event: str, *args: Any, level: int | None = None, sample: bool = False, **fields: Any) -> None:
+    # Records go through a QueueHandler; the stdout write happens on the listener thread, not the event loop.
+    if _log_listener is None:
+        _configure_logging()
+    if level is None:
+        if "ERROR" in event:
+            level = logging.ERROR
+        elif any(word in event for word in ("WARNING", "FAIL", "SUSPECT", "MISSING")):
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+    category = event.split(" ", 1)[0].lower()
+    if level < _log_levels.get(category, _log_default_level):
+        return
+    if sample and level < logging.WARNING and _log_sample_rate < 1.0 and random.random() >= _log_sample_rate:
+        return
+    _logger.log(
+        level,
+        event,
+        extra={"category": category, "event": event, "text": " ".join(str(arg) for arg in args), "fields": fields},
+    )
+
+
 def _get_int_env(name: str, fallback: int, min_value: int, max_value: int) -> int:
     raw = os.getenv(name, "").strip()
     if not raw:
@@ -176,28 +896,16 @@ def _get_int_env(name: str, fallback: int, min_value: int, max_value: int) -> in
     return value
 
 
-def _get_guard_stale_ttl_seconds() -> int:
-    return _get_int_env("PRICE_GUARD_STALE_TTL", DEFAULT_GUARD_STALE_TTL, 30, 900)
-
-
-def _get_guard_jump_threshold() -> float:
-    return _get_float_env("PRICE_GUARD_JUMP_THRESHOLD", DEFAULT_GUARD_JUMP_THRESHOLD, 0.03, 1.0)
-
-
-def _get_guard_range_margin() -> float:
-    return _get_float_env("PRICE_GUARD_RANGE_MARGIN", DEFAULT_GUARD_RANGE_MARGIN, 0.0, 0.05)
+def _get_kis_route_failure_ttl_seconds() -> int:
+    return _get_settings().kis_route_failure_ttl
 
 
-def _get_guard_mid_threshold() -> float:
-    return _get_float_env("PRICE_GUARD_MID_THRESHOLD", DEFAULT_GUARD_MID_THRESHOLD, 0.01, 0.3)
-
-
-def _get_guard_retry_count() -> int:
-    return _get_int_env("PRICE_GUARD_RETRY_COUNT", DEFAULT_GUARD_RETRY_COUNT, 0, 3)
+def _get_guard_stale_ttl_seconds() -> int:
+    return _get_settings().guard_stale_ttl
 
 
 def _get_guard_retry_base_delay_ms() -> int:
-    return _get_int_env("PRICE_GUARD_RETRY_BASE_DELAY_MS", DEFAULT_GUARD_RETRY_BASE_DELAY_MS, 50, 1000)
+    return _get_settings().guard_retry_base_delay_ms
 
 
 def _get_guard_retry_delay_seconds(attempt_index: int) -> float:
@@ -208,10 +916,24 @@ def _get_guard_retry_delay_seconds(attempt_index: int) -> float:
 
 
 def _get_ssl_verify() -> bool:
-    raw = os.getenv("QUOTE_SSL_VERIFY", "true").strip().lower()
-    if raw in ("0", "false", "no", "off"):
-        return False
-    return True
+    return _get_settings().ssl_verify
+
+
+def _get_http_limits() -> httpx.Limits:
+    settings = _get_settings()
+    return httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+def _get_http2_enabled() -> bool:
+    return _get_settings().http2
+
+
+def _get_kis_bulk_enabled() -> bool:
+    return _get_settings().kis_bulk
 
 
 def _normalize_symbols(symbols: List[str]) -> List[str]:
@@ -223,20 +945,16 @@ def _normalize_symbols(symbols: List[str]) -> List[str]:
     return list(dict.fromkeys(normalized))
 
 
-def _normalize_index_alias(symbol: str) -> str:
-    return re.sub(r"\s+", " ", symbol.strip().upper())
-
-
 def _kr_index_definition(symbol: str) -> Dict[str, str] | None:
-    return KR_INDEX_ALIASES.get(_normalize_index_alias(symbol))
+    return _classify_symbol(symbol).kr_index
 
 
 def _us_index_definition(symbol: str) -> Dict[str, str] | None:
-    return YAHOO_INDEX_ALIASES.get(_normalize_index_alias(symbol))
+    return _classify_symbol(symbol).us_index
 
 
 def _is_index_symbol(symbol: str) -> bool:
-    return _kr_index_definition(symbol) is not None or _us_index_definition(symbol) is not None
+    return _classify_symbol(symbol).kind == QUOTE_CLASS_INDEX
 
 
 def _cache_key(symbols: List[str]) -> str:
@@ -280,11 +998,11 @@ def _is_kr_symbol(symbol: str) -> bool:
         return True
     if s.endswith(".KS") or s.endswith(".KQ"):
         return True
-    if re.fullmatch(r"\d{6}", s):
+    if KR_STOCK_CODE_RE.fullmatch(s):
         return True
-    if re.fullmatch(r"\d[0-9A-Z]{5}", s):
+    if KR_SHORT_CODE_RE.fullmatch(s):
         return True
-    if re.fullmatch(r"A\d{6}", s):
+    if KR_PREFIXED_CODE_RE.fullmatch(s):
         return True
     return False
 
@@ -293,43 +1011,228 @@ def _normalize_kr_code(symbol: str) -> str:
     raw = symbol.strip().upper()
     if raw.endswith(".KS") or raw.endswith(".KQ"):
         raw = raw[:-3]
-    if re.fullmatch(r"A\d{6}", raw):
+    if KR_PREFIXED_CODE_RE.fullmatch(raw):
         return raw[1:]
     return raw
 
 
 def _parse_kospi_stock_code(symbol: str) -> str | None:
-    raw = symbol.strip().upper()
-    if raw.startswith("KR:"):
-        raw = raw.split(":", 1)[1].strip()
-    if raw.endswith(".KQ"):
-        return None
-    code = _normalize_kr_code(raw)
-    return code if _is_kr_stock_code(code) else None
+    return _classify_symbol(symbol).kospi_code
 
 
 def _is_kr_stock_code(code: str) -> bool:
-    return bool(re.fullmatch(r"\d{6}", code))
+    return KR_STOCK_CODE_RE.fullmatch(code) is not None
 
 
 def _is_kr_etf_etn_short_code(code: str) -> bool:
-    return bool(re.fullmatch(r"\d{4}[0-9A-Z]{2}", code) and re.search(r"[A-Z]", code))
+    return KR_ETF_ETN_CODE_RE.fullmatch(code) is not None and UPPER_ALPHA_RE.search(code) is not None
 
 
-def _parse_symbol(symbol: str) -> Tuple[str, str | None, str]:
+class _ParsedSymbol(NamedTuple):
+    market: str
+    excd: str | None
+    code: str
+    kind: str
+    quote_market: str
+    kr_index: Dict[str, str] | None
+    us_index: Dict[str, str] | None
+    kospi_code: str | None
+    kr_like: bool
+
+
+@lru_cache(maxsize=SYMBOL_CLASSIFY_CACHE_MAX)
+def _classify_symbol(symbol: str) -> _ParsedSymbol:
     raw = symbol.strip().upper()
-    if not raw:
-        return "UNKNOWN", None, ""
+    alias = WHITESPACE_RE.sub(" ", raw)
+    kr_index = KR_INDEX_ALIASES.get(alias)
+    us_index = YAHOO_INDEX_ALIASES.get(alias)
+
     kr_code = _normalize_kr_code(raw)
-    if _is_kr_stock_code(kr_code) or _is_kr_etf_etn_short_code(kr_code):
-        return "KR", None, kr_code
-    if ":" in raw:
-        parts = raw.split(":", 1)
-        excd = parts[0].strip().upper()
-        symb = parts[1].strip().upper()
-        return "US", excd, symb
-    excd = _get_default_excd()
-    return "US", excd, raw
+    if not raw:
+        market, excd, code = "UNKNOWN", None, ""
+    elif _is_kr_stock_code(kr_code) or _is_kr_etf_etn_short_code(kr_code):
+        market, excd, code = "KR", None, kr_code
+    elif ":" in raw:
+        prefix, rest = raw.split(":", 1)
+        market, excd, code = "US", prefix.strip(), rest.strip()
+    else:
+        market, excd, code = "US", _get_default_excd(), raw
+
+    if raw == "USD/KRW":
+        kind, quote_market = QUOTE_CLASS_FX, MARKET_FX
+    elif kr_index is not None or us_index is not None:
+        kind = QUOTE_CLASS_INDEX
+        quote_market = MARKET_US if us_index and us_index.get("currency") != "KRW" else MARKET_KR
+    elif market == "KR":
+        kind = QUOTE_CLASS_KR_ETF_ETN if _is_kr_etf_etn_short_code(code) else QUOTE_CLASS_KR_STOCK
+        quote_market = MARKET_KR
+    else:
+        kind, quote_market = QUOTE_CLASS_US, MARKET_US
+
+    kospi_raw = raw.split(":", 1)[1].strip() if raw.startswith("KR:") else raw
+    kospi_code = None
+    if not kospi_raw.endswith(".KQ"):
+        candidate = _normalize_kr_code(kospi_raw)
+        kospi_code = candidate if _is_kr_stock_code(candidate) else None
+
+    return _ParsedSymbol(
+        market=market,
+        excd=excd,
+        code=code,
+        kind=kind,
+        quote_market=quote_market,
+        kr_index=kr_index,
+        us_index=us_index,
+        kospi_code=kospi_code,
+        kr_like=_is_kr_symbol(raw),
+    )
+
+
+def _parse_symbol(symbol: str) -> Tuple[str, str | None, str]:
+    parsed = _classify_symbol(symbol)
+    return parsed.market, parsed.excd, parsed.code
+
+
+def _parse_holiday_keys(keys: Tuple[str, ...]) -> Set[date]:
+    return {datetime.strptime(key, "%Y-%m-%d").date() for key in keys}
+
+
+def _nth_weekday(year: int, month: int, weekday: int, nth: int) -> date:
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (nth - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    last = (date(year + (month // 12), month % 12 + 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter_sunday(year: int) -> date:
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    day = (h + l - 7 * m + 33 * month + 19) % 32
+    return date(year, month, day)
+
+
+def _observed_us_holiday(day: date) -> date:
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _us_market_holidays(year: int) -> Set[date]:
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),
+        _nth_weekday(year, 2, 0, 3),
+        _easter_sunday(year) - timedelta(days=2),
+        _last_weekday(year, 5, 0),
+        _observed_us_holiday(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),
+        _nth_weekday(year, 11, 3, 4),
+        _observed_us_holiday(date(year, 12, 25)),
+    }
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(_observed_us_holiday(new_year))
+    if year >= 2022:
+        holidays.add(_observed_us_holiday(date(year, 6, 19)))
+    return holidays
+
+
+def _krx_holidays(year: int) -> Set[date]:
+    holidays = {datetime.strptime(f"{year}-{month_day}", "%Y-%m-%d").date() for month_day in KRX_FIXED_HOLIDAYS}
+    lunar = KRX_LUNAR_HOLIDAYS.get(year)
+    if lunar:
+        seollal, buddha, chuseok = (datetime.strptime(value, "%Y-%m-%d").date() for value in lunar)
+        holidays.add(buddha)
+        for center in (seollal, chuseok):
+            holidays.update({center - timedelta(days=1), center, center + timedelta(days=1)})
+    return holidays
+
+
+def _market_holidays(market: str, year: int) -> Set[date]:
+    key = (market, year)
+    cached = _market_holiday_cache.get(key)
+    if cached is not None:
+        return cached
+    settings = _get_settings()
+    if market == MARKET_US:
+        holidays = _us_market_holidays(year) | _parse_holiday_keys(settings.us_market_holidays)
+    else:
+        holidays = _krx_holidays(year) | _parse_holiday_keys(settings.krx_holidays)
+    holidays = {day for day in holidays if day.year == year}
+    _market_holiday_cache[key] = holidays
+    return holidays
+
+
+def _is_trading_day(market: str, day: date) -> bool:
+    return day.weekday() < 5 and day not in _market_holidays(market, day.year)
+
+
+def _market_session_bounds(market: str, day: date) -> Tuple[datetime, datetime]:
+    zone, open_at, close_at = MARKET_SESSIONS.get(market, MARKET_SESSIONS[MARKET_US])
+    opens = datetime.combine(day, open_at, tzinfo=zone)
+    closes = datetime.combine(day, close_at, tzinfo=zone)
+    if market != MARKET_FX:
+        closes += timedelta(minutes=_get_market_close_grace_minutes())
+    return opens, closes
+
+
+def _market_state(market: str, now: datetime | None = None) -> Tuple[bool, float]:
+    """Return whether the market is in session and the seconds until that changes."""
+    current = now or datetime.now(timezone.utc)
+    zone = MARKET_SESSIONS.get(market, MARKET_SESSIONS[MARKET_US])[0]
+    today = current.astimezone(zone).date()
+    for offset in range(0, 15):
+        day = today + timedelta(days=offset)
+        if not _is_trading_day(market, day):
+            continue
+        opens, closes = _market_session_bounds(market, day)
+        if current < opens:
+            return False, (opens - current).total_seconds()
+        if current < closes:
+            return True, (closes - current).total_seconds()
+    return False, float(_get_closed_market_ttl_seconds())
+
+
+def _last_closed_session_date(market: str, now: datetime | None = None) -> str:
+    current = now or datetime.now(timezone.utc)
+    zone = MARKET_SESSIONS.get(market, MARKET_SESSIONS[MARKET_US])[0]
+    day = current.astimezone(zone).date()
+    for _ in range(0, 15):
+        if _is_trading_day(market, day) and _market_session_bounds(market, day)[1] <= current:
+            return day.strftime("%Y-%m-%d")
+        day -= timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
+
+
+def _has_trading_day(market: str, start_date: str, end_date: str) -> bool:
+    day = datetime.strptime(start_date, "%Y-%m-%d").date()
+    last = datetime.strptime(end_date, "%Y-%m-%d").date()
+    while day <= last:
+        if _is_trading_day(market, day):
+            return True
+        day += timedelta(days=1)
+    return False
+
+
+def _get_quote_ttl_seconds(symbol: str, now: datetime | None = None) -> int:
+    parsed = _classify_symbol(symbol)
+    open_ttl = _get_quote_class_ttl_seconds(parsed.kind)
+    is_open, seconds_until_change = _market_state(parsed.quote_market, now)
+    if is_open:
+        return int(min(open_ttl, max(1.0, seconds_until_change)))
+    return int(max(open_ttl, min(_get_closed_market_ttl_seconds(), seconds_until_change)))
 
 
 def _has_hangul(text: str) -> bool:
@@ -360,22 +1263,24 @@ def _to_positive_float(value: Any) -> float | None:
 def _extract_guard_context(
     data: Dict[str, Any],
     *,
+    schema: str,
     day_low_keys: List[str],
     day_high_keys: List[str],
     bid_keys: List[str],
     ask_keys: List[str],
 ) -> Dict[str, float | None]:
     return {
-        "dayLow": _to_positive_float(_find_value(data, day_low_keys)),
-        "dayHigh": _to_positive_float(_find_value(data, day_high_keys)),
-        "bid": _to_positive_float(_find_value(data, bid_keys)),
-        "ask": _to_positive_float(_find_value(data, ask_keys)),
+        "dayLow": _to_positive_float(_extract_value(schema, data, day_low_keys)),
+        "dayHigh": _to_positive_float(_extract_value(schema, data, day_high_keys)),
+        "bid": _to_positive_float(_extract_value(schema, data, bid_keys)),
+        "ask": _to_positive_float(_extract_value(schema, data, ask_keys)),
     }
 
 
-def _extract_kr_guard_context(data: Dict[str, Any]) -> Dict[str, float | None]:
+def _extract_kr_guard_context(data: Dict[str, Any], schema: str = KIS_TR_ID_PRICE) -> Dict[str, float | None]:
     return _extract_guard_context(
         data,
+        schema=schema,
         day_low_keys=["stck_lwpr", "low_price", "low", "lwpr"],
         day_high_keys=["stck_hgpr", "high_price", "high", "hgpr"],
         bid_keys=["bidp1", "best_bidp", "bid_price", "bid"],
@@ -383,9 +1288,12 @@ def _extract_kr_guard_context(data: Dict[str, Any]) -> Dict[str, float | None]:
     )
 
 
-def _extract_overseas_guard_context(data: Dict[str, Any]) -> Dict[str, float | None]:
+def _extract_overseas_guard_context(
+    data: Dict[str, Any], schema: str = KIS_TR_ID_OVERSEAS_PRICE
+) -> Dict[str, float | None]:
     return _extract_guard_context(
         data,
+        schema=schema,
         day_low_keys=["low", "low_price", "ovrs_lwpr", "tlow"],
         day_high_keys=["high", "high_price", "ovrs_hgpr", "thigh"],
         bid_keys=["bid", "bid_price", "tbid", "pbid"],
@@ -393,12 +1301,677 @@ def _extract_overseas_guard_context(data: Dict[str, Any]) -> Dict[str, float | N
     )
 
 
-def _get_last_good_quote(symbol: str) -> Dict[str, Any] | None:
-    return _last_good_quotes.get(symbol.upper())
+class _CacheBackend:
+    name = "base"
+    persistent = False
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def set_many(self, namespace: str, values: Dict[str, Any], ttl: float) -> None:
+        raise NotImplementedError
+
+    async def items(self, namespace: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def sweep(self) -> None:
+        return None
+
+    async def sizes(self) -> Dict[str, Dict[str, int]]:
+        return {}
+
+    async def close(self) -> None:
+        return None
+
+    async def get(self, namespace: str, key: str) -> Any:
+        return (await self.get_many(namespace, [key])).get(key)
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        await self.set_many(namespace, {key: value}, ttl)
+
+
+class _MemoryCacheBackend(_CacheBackend):
+    name = "memory"
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._namespaces: Dict[str, "OrderedDict[str, Tuple[float, int, Any]]"] = {}
+        self._bytes: Dict[str, int] = {}
+        self._value_sizes: Dict[str, float] = {}
+        self._writes: Dict[str, int] = {}
+
+    def _estimate_size(self, namespace: str, key: str, value: Any) -> int:
+        # Serialising every value only to weigh it costs more than the write itself; values within a namespace
+        # have similar shapes, so measure a sample and charge the running average to the rest.
+        writes = self._writes.get(namespace, 0)
+        self._writes[namespace] = writes + 1
+        average = self._value_sizes.get(namespace)
+        if average is None or writes % CACHE_SIZE_SAMPLE_EVERY == 0:
+            size = len(json.dumps(value, ensure_ascii=False, default=str))
+            average = float(size) if average is None else average * 0.75 + size * 0.25
+            self._value_sizes[namespace] = average
+        return len(key) + int(average)
+
+    def _pop(self, namespace: str, key: str) -> None:
+        entry = self._namespaces[namespace].pop(key, None)
+        if entry is not None:
+            self._bytes[namespace] -= entry[1]
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        entries = self._namespaces.get(namespace)
+        if not entries:
+            return {}
+        now = time.time()
+        found: Dict[str, Any] = {}
+        for key in keys:
+            entry = entries.get(key)
+            if entry is None:
+                continue
+            if entry[0] <= now:
+                self._pop(namespace, key)
+                _record_cache_stat(namespace, "expired")
+                continue
+            entries.move_to_end(key)
+            found[key] = entry[2]
+        return found
+
+    async def set_many(self, namespace: str, values: Dict[str, Any], ttl: float) -> None:
+        entries = self._namespaces.setdefault(namespace, OrderedDict())
+        self._bytes.setdefault(namespace, 0)
+        expires_at = time.time() + ttl
+        for key, value in values.items():
+            size = self._estimate_size(namespace, key, value)
+            self._pop(namespace, key)
+            entries[key] = (expires_at, size, value)
+            self._bytes[namespace] += size
+        evicted = 0
+        while len(entries) > 1 and (len(entries) > self.max_entries or self._bytes[namespace] > self.max_bytes):
+            self._pop(namespace, next(iter(entries)))
+            evicted += 1
+        if evicted:
+            _record_cache_stat(namespace, "evictions", evicted)
+
+    async def items(self, namespace: str) -> Dict[str, Any]:
+        now = time.time()
+        return {key: entry[2] for key, entry in self._namespaces.get(namespace, {}).items() if entry[0] > now}
+
+    async def sweep(self) -> None:
+        now = time.time()
+        for namespace, entries in self._namespaces.items():
+            expired = [key for key, entry in entries.items() if entry[0] <= now]
+            for key in expired:
+                self._pop(namespace, key)
+            if expired:
+                _record_cache_stat(namespace, "expired", len(expired))
+
+    async def sizes(self) -> Dict[str, Dict[str, int]]:
+        return {
+            namespace: {"entries": len(entries), "bytes": self._bytes.get(namespace, 0)}
+            for namespace, entries in self._namespaces.items()
+        }
+
+
+class _SqliteCacheBackend(_CacheBackend):
+    name = "sqlite"
+    persistent = True
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._lock = threading.Lock()
+
+    def _get_many_sync(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        found: Dict[str, Any] = {}
+        now = time.time()
+        with self._lock:
+            for offset in range(0, len(keys), 500):
+                chunk = keys[offset : offset + 500]
+                placeholders = ",".join("?" for _ in chunk)
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE namespace = ? AND expires_at > ? AND key IN ({placeholders})",
+                    (namespace, now, *chunk),
+                ).fetchall()
+                for key, value in rows:
+                    found[key] = json.loads(value)
+        return found
+
+    def _set_many_sync(self, namespace: str, values: Dict[str, Any], ttl: float) -> None:
+        expires_at = time.time() + ttl
+        rows = [(namespace, key, json.dumps(value, ensure_ascii=False), expires_at) for key, value in values.items()]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)", rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _sweep_sync(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, COUNT(*) FROM cache WHERE expires_at <= ? GROUP BY namespace", (time.time(),)
+            ).fetchall()
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        return dict(rows)
+
+    def _sizes_sync(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, COUNT(*), COALESCE(SUM(LENGTH(key) + LENGTH(value)), 0) FROM cache GROUP BY namespace"
+            ).fetchall()
+        return {namespace: {"entries": count, "bytes": size} for namespace, count, size in rows}
+
+    def _items_sync(self, namespace: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM cache WHERE namespace = ? AND expires_at > ?", (namespace, time.time())
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        return await asyncio.to_thread(self._get_many_sync, namespace, keys)
+
+    async def set_many(self, namespace: str, values: Dict[str, Any], ttl: float) -> None:
+        if values:
+            await asyncio.to_thread(self._set_many_sync, namespace, values, ttl)
+
+    async def items(self, namespace: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._items_sync, namespace)
+
+    async def sweep(self) -> None:
+        for namespace, expired in (await asyncio.to_thread(self._sweep_sync)).items():
+            _record_cache_stat(namespace, "expired", expired)
+
+    async def sizes(self) -> Dict[str, Dict[str, int]]:
+        return await asyncio.to_thread(self._sizes_sync)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _RedisCacheBackend(_CacheBackend):
+    name = "redis"
+    persistent = True
+
+    def __init__(self, url: str, prefix: str) -> None:
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.strip("/") or 0)
+        self.prefix = prefix
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(*args: Any) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        assert self._reader is not None
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("redis connection closed")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RuntimeError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            if count < 0:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+        raise RuntimeError(f"unexpected redis reply {line!r}")
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._command_locked("AUTH", self.password)
+        if self.db:
+            await self._command_locked("SELECT", self.db)
+
+    async def _pipeline_locked(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        assert self._writer is not None
+        self._writer.write(b"".join(self._encode(*args) for args in commands))
+        await self._writer.drain()
+        return [await self._read_reply() for _ in commands]
+
+    async def _command_locked(self, *args: Any) -> Any:
+        return (await self._pipeline_locked([args]))[0]
+
+    async def _pipeline(self, commands: List[Tuple[Any, ...]]) -> List[Any]:
+        async with self._lock:
+            # Any interruption (including cancellation) between writing and
+            # reading leaves replies on the wire, so drop the connection
+            # unless every reply was consumed.
+            consumed = False
+            try:
+                if self._writer is None or self._writer.is_closing():
+                    await self._connect()
+                replies = await self._pipeline_locked(commands)
+                consumed = True
+                return replies
+            finally:
+                if not consumed:
+                    await self._reset()
+
+    async def _command(self, *args: Any) -> Any:
+        return (await self._pipeline([args]))[0]
+
+    async def _reset(self) -> None:
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    async def get_many(self, namespace: str, keys: List[str]) -> Dict[str, Any]:
+        if not keys:
+            return {}
+        values = await self._command("MGET", *[self._key(namespace, key) for key in keys])
+        return {key: json.loads(value) for key, value in zip(keys, values or []) if value is not None}
+
+    async def set_many(self, namespace: str, values: Dict[str, Any], ttl: float) -> None:
+        if not values:
+            return
+        ttl_ms = max(1, int(ttl * 1000))
+        await self._pipeline(
+            [
+                ("SET", self._key(namespace, key), json.dumps(value, ensure_ascii=False), "PX", ttl_ms)
+                for key, value in values.items()
+            ]
+        )
+
+    async def items(self, namespace: str) -> Dict[str, Any]:
+        pattern = self._key(namespace, "*")
+        prefix_length = len(self._key(namespace, ""))
+        keys: List[str] = []
+        cursor = "0"
+        while True:
+            cursor_raw, batch = await self._command("SCAN", cursor, "MATCH", pattern, "COUNT", 500)
+            keys.extend(item.decode("utf-8")[prefix_length:] for item in batch)
+            cursor = cursor_raw.decode() if isinstance(cursor_raw, bytes) else str(cursor_raw)
+            if cursor == "0":
+                break
+        return await self.get_many(namespace, keys)
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._reset()
+
 
+def _create_cache_backend() -> _CacheBackend:
+    settings = _get_settings()
+    if settings.cache_backend == "sqlite":
+        return _SqliteCacheBackend(settings.cache_sqlite_path)
+    if settings.cache_backend == "redis":
+        return _RedisCacheBackend(settings.redis_url, settings.redis_prefix)
+    if settings.cache_backend != "memory":
+        _log("CACHE BACKEND WARNING", "unknown QUOTE_CACHE_BACKEND, using memory", backend=settings.cache_backend)
+    return _MemoryCacheBackend(settings.cache_max_entries, settings.cache_max_bytes)
 
-def _remember_last_good_quote(symbol: str, quote: Dict[str, Any]) -> None:
-    _last_good_quotes[symbol.upper()] = {"quote": dict(quote), "updated_at": time.time()}
+
+def _get_cache_backend() -> _CacheBackend:
+    global _cache_backend
+    if _cache_backend is None:
+        _cache_backend = _create_cache_backend()
+        _log("CACHE BACKEND", backend=_cache_backend.name)
+    return _cache_backend
+
+
+async def _close_cache_backend() -> None:
+    global _cache_backend
+    backend = _cache_backend
+    _cache_backend = None
+    if backend is not None:
+        await backend.close()
+
+
+def _record_cache_stat(namespace: str, field: str, count: int = 1) -> None:
+    stats = _cache_stats.setdefault(namespace, {"hits": 0, "misses": 0, "evictions": 0, "expired": 0})
+    stats[field] += count
+
+
+async def _cache_get_many(namespace: str, keys: List[str]) -> Dict[str, Any]:
+    try:
+        found = await _get_cache_backend().get_many(namespace, keys)
+    except Exception as exc:
+        _log("CACHE GET ERROR", namespace=namespace, err=repr(exc))
+        found = {}
+    _record_cache_stat(namespace, "hits", len(found))
+    _record_cache_stat(namespace, "misses", len(keys) - len(found))
+    return found
+
+
+async def _cache_get(namespace: str, key: str) -> Any:
+    return (await _cache_get_many(namespace, [key])).get(key)
+
+
+async def _cache_set_many(namespace: str, values: Dict[str, Any], ttl: float) -> None:
+    try:
+        await _get_cache_backend().set_many(namespace, values, ttl)
+    except Exception as exc:
+        _log("CACHE SET ERROR", namespace=namespace, err=repr(exc))
+
+
+async def _cache_set(namespace: str, key: str, value: Any, ttl: float) -> None:
+    await _cache_set_many(namespace, {key: value}, ttl)
+
+
+async def _cache_items(namespace: str) -> Dict[str, Any]:
+    try:
+        return await _get_cache_backend().items(namespace)
+    except Exception as exc:
+        _log("CACHE ITEMS ERROR", namespace=namespace, err=repr(exc))
+        return {}
+
+
+async def _run_cache_sweeper() -> None:
+    while True:
+        await asyncio.sleep(_get_cache_sweep_seconds())
+        try:
+            await _get_cache_backend().sweep()
+        except Exception as exc:
+            _log("CACHE SWEEP ERROR", err=repr(exc))
+
+
+def _start_cache_sweeper() -> None:
+    global _cache_sweeper
+    if _cache_sweeper is None or _cache_sweeper.done():
+        _cache_sweeper = asyncio.create_task(_run_cache_sweeper())
+
+
+async def _stop_cache_sweeper() -> None:
+    global _cache_sweeper
+    if _cache_sweeper is not None:
+        _cache_sweeper.cancel()
+        await asyncio.gather(_cache_sweeper, return_exceptions=True)
+        _cache_sweeper = None
+
+
+async def _cache_stats_snapshot() -> Dict[str, Any]:
+    backend = _get_cache_backend()
+    try:
+        sizes = await backend.sizes()
+    except Exception as exc:
+        _log("CACHE STATS ERROR", err=repr(exc))
+        sizes = {}
+    namespaces: Dict[str, Dict[str, Any]] = {}
+    for namespace in sorted(set(_cache_stats) | set(sizes)):
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, **_cache_stats.get(namespace, {})}
+        lookups = stats["hits"] + stats["misses"]
+        stats["hitRatio"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats.update(sizes.get(namespace, {}))
+        namespaces[namespace] = stats
+    return {"backend": backend.name, "namespaces": namespaces}
+
+
+def _inc_metric(name: str, amount: float = 1.0, **labels: str) -> None:
+    series = _metric_counters.setdefault(name, {})
+    key = tuple(labels.items())
+    series[key] = series.get(key, 0.0) + amount
+
+
+def _metric_path(path: str) -> str:
+    if path.startswith("/v8/finance/chart/"):
+        return "/v8/finance/chart/{symbol}"
+    return path
+
+
+def _observe_upstream_latency(upstream: str, request: httpx.Request, status: str, elapsed: float) -> None:
+    host = request.url.host
+    key = (upstream, host, _metric_path(request.url.path), request.headers.get("tr_id", ""))
+    buckets = _upstream_latency.get(key)
+    if buckets is None:
+        buckets = [0.0] * (len(METRIC_LATENCY_BUCKETS) + 2)
+        _upstream_latency[key] = buckets
+    buckets[bisect.bisect_left(METRIC_LATENCY_BUCKETS, elapsed)] += 1
+    buckets[-1] += elapsed
+    _inc_metric("quote_upstream_requests_total", upstream=upstream, host=host, status=status)
+
+
+class _MetricsTransport(httpx.AsyncBaseTransport):
+    def __init__(self, upstream: str, inner: httpx.AsyncBaseTransport) -> None:
+        self.upstream = upstream
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _upstream_inflight[self.upstream] = _upstream_inflight.get(self.upstream, 0) + 1
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self._inner.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            _upstream_inflight[self.upstream] -= 1
+            _observe_upstream_latency(self.upstream, request, status, time.perf_counter() - started)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class _CircuitOpenError(httpx.TransportError):
+    pass
+
+
+class _CircuitBreaker:
+    def __init__(self) -> None:
+        self.failures = 0
+        self.open = False
+        self.opened_at = 0.0
+        self.probing = False
+
+    def rejects(self, open_seconds: float) -> bool:
+        return self.open and (self.probing or time.monotonic() - self.opened_at < open_seconds)
+
+    def allow(self, open_seconds: float) -> bool:
+        if not self.open:
+            return True
+        if self.probing or time.monotonic() - self.opened_at < open_seconds:
+            return False
+        # Half-open: the first request after the cool-down probes the endpoint, the rest keep failing fast.
+        self.probing = True
+        return True
+
+    def record_success(self) -> bool:
+        closed = self.open
+        self.failures = 0
+        self.open = False
+        self.probing = False
+        return closed
+
+    def record_failure(self, threshold: int) -> bool:
+        self.failures += 1
+        if self.probing or (not self.open and self.failures >= threshold):
+            self.open = True
+            self.probing = False
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+
+class _CircuitBreakerTransport(httpx.AsyncBaseTransport):
+    def __init__(self, upstream: str, inner: httpx.AsyncBaseTransport) -> None:
+        self.upstream = upstream
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        settings = _get_settings()
+        if settings.circuit_failures <= 0:
+            return await self._inner.handle_async_request(request)
+        endpoint = _metric_path(request.url.path)
+        breaker = _circuit_breakers.get((self.upstream, endpoint))
+        if breaker is None:
+            breaker = _circuit_breakers[(self.upstream, endpoint)] = _CircuitBreaker()
+        if not breaker.allow(settings.circuit_open_seconds):
+            _inc_metric("quote_circuit_rejections_total", upstream=self.upstream, endpoint=endpoint)
+            raise _CircuitOpenError(f"circuit open for {self.upstream} {endpoint}", request=request)
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception as exc:
+            if breaker.record_failure(settings.circuit_failures):
+                _log("CIRCUIT OPEN", level=logging.WARNING, upstream=self.upstream, endpoint=endpoint, err=repr(exc))
+            raise
+        except BaseException:
+            breaker.probing = False
+            raise
+        if response.status_code in CIRCUIT_FAILURE_STATUSES:
+            if breaker.record_failure(settings.circuit_failures):
+                _log(
+                    "CIRCUIT OPEN",
+                    level=logging.WARNING,
+                    upstream=self.upstream,
+                    endpoint=endpoint,
+                    status=response.status_code,
+                )
+        elif breaker.record_success():
+            _log("CIRCUIT CLOSED", upstream=self.upstream, endpoint=endpoint)
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def _check_circuit(upstream: str, url: str) -> None:
+    # Lets callers fail fast before queueing for a rate token or concurrency slot; the transport still makes
+    # the authoritative decision, including the half-open probe.
+    settings = _get_settings()
+    if settings.circuit_failures <= 0:
+        return
+    request = httpx.Request("GET", url)
+    endpoint = _metric_path(request.url.path)
+    breaker = _circuit_breakers.get((upstream, endpoint))
+    if breaker is not None and breaker.rejects(settings.circuit_open_seconds):
+        _inc_metric("quote_circuit_rejections_total", upstream=upstream, endpoint=endpoint)
+        raise _CircuitOpenError(f"circuit open for {upstream} {endpoint}", request=request)
+
+
+def _request_failure_reason(exc: Exception) -> str:
+    return "circuit-open" if isinstance(exc, _CircuitOpenError) else "request-failed"
+
+
+def _format_metric_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_metric_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def _render_metrics() -> str:
+    now = time.time()
+    counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {
+        name: dict(series) for name, series in _metric_counters.items()
+    }
+    lookups = counters.setdefault("quote_cache_lookups_total", {})
+    evictions = counters.setdefault("quote_cache_evictions_total", {})
+    for namespace, stats in _cache_stats.items():
+        lookups[(("namespace", namespace), ("result", "hit"))] = stats.get("hits", 0)
+        lookups[(("namespace", namespace), ("result", "miss"))] = stats.get("misses", 0)
+        evictions[(("namespace", namespace), ("reason", "lru"))] = stats.get("evictions", 0)
+        evictions[(("namespace", namespace), ("reason", "expired"))] = stats.get("expired", 0)
+    gauges: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {
+        "quote_upstream_inflight_requests": {
+            (("upstream", upstream),): count for upstream, count in _upstream_inflight.items()
+        },
+        "quote_upstream_slots_active": {(): _upstream_limiter.active},
+        "quote_upstream_slots_waiting": {(): len(_upstream_limiter._waiters)},
+        "quote_single_flight_inflight": {(): len(_inflight_requests)},
+        "quote_stream_subscribers": {(): sum(len(subs) for subs in _stream_subscriptions.values())},
+        "quote_hot_symbols": {(): len(_quote_hot_symbols)},
+        "quote_kis_key_load": {
+            (("key", _mask_app_key(app_key)),): load for app_key, load in _kis_key_load.items()
+        },
+        "quote_kis_token_ttl_seconds": {
+            (("key", _mask_app_key(app_key)),): round(max(0.0, entry["expires_at"] - now))
+            for app_key, entry in _kis_tokens.items()
+            if entry["access_token"]
+        },
+        "quote_circuit_open": {
+            (("upstream", upstream), ("endpoint", endpoint)): int(breaker.open)
+            for (upstream, endpoint), breaker in _circuit_breakers.items()
+        },
+    }
+
+    lines: List[str] = []
+    name = "quote_upstream_request_duration_seconds"
+    lines.append(f"# HELP {name} {METRIC_HELP[name][1]}")
+    lines.append(f"# TYPE {name} histogram")
+    for (upstream, host, path, tr_id), buckets in sorted(_upstream_latency.items()):
+        base = (("upstream", upstream), ("host", host), ("path", path), ("tr_id", tr_id))
+        cumulative = 0.0
+        for bound, count in zip(METRIC_LATENCY_BUCKETS, buckets):
+            cumulative += count
+            labels = _format_metric_labels(base + (("le", repr(bound)),))
+            lines.append(f"{name}_bucket{labels} {_format_metric_value(cumulative)}")
+        cumulative += buckets[-2]
+        lines.append(f"{name}_bucket{_format_metric_labels(base + (('le', '+Inf'),))} {_format_metric_value(cumulative)}")
+        lines.append(f"{name}_sum{_format_metric_labels(base)} {buckets[-1]!r}")
+        lines.append(f"{name}_count{_format_metric_labels(base)} {_format_metric_value(cumulative)}")
+
+    for name, series in sorted({**counters, **gauges}.items()):
+        kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series.items()):
+            lines.append(f"{name}{_format_metric_labels(labels)} {_format_metric_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+async def _get_last_good_quote(symbol: str) -> Dict[str, Any] | None:
+    return await _cache_get(CACHE_NS_LAST_GOOD, symbol.upper())
+
+
+async def _remember_last_good_quote(symbol: str, quote: Dict[str, Any]) -> None:
+    global _persisted_cache_dirty
+    await _cache_set(
+        CACHE_NS_LAST_GOOD, symbol.upper(), {"quote": dict(quote), "updated_at": time.time()}, STATE_LAST_GOOD_MAX_AGE
+    )
+    _persisted_cache_dirty = True
 
 
 def _with_guard_fields(
@@ -417,14 +1990,15 @@ def _with_guard_fields(
     return enriched
 
 
-def _fallback_quote_from_last_good(symbol: str, reasons: List[str], *, source: str = "kis") -> Dict[str, Any]:
+async def _fallback_quote_from_last_good(symbol: str, reasons: List[str], *, source: str = "kis") -> Dict[str, Any]:
     reason_text = ",".join(reasons) if reasons else None
-    last_good = _get_last_good_quote(symbol)
+    last_good = await _get_last_good_quote(symbol)
     if last_good:
         stale_age = int(max(0, time.time() - float(last_good.get("updated_at") or 0.0)))
         if stale_age <= _get_guard_stale_ttl_seconds():
             stale_quote = dict(last_good["quote"])
             stale_quote["symbol"] = symbol
+            _inc_metric("quote_fallback_total", source=source, outcome="stale")
             return _with_guard_fields(
                 stale_quote,
                 status=QUOTE_STATUS_STALE,
@@ -433,6 +2007,7 @@ def _fallback_quote_from_last_good(symbol: str, reasons: List[str], *, source: s
                 stale_age_sec=stale_age,
             )
 
+    _inc_metric("quote_fallback_total", source=source, outcome="error")
     return _with_guard_fields(
         _empty_quote_with_source(symbol, source),
         status=QUOTE_STATUS_ERROR,
@@ -442,10 +2017,11 @@ def _fallback_quote_from_last_good(symbol: str, reasons: List[str], *, source: s
     )
 
 
-def _evaluate_price_guard(symbol: str, candidate: Dict[str, Any]) -> Dict[str, Any]:
+async def _evaluate_price_guard(symbol: str, candidate: Dict[str, Any], settings: _Settings) -> Dict[str, Any]:
     reasons: List[str] = []
     price = _to_positive_float(candidate.get("price"))
     if price is None:
+        _inc_metric("quote_price_guard_suspect_total", reason="invalid-price")
         return {"suspect": True, "reasons": ["invalid-price"]}
 
     day_low = _to_positive_float(candidate.get("dayLow"))
@@ -453,9 +2029,9 @@ def _evaluate_price_guard(symbol: str, candidate: Dict[str, Any]) -> Dict[str, A
     bid = _to_positive_float(candidate.get("bid"))
     ask = _to_positive_float(candidate.get("ask"))
 
-    margin = _get_guard_range_margin()
-    jump_threshold = _get_guard_jump_threshold()
-    mid_threshold = _get_guard_mid_threshold()
+    margin = settings.guard_range_margin
+    jump_threshold = settings.guard_jump_threshold
+    mid_threshold = settings.guard_mid_threshold
 
     range_out = False
     if day_low and day_high and day_low <= day_high:
@@ -473,7 +2049,7 @@ def _evaluate_price_guard(symbol: str, candidate: Dict[str, Any]) -> Dict[str, A
                 reasons.append("far-from-midpoint")
 
     jump_out = False
-    last_good = _get_last_good_quote(symbol)
+    last_good = await _get_last_good_quote(symbol)
     previous_price = (
         _to_positive_float(last_good.get("quote", {}).get("price"))
         if last_good and isinstance(last_good.get("quote"), dict)
@@ -486,6 +2062,9 @@ def _evaluate_price_guard(symbol: str, candidate: Dict[str, Any]) -> Dict[str, A
             reasons.append("jump-vs-last-good")
 
     suspect = range_out or (jump_out and midpoint_out)
+    if suspect:
+        for reason in reasons:
+            _inc_metric("quote_price_guard_suspect_total", reason=reason)
     return {"suspect": suspect, "reasons": reasons}
 
 
@@ -495,7 +2074,7 @@ def _normalize_date_key(value: Any) -> str | None:
     raw = str(value).strip()
     if not raw:
         return None
-    cleaned = re.sub(r"[^0-9]", "", raw)
+    cleaned = NON_DIGIT_RE.sub("", raw)
     if len(cleaned) != 8:
         return None
     yyyy = cleaned[0:4]
@@ -512,11 +2091,29 @@ def _date_before(value: str) -> str:
     return (datetime.strptime(value, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
 
 
-def _merge_history_pages(pages: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-    by_date: Dict[str, Dict[str, Any]] = {}
-    for points in pages:
-        for point in points:
-            date = point.get("date")
+def _date_after(value: str) -> str:
+    return (datetime.strptime(value, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _date_shift(value: str, days: int) -> str:
+    return (datetime.strptime(value, "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def _history_partitions(start_date: str, end_date: str, days: int) -> List[Tuple[str, str]]:
+    partitions: List[Tuple[str, str]] = []
+    cursor_end = end_date
+    while cursor_end >= start_date:
+        partition_start = max(start_date, _date_shift(cursor_end, -(days - 1)))
+        partitions.append((partition_start, cursor_end))
+        cursor_end = _date_before(partition_start)
+    return partitions
+
+
+def _merge_history_pages(pages: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    by_date: Dict[str, Dict[str, Any]] = {}
+    for points in pages:
+        for point in points:
+            date = point.get("date")
             if isinstance(date, str):
                 by_date[date] = point
     return [by_date[key] for key in sorted(by_date.keys())]
@@ -537,6 +2134,7 @@ def _resolve_history_range(start: str | None, end: str | None) -> Tuple[str, str
 def _extract_history_points(
     payload: Dict[str, Any],
     *,
+    schema: str,
     date_keys: List[str],
     close_keys: List[str],
     open_keys: List[str] | None = None,
@@ -554,10 +2152,16 @@ def _extract_history_points(
     if not candidates:
         candidates = [payload] if isinstance(payload, dict) else []
 
+    extract_date = _KeyPathExtractor(schema, date_keys)
+    extract_close = _KeyPathExtractor(schema, close_keys)
+    extract_open = _KeyPathExtractor(schema, open_keys or [])
+    extract_high = _KeyPathExtractor(schema, high_keys or [])
+    extract_low = _KeyPathExtractor(schema, low_keys or [])
+    extract_volume = _KeyPathExtractor(schema, volume_keys or [])
     parsed: List[Dict[str, Any]] = []
     for row in candidates:
-        date_value = _find_value(row, date_keys)
-        close_value = _find_value(row, close_keys)
+        date_value = extract_date(row)
+        close_value = extract_close(row)
         date_key = _normalize_date_key(date_value)
         close = _to_float(close_value)
         if not date_key or close is None:
@@ -565,10 +2169,10 @@ def _extract_history_points(
         if date_key < start_date or date_key > end_date:
             continue
         point: Dict[str, Any] = {"date": date_key, "close": float(close)}
-        open_value = _to_float(_find_value(row, open_keys or []))
-        high_value = _to_float(_find_value(row, high_keys or []))
-        low_value = _to_float(_find_value(row, low_keys or []))
-        volume_value = _to_float(_find_value(row, volume_keys or []))
+        open_value = _to_float(extract_open(row))
+        high_value = _to_float(extract_high(row))
+        low_value = _to_float(extract_low(row))
+        volume_value = _to_float(extract_volume(row))
         if open_value is not None:
             point["open"] = float(open_value)
         if high_value is not None:
@@ -584,46 +2188,115 @@ def _extract_history_points(
 
 
 def _find_value(node: Any, keys: List[str]) -> Any:
+    return _locate_value(node, keys)[0]
+
+
+def _locate_value(node: Any, keys: List[str]) -> Tuple[Any, Tuple[Any, ...] | None]:
     if isinstance(node, dict):
         for key in keys:
             if key in node:
-                return node[key]
-        for value in node.values():
-            found = _find_value(value, keys)
+                return node[key], (key,)
+        for child_key, value in node.items():
+            found, path = _locate_value(value, keys)
             if found is not None:
-                return found
+                return found, (child_key, *path)
     elif isinstance(node, list):
-        for item in node:
-            found = _find_value(item, keys)
+        for index, item in enumerate(node):
+            found, path = _locate_value(item, keys)
             if found is not None:
-                return found
-    return None
+                return found, (index, *path)
+    return None, None
+
+
+class _KeyPathExtractor:
+    def __init__(self, schema: str, keys: List[str]) -> None:
+        self.cache_key = (schema, tuple(keys))
+        self.keys = keys
+        self.path = _key_paths.get(self.cache_key)
+
+    def __call__(self, node: Any) -> Any:
+        path = self.path
+        if path is not None:
+            value = node
+            for step in path:
+                if isinstance(value, dict) and not isinstance(step, int):
+                    value = value.get(step)
+                elif isinstance(value, list) and isinstance(step, int) and step < len(value):
+                    value = value[step]
+                else:
+                    value = None
+                    break
+            if value is not None:
+                return value
+        if not self.keys:
+            return None
+        value, found_path = _locate_value(node, self.keys)
+        if found_path is not None and found_path != path:
+            if len(_key_paths) >= KEY_PATH_CACHE_MAX:
+                _key_paths.clear()
+            _key_paths[self.cache_key] = found_path
+            self.path = found_path
+        return value
+
+
+def _extract_value(schema: str, node: Any, keys: List[str]) -> Any:
+    return _KeyPathExtractor(schema, keys)(node)
 
 
 def _parse_kis_quote(
     data: Dict[str, Any],
+    schema: str = KIS_TR_ID_PRICE,
 ) -> Tuple[float | None, float | None, float | None, str | None]:
     price_keys = ["stck_prpr", "prpr", "price", "current_price"]
     change_keys = ["prdy_vrss", "change", "price_change"]
     change_percent_keys = ["prdy_ctrt", "change_percent", "change_rate"]
     name_keys = ["hts_kor_isnm", "prdt_name", "stck_name", "name", "isu_nm"]
-    price = _to_float(_find_value(data, price_keys))
-    change = _to_float(_find_value(data, change_keys))
-    change_percent = _to_float(_find_value(data, change_percent_keys))
-    name_value = _find_value(data, name_keys)
+    price = _to_float(_extract_value(schema, data, price_keys))
+    change = _to_float(_extract_value(schema, data, change_keys))
+    change_percent = _to_float(_extract_value(schema, data, change_percent_keys))
+    name_value = _extract_value(schema, data, name_keys)
     name = str(name_value).strip() if isinstance(name_value, str) and name_value.strip() else None
     return price, change, change_percent, name
 
 
-def _parse_kis_index_quote(data: Dict[str, Any]) -> Tuple[float | None, float | None, float | None, str | None]:
+def _parse_kis_multi_price(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    rows = data.get("output") or data.get("output1") or []
+    if isinstance(rows, dict):
+        rows = [rows]
+    parsed: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        code = _normalize_kr_code(str(row.get("inter_shrn_iscd") or "").strip().upper())
+        price = _to_float(row.get("inter2_prpr"))
+        if not code or price is None:
+            continue
+        name_value = row.get("inter_kor_isnm")
+        parsed[code] = {
+            "price": price,
+            "change": _to_float(row.get("inter2_prdy_vrss")),
+            "changePercent": _to_float(row.get("prdy_ctrt")),
+            "name": name_value.strip() if isinstance(name_value, str) and name_value.strip() else None,
+            "dayHigh": _to_positive_float(row.get("inter2_hgpr")),
+            "dayLow": _to_positive_float(row.get("inter2_lwpr")),
+            "ask": _to_positive_float(row.get("inter2_askp")),
+            "bid": _to_positive_float(row.get("inter2_bidp")),
+        }
+    return parsed
+
+
+def _parse_kis_index_quote(
+    data: Dict[str, Any],
+    schema: str = KIS_TR_ID_INDEX_PRICE,
+) -> Tuple[float | None, float | None, float | None, str | None]:
     price_keys = ["bstp_nmix_prpr", "prpr", "price", "current_price"]
     change_keys = ["bstp_nmix_prdy_vrss", "prdy_vrss", "change", "price_change"]
     change_percent_keys = ["bstp_nmix_prdy_ctrt", "prdy_ctrt", "change_percent", "change_rate"]
     name_keys = ["bstp_cls_code_name", "bstp_kor_isnm", "hts_kor_isnm", "name"]
-    price = _to_float(_find_value(data, price_keys))
-    change = _to_float(_find_value(data, change_keys))
-    change_percent = _to_float(_find_value(data, change_percent_keys))
-    name_value = _find_value(data, name_keys)
+    price = _to_float(_extract_value(schema, data, price_keys))
+    change = _to_float(_extract_value(schema, data, change_keys))
+    change_percent = _to_float(_extract_value(schema, data, change_percent_keys))
+    name_value = _extract_value(schema, data, name_keys)
     name = str(name_value).strip() if isinstance(name_value, str) and name_value.strip() else None
     return price, change, change_percent, name
 
@@ -657,16 +2330,16 @@ def _parse_yahoo_chart_quote(symbol: str, name: str, currency: str, data: Dict[s
     }
 
 
-def _parse_investor_side(row: Dict[str, Any], *, buy_keys: List[str], sell_keys: List[str], net_keys: List[str], amount_keys: List[str]) -> Dict[str, Any]:
+def _parse_investor_side(row: Dict[str, Any], *, schema: str, buy_keys: List[str], sell_keys: List[str], net_keys: List[str], amount_keys: List[str]) -> Dict[str, Any]:
     return {
-        "buyQty": _to_float(_find_value(row, buy_keys)),
-        "sellQty": _to_float(_find_value(row, sell_keys)),
-        "netQty": _to_float(_find_value(row, net_keys)),
-        "netAmount": _to_float(_find_value(row, amount_keys)),
+        "buyQty": _to_float(_extract_value(schema, row, buy_keys)),
+        "sellQty": _to_float(_extract_value(schema, row, sell_keys)),
+        "netQty": _to_float(_extract_value(schema, row, net_keys)),
+        "netAmount": _to_float(_extract_value(schema, row, amount_keys)),
     }
 
 
-def _parse_kis_investor_flows(symbol: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _parse_kis_investor_flows(symbol: str, payload: Dict[str, Any], schema: str = KIS_TR_ID_INVESTOR) -> List[Dict[str, Any]]:
     candidates: List[Dict[str, Any]] = []
     for key in ("output", "output2", "data", "items", "results"):
         value = payload.get(key)
@@ -677,11 +2350,12 @@ def _parse_kis_investor_flows(symbol: str, payload: Dict[str, Any]) -> List[Dict
 
     parsed: List[Dict[str, Any]] = []
     for row in candidates:
-        date_key = _normalize_date_key(_find_value(row, ["stck_bsop_date", "date", "bsop_date"]))
+        date_key = _normalize_date_key(_extract_value(schema, row, ["stck_bsop_date", "date", "bsop_date"]))
         if not date_key:
             continue
         individual = _parse_investor_side(
             row,
+            schema=schema,
             buy_keys=["prsn_shnu_vol", "PRSN_SHNU_VOL", "individual_buy_qty"],
             sell_keys=["prsn_seln_vol", "PRSN_SELN_VOL", "individual_sell_qty"],
             net_keys=["prsn_ntby_qty", "PRSN_NTBY_QTY", "individual_net_qty"],
@@ -689,6 +2363,7 @@ def _parse_kis_investor_flows(symbol: str, payload: Dict[str, Any]) -> List[Dict
         )
         foreigner = _parse_investor_side(
             row,
+            schema=schema,
             buy_keys=["frgn_shnu_vol", "FRGN_SHNU_VOL", "foreign_buy_qty"],
             sell_keys=["frgn_seln_vol", "FRGN_SELN_VOL", "foreign_sell_qty"],
             net_keys=["frgn_ntby_qty", "FRGN_NTBY_QTY", "foreign_net_qty"],
@@ -696,12 +2371,13 @@ def _parse_kis_investor_flows(symbol: str, payload: Dict[str, Any]) -> List[Dict
         )
         institution = _parse_investor_side(
             row,
+            schema=schema,
             buy_keys=["orgn_shnu_vol", "ORGN_SHNU_VOL", "institution_buy_qty"],
             sell_keys=["orgn_seln_vol", "ORGN_SELN_VOL", "institution_sell_qty"],
             net_keys=["orgn_ntby_qty", "ORGN_NTBY_QTY", "institution_net_qty"],
             amount_keys=["orgn_ntby_tr_pbmn", "ORGN_NTBY_TR_PBMN", "institution_net_amount"],
         )
-        etc_net = _to_float(_find_value(row, ["etc_ntby_qty", "ETC_NTBY_QTY", "etc_net_qty"]))
+        etc_net = _to_float(_extract_value(schema, row, ["etc_ntby_qty", "ETC_NTBY_QTY", "etc_net_qty"]))
         if etc_net is None:
             net_values = [individual.get("netQty"), foreigner.get("netQty"), institution.get("netQty")]
             if all(value is not None for value in net_values):
@@ -724,17 +2400,18 @@ def _parse_kis_investor_flows(symbol: str, payload: Dict[str, Any]) -> List[Dict
 
 def _parse_kis_overseas_quote(
     data: Dict[str, Any],
+    schema: str = KIS_TR_ID_OVERSEAS_PRICE,
 ) -> Tuple[float | None, float | None, float | None, str | None]:
     price_keys = ["last", "last_price", "last_prpr", "price", "current_price"]
     change_keys = ["diff", "change", "prdy_vrss", "price_change"]
     change_percent_keys = ["rate", "change_rate", "prdy_ctrt", "change_percent"]
     name_keys = ["name", "kor_name", "eng_name", "prdt_name", "hts_kor_isnm"]
     currency_keys = ["ccy_code", "currency", "currency_code", "curr_cd"]
-    price = _to_float(_find_value(data, price_keys))
-    change = _to_float(_find_value(data, change_keys))
-    change_percent = _to_float(_find_value(data, change_percent_keys))
-    name_value = _find_value(data, name_keys)
-    currency_value = _find_value(data, currency_keys)
+    price = _to_float(_extract_value(schema, data, price_keys))
+    change = _to_float(_extract_value(schema, data, change_keys))
+    change_percent = _to_float(_extract_value(schema, data, change_percent_keys))
+    name_value = _extract_value(schema, data, name_keys)
+    currency_value = _extract_value(schema, data, currency_keys)
     name = str(name_value).strip() if isinstance(name_value, str) and name_value.strip() else None
     currency = (
         str(currency_value).strip().upper()
@@ -745,16 +2422,12 @@ def _parse_kis_overseas_quote(
 
 
 def _strip_tags(html: str) -> str:
-    return re.sub(r"<[^>]+>", " ", html)
+    return HTML_TAG_RE.sub(" ", html)
 
 
 def _parse_naver_fx(body: str) -> Tuple[float | None, float | None, float | None, int]:
     plain = _strip_tags(body)
-    rate_regex = re.compile(r"([0-9]{1,3}(?:,[0-9]{3})*(?:\\.[0-9]+)?)")
-    percent_regex = re.compile(r"([+-]?\\d+(?:\\.\\d+)?)\\s*%")
-    change_regex = re.compile(r"([+-]?\\d+(?:\\.\\d+)?)(?=\\s*원)")
-
-    matches = list(rate_regex.finditer(plain))
+    matches = list(NAVER_FX_RATE_RE.finditer(plain))
     candidates: List[Tuple[float, int]] = []
     for match in matches:
         value = _to_float(match.group(1))
@@ -784,12 +2457,12 @@ def _parse_naver_fx(body: str) -> Tuple[float | None, float | None, float | None
     rate = scored[0][1] if scored else None
 
     change_percent = None
-    percent_match = percent_regex.search(plain)
+    percent_match = NAVER_FX_PERCENT_RE.search(plain)
     if percent_match:
         change_percent = _to_float(percent_match.group(1))
 
     change = None
-    change_match = change_regex.search(plain)
+    change_match = NAVER_FX_CHANGE_RE.search(plain)
     if change_match:
         change = _to_float(change_match.group(1))
 
@@ -805,6 +2478,192 @@ def _kis_market_candidates(symbol: str) -> List[str]:
     return ["J", "Q"]
 
 
+def _kis_route_id(route: Tuple[str, str, str, str]) -> str:
+    return "|".join(route)
+
+
+def _kis_route_params(route: Tuple[str, str, str, str], code: str) -> Dict[str, str]:
+    _, _, market_code, casing = route
+    if casing == "upper":
+        return {"FID_COND_MRKT_DIV_CODE": market_code, "FID_INPUT_ISCD": code}
+    return {"fid_cond_mrkt_div_code": market_code, "fid_input_iscd": code}
+
+
+async def _ordered_kis_routes(
+    kind: str, code: str, routes: List[Tuple[str, str, str, str]]
+) -> List[Tuple[str, str, str, str]]:
+    entry = await _cache_get(CACHE_NS_KIS_ROUTES, f"{kind}:{code}")
+    if not entry:
+        return routes
+    cutoff = time.time() - _get_kis_route_failure_ttl_seconds()
+    failed = {route_id for route_id, failed_at in (entry.get("failures") or {}).items() if failed_at > cutoff}
+    winner = entry.get("route")
+
+    def _rank(route: Tuple[str, str, str, str]) -> int:
+        route_id = _kis_route_id(route)
+        if route_id == winner and route_id not in failed:
+            return 0
+        return 2 if route_id in failed else 1
+
+    return sorted(routes, key=_rank)
+
+
+async def _record_kis_route(kind: str, code: str, route: Tuple[str, str, str, str], ok: bool) -> None:
+    global _persisted_cache_dirty
+    key = f"{kind}:{code}"
+    route_id = _kis_route_id(route)
+    now = time.time()
+    entry = await _cache_get(CACHE_NS_KIS_ROUTES, key) or {}
+    cutoff = now - _get_kis_route_failure_ttl_seconds()
+    failures = {rid: failed_at for rid, failed_at in (entry.get("failures") or {}).items() if failed_at > cutoff}
+    winner = entry.get("route")
+    if ok:
+        if winner == route_id and route_id not in failures and now - float(entry.get("updated_at") or 0) < KIS_ROUTE_REFRESH_SECONDS:
+            return
+        failures.pop(route_id, None)
+        winner = route_id
+    else:
+        failures[route_id] = now
+        if winner == route_id:
+            winner = None
+    await _cache_set(
+        CACHE_NS_KIS_ROUTES, key, {"route": winner, "failures": failures, "updated_at": now}, KIS_ROUTE_TTL
+    )
+    _persisted_cache_dirty = True
+
+
+async def _kis_route_recently_failed(kind: str, code: str, route: Tuple[str, str, str, str]) -> bool:
+    entry = await _cache_get(CACHE_NS_KIS_ROUTES, f"{kind}:{code}")
+    if not entry:
+        return False
+    failed_at = (entry.get("failures") or {}).get(_kis_route_id(route))
+    return bool(failed_at) and failed_at > time.time() - _get_kis_route_failure_ttl_seconds()
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._sequence = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._wake()
+
+    def _wake(self) -> None:
+        # Tokens go to waiters in (priority, arrival) order, like _PriorityLimiter slots.
+        self._refill()
+        while self._waiters:
+            if self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.tokens < 1.0:
+                break
+            _, _, waiter = heapq.heappop(self._waiters)
+            self.tokens -= 1.0
+            waiter.set_result(None)
+        if self._waiters and self._timer is None:
+            delay = (1.0 - self.tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    async def take(self, priority: int) -> None:
+        self._refill()
+        if self.tokens >= 1.0 and not self._waiters:
+            self.tokens -= 1.0
+            return
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (priority, self._sequence, waiter))
+        self._wake()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.tokens = min(self.capacity, self.tokens + 1.0)
+                self._wake()
+            raise
+
+
+class _PriorityLimiter:
+    def __init__(self) -> None:
+        self.active = 0
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._sequence = 0
+
+    def _wake(self, limit: int) -> None:
+        while self._waiters and self.active < limit:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            self.active += 1
+            waiter.set_result(None)
+
+    async def acquire(self, limit: int, priority: int) -> None:
+        self._wake(limit)
+        if self.active < limit and not self._waiters:
+            self.active += 1
+            return
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (priority, self._sequence, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(limit)
+            raise
+
+    def release(self, limit: int) -> None:
+        self.active = max(0, self.active - 1)
+        self._wake(limit)
+
+
+_upstream_limiter = _PriorityLimiter()
+_kis_rate_buckets: Dict[str, _TokenBucket] = {}
+
+
+def _get_kis_rate_bucket(app_key: str) -> _TokenBucket:
+    rate = _get_kis_rate_limit_per_sec()
+    burst = _get_kis_rate_limit_burst()
+    bucket = _kis_rate_buckets.get(app_key)
+    if bucket is None or bucket.rate != rate or bucket.capacity != burst:
+        bucket = _TokenBucket(rate, burst)
+        _kis_rate_buckets[app_key] = bucket
+    return bucket
+
+
+@asynccontextmanager
+async def _upstream_slot(priority: int, app_key: str | None = None) -> AsyncIterator[None]:
+    # The rate token is taken before a concurrency slot so that waiting on the bucket never idles a slot that
+    # a Yahoo/Naver call or another app key could use.
+    limit = _get_concurrency()
+    if app_key is not None:
+        await _get_kis_rate_bucket(app_key).take(priority)
+    await _upstream_limiter.acquire(limit, priority)
+    try:
+        yield
+    finally:
+        _upstream_limiter.release(limit)
+
+
+async def _single_flight(key: Tuple[Any, ...], factory: Callable[[], Awaitable[Any]]) -> Any:
+    shared = _inflight_requests.get(key)
+    if shared is None:
+        shared = asyncio.ensure_future(factory())
+        _inflight_requests[key] = shared
+        shared.add_done_callback(lambda _: _inflight_requests.pop(key, None))
+    return await asyncio.shield(shared)
+
+
 def _extract_error_summary(payload: Any) -> str:
     if not isinstance(payload, dict):
         return ""
@@ -815,220 +2674,555 @@ def _extract_error_summary(payload: Any) -> str:
     return ""
 
 
-async def _get_kis_token(client: httpx.AsyncClient) -> str:
-    app_key, app_secret, base_url = _get_kis_config()
-    if not app_key or not app_secret or not base_url:
-        return ""
+def _open_state_db(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10.0, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+    )
+    return conn
+
+
+def _read_state(key: str) -> Any:
+    path = _get_state_db_path()
+    if path is None or not path.exists():
+        return None
+    conn = _open_state_db(path)
+    try:
+        row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row else None
+
+
+def _write_state(key: str, value: Any) -> None:
+    path = _get_state_db_path()
+    if path is None:
+        return
+    conn = _open_state_db(path)
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, updated_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), time.time()),
+        )
+    finally:
+        conn.close()
+
 
+def _delete_state_if(key: str, field: str, expected: Any) -> None:
+    path = _get_state_db_path()
+    if path is None or not path.exists():
+        return
+    conn = _open_state_db(path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        if row and json.loads(row[0]).get(field) == expected:
+            conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def _try_acquire_state_lease(name: str, seconds: float) -> bool:
+    path = _get_state_db_path()
+    if path is None:
+        return True
+    key = f"lease:{name}"
+    owner = os.getpid()
     now = time.time()
-    if _kis_token["access_token"] and _kis_token["expires_at"] > now:
-        return _kis_token["access_token"]
+    conn = _open_state_db(path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        if row:
+            lease = json.loads(row[0])
+            if lease.get("owner") != owner and float(lease.get("expires_at") or 0) > now:
+                conn.execute("ROLLBACK")
+                return False
+        conn.execute(
+            "INSERT OR REPLACE INTO kv (key, value, updated_at) VALUES (?, ?, ?)",
+            (key, json.dumps({"owner": owner, "expires_at": now + seconds}), now),
+        )
+        conn.execute("COMMIT")
+        return True
+    finally:
+        conn.close()
 
-    async with _kis_token_lock:
-        now = time.time()
-        if _kis_token["access_token"] and _kis_token["expires_at"] > now:
-            return _kis_token["access_token"]
 
-        payload = {
-            "grant_type": "client_credentials",
-            "appkey": app_key,
-            "appsecret": app_secret,
-        }
-        headers = {"content-type": "application/json"}
+def _release_state_lease(name: str) -> None:
+    _delete_state_if(f"lease:{name}", "owner", os.getpid())
+
+
+def _kis_token_state_key(app_key: str, base_url: str) -> str:
+    digest = hashlib.sha256(f"{app_key}|{base_url}".encode("utf-8")).hexdigest()[:16]
+    return f"kis_token:{digest}"
+
+
+def _kis_token_entry(app_key: str) -> Dict[str, Any]:
+    entry = _kis_tokens.get(app_key)
+    if entry is None:
+        entry = {"access_token": "", "expires_at": 0.0, "renew_at": 0.0, "failed_at": 0.0}
+        _kis_tokens[app_key] = entry
+    return entry
+
+
+def _set_kis_token(app_key: str, access_token: str, expires_at: float) -> None:
+    settings = _get_settings()
+    entry = _kis_token_entry(app_key)
+    entry["access_token"] = access_token
+    entry["expires_at"] = expires_at
+    entry["failed_at"] = 0.0
+    # Each worker and key renews at its own point inside the jitter window so refreshes do not line up.
+    entry["renew_at"] = max(
+        time.time() + KIS_TOKEN_RETRY_SECONDS,
+        expires_at - settings.kis_token_renew_seconds - random.uniform(0, settings.kis_token_renew_jitter),
+    )
+
+
+async def _load_persisted_kis_token(app_key: str, base_url: str, min_ttl: float = 0.0) -> str:
+    try:
+        stored = await asyncio.to_thread(_read_state, _kis_token_state_key(app_key, base_url))
+    except Exception as exc:
+        _log("STATE READ ERROR", key="kis_token", err=repr(exc))
+        return ""
+    if not isinstance(stored, dict):
+        return ""
+    access_token = stored.get("access_token") or ""
+    expires_at = _to_float(stored.get("expires_at")) or 0.0
+    if not access_token or expires_at <= time.time() + min_ttl:
+        return ""
+    _set_kis_token(app_key, access_token, expires_at)
+    return access_token
+
+
+async def _wait_for_persisted_kis_token(app_key: str, base_url: str, min_ttl: float = 0.0) -> str:
+    deadline = time.time() + KIS_TOKEN_LEASE_SECONDS
+    while time.time() < deadline:
+        await asyncio.sleep(0.5)
+        token = await _load_persisted_kis_token(app_key, base_url, min_ttl)
+        if token:
+            return token
+    return ""
+
+
+async def _load_persisted_cache() -> None:
+    if _get_cache_backend().persistent:
+        return
+    now = time.time()
+    for namespace, (state_key, ttl) in STATE_PERSISTED_NAMESPACES.items():
         try:
-            resp = await client.post(f"{base_url}{KIS_TOKEN_PATH}", json=payload, headers=headers, timeout=10.0)
+            entries = await asyncio.to_thread(_read_state, state_key)
         except Exception as exc:
-            print("[KIS TOKEN ERROR]", repr(exc))
-            return ""
-        if resp.status_code != 200:
-            summary = ""
-            try:
-                summary = _extract_error_summary(resp.json())
-            except Exception:
-                summary = ""
-            detail = f" message={summary}" if summary else ""
-            print("[KIS TOKEN HTTP ERROR]", resp.status_code, detail)
-            return ""
+            _log("STATE READ ERROR", key=state_key, err=repr(exc))
+            continue
+        if not isinstance(entries, dict):
+            continue
+        existing = await _cache_get_many(namespace, list(entries))
+        restored: Dict[int, Dict[str, Any]] = {}
+        for key, entry in entries.items():
+            if not isinstance(entry, dict) or key in existing:
+                continue
+            remaining = ttl - (now - float(entry["updated_at"])) if entry.get("updated_at") else ttl
+            if remaining > 0:
+                restored.setdefault(int(remaining), {})[key] = entry
+        for remaining, values in restored.items():
+            await _cache_set_many(namespace, values, remaining)
+
+
+async def _flush_persisted_cache() -> None:
+    global _persisted_cache_dirty
+    if not _persisted_cache_dirty or _get_cache_backend().persistent:
+        return
+    _persisted_cache_dirty = False
+    for namespace, (state_key, _) in STATE_PERSISTED_NAMESPACES.items():
         try:
-            data = resp.json()
+            await asyncio.to_thread(_write_state, state_key, await _cache_items(namespace))
         except Exception as exc:
-            print("[KIS TOKEN JSON ERROR]", repr(exc))
-            return ""
-        access_token = data.get("access_token") or data.get("accessToken") or ""
-        expires_in = _to_float(data.get("expires_in") or data.get("expiresIn") or 0) or 0
-        if not access_token:
-            print("[KIS TOKEN MISSING] keys=", ",".join(sorted(data.keys())))
+            _persisted_cache_dirty = True
+            _log("STATE WRITE ERROR", key=state_key, err=repr(exc))
+
+
+async def _run_state_flusher() -> None:
+    while True:
+        await asyncio.sleep(_get_state_flush_seconds())
+        await _flush_persisted_cache()
+
+
+async def _start_persisted_state() -> None:
+    global _state_flusher
+    if _get_state_db_path() is None:
+        return
+    await _load_persisted_cache()
+    settings = _get_settings()
+    for credential in settings.kis_credentials():
+        await _load_persisted_kis_token(credential.app_key, settings.kis_base_url)
+    if _state_flusher is None or _state_flusher.done():
+        _state_flusher = asyncio.create_task(_run_state_flusher())
+
+
+async def _stop_persisted_state() -> None:
+    global _state_flusher
+    if _state_flusher is not None:
+        _state_flusher.cancel()
+        await asyncio.gather(_state_flusher, return_exceptions=True)
+        _state_flusher = None
+    if _get_state_db_path() is not None:
+        await _flush_persisted_cache()
+
+
+async def _get_kis_token(
+    client: httpx.AsyncClient, credential: _KisCredential | None = None, min_ttl: float = 0.0
+) -> str:
+    settings = _get_settings()
+    base_url = settings.kis_base_url
+    if credential is None:
+        for candidate in sorted(settings.kis_credentials(), key=lambda item: _kis_key_load.get(item.app_key, 0)):
+            token = await _get_kis_token(client, candidate)
+            if token:
+                return token
+        return ""
+    app_key, app_secret = credential
+    if not app_key or not app_secret or not base_url:
+        return ""
+
+    entry = _kis_token_entry(app_key)
+    if entry["access_token"] and entry["expires_at"] > time.time() + min_ttl:
+        return entry["access_token"]
+
+    lock = _kis_token_locks.setdefault(app_key, asyncio.Lock())
+    async with lock:
+        if entry["access_token"] and entry["expires_at"] > time.time() + min_ttl:
+            return entry["access_token"]
+        if not min_ttl and entry["failed_at"] + KIS_TOKEN_RETRY_SECONDS > time.time():
             return ""
-        if expires_in <= 0:
-            expires_in = 23 * 60 * 60
-        _kis_token["access_token"] = access_token
-        _kis_token["expires_at"] = time.time() + float(expires_in) - 30
-        return access_token
+
+        if _get_state_db_path() is None:
+            return await _request_kis_token(client, app_key, app_secret, base_url)
+        persisted = await _load_persisted_kis_token(app_key, base_url, min_ttl)
+        if persisted:
+            return persisted
+        lease_name = _kis_token_state_key(app_key, base_url)
+        try:
+            leased = await asyncio.to_thread(_try_acquire_state_lease, lease_name, KIS_TOKEN_LEASE_SECONDS)
+        except Exception as exc:
+            _log("STATE LEASE ERROR", key="kis_token", err=repr(exc))
+            leased = True
+        if not leased:
+            persisted = await _wait_for_persisted_kis_token(app_key, base_url, min_ttl)
+            if persisted:
+                return persisted
+        try:
+            return await _request_kis_token(client, app_key, app_secret, base_url)
+        finally:
+            if leased:
+                try:
+                    await asyncio.to_thread(_release_state_lease, lease_name)
+                except Exception as exc:
+                    _log("STATE LEASE ERROR", key="kis_token", err=repr(exc))
+
+
+async def _request_kis_token(client: httpx.AsyncClient, app_key: str, app_secret: str, base_url: str) -> str:
+    _kis_token_entry(app_key)["failed_at"] = time.time()
+    payload = {
+        "grant_type": "client_credentials",
+        "appkey": app_key,
+        "appsecret": app_secret,
+    }
+    headers = {"content-type": "application/json"}
+    try:
+        resp = await client.post(f"{base_url}{KIS_TOKEN_PATH}", json=payload, headers=headers, timeout=10.0)
+    except Exception as exc:
+        _log("KIS TOKEN ERROR", err=repr(exc))
+        _inc_metric("quote_kis_token_refresh_total", result="error")
+        return ""
+    if resp.status_code != 200:
+        summary = ""
+        try:
+            summary = _extract_error_summary(resp.json())
+        except Exception:
+            summary = ""
+        detail = f" message={summary}" if summary else ""
+        _log("KIS TOKEN HTTP ERROR", status=resp.status_code, detail=detail)
+        _inc_metric("quote_kis_token_refresh_total", result="error")
+        return ""
+    try:
+        data = resp.json()
+    except Exception as exc:
+        _log("KIS TOKEN JSON ERROR", err=repr(exc))
+        _inc_metric("quote_kis_token_refresh_total", result="error")
+        return ""
+    access_token = data.get("access_token") or data.get("accessToken") or ""
+    expires_in = _to_float(data.get("expires_in") or data.get("expiresIn") or 0) or 0
+    if not access_token:
+        _log("KIS TOKEN MISSING", keys=",".join(sorted(data.keys())))
+        _inc_metric("quote_kis_token_refresh_total", result="error")
+        return ""
+    if expires_in <= 0:
+        expires_in = 23 * 60 * 60
+    _set_kis_token(app_key, access_token, time.time() + float(expires_in) - 30)
+    _inc_metric("quote_kis_token_refresh_total", result="ok")
+    try:
+        await asyncio.to_thread(
+            _write_state,
+            _kis_token_state_key(app_key, base_url),
+            {"access_token": access_token, "expires_at": _kis_token_entry(app_key)["expires_at"]},
+        )
+    except Exception as exc:
+        _log("STATE WRITE ERROR", key="kis_token", err=repr(exc))
+    return access_token
+
+
+async def _invalidate_kis_token(app_key: str, rejected: str) -> None:
+    entry = _kis_token_entry(app_key)
+    async with _kis_token_locks.setdefault(app_key, asyncio.Lock()):
+        # A concurrent request may already have replaced the rejected token; keep the newer one.
+        if entry["access_token"] != rejected:
+            return
+        entry["access_token"] = ""
+        entry["expires_at"] = 0.0
+        entry["renew_at"] = 0.0
+        if rejected and _get_state_db_path() is not None:
+            try:
+                await asyncio.to_thread(
+                    _delete_state_if,
+                    _kis_token_state_key(app_key, _get_settings().kis_base_url),
+                    "access_token",
+                    rejected,
+                )
+            except Exception as exc:
+                _log("STATE WRITE ERROR", key="kis_token", err=repr(exc))
 
 
-async def _invalidate_kis_token() -> None:
-    async with _kis_token_lock:
-        _kis_token["access_token"] = ""
-        _kis_token["expires_at"] = 0.0
+class _KisTokenUnavailable(RuntimeError):
+    pass
 
 
-async def _fetch_kis_quote(
+async def _reject_kis_token(resp: httpx.Response) -> None:
+    authorization = resp.request.headers.get("Authorization", "")
+    await _invalidate_kis_token(resp.request.headers.get("appkey", ""), authorization.removeprefix("Bearer "))
+
+
+def _pick_kis_credential(settings: _Settings) -> _KisCredential:
+    now = time.time()
+    credentials = settings.kis_credentials()
+    usable = [
+        credential
+        for credential in credentials
+        if (entry := _kis_token_entry(credential.app_key))["expires_at"] > now
+        or entry["failed_at"] + KIS_TOKEN_RETRY_SECONDS <= now
+    ] or list(credentials)
+    return min(
+        usable,
+        key=lambda credential: (
+            _kis_key_load.get(credential.app_key, 0),
+            -_get_kis_rate_bucket(credential.app_key).tokens,
+        ),
+    )
+
+
+@asynccontextmanager
+async def _kis_slot(client: httpx.AsyncClient, settings: _Settings, priority: int) -> AsyncIterator[_KisLease]:
+    credential = _pick_kis_credential(settings)
+    _kis_key_load[credential.app_key] = _kis_key_load.get(credential.app_key, 0) + 1
+    try:
+        # Issue a missing token before queueing, then read it again once the slot is granted: a request that waited
+        # behind the limiter must not send a token that expired or was rejected in the meantime.
+        if not await _get_kis_token(client, credential):
+            raise _KisTokenUnavailable("KIS token unavailable")
+        async with _upstream_slot(priority, credential.app_key):
+            token = await _get_kis_token(client, credential)
+            if not token:
+                raise _KisTokenUnavailable("KIS token unavailable")
+            yield _KisLease(credential.app_key, credential.app_secret, token)
+    finally:
+        _kis_key_load[credential.app_key] -= 1
+
+
+def _kis_error_kind(resp: httpx.Response) -> str | None:
+    if resp.status_code == 200:
+        return None
+    try:
+        payload = resp.json()
+        code = str(payload.get("msg_cd") or "") if isinstance(payload, dict) else ""
+    except Exception:
+        code = ""
+    if resp.status_code in (401, 403) or code in KIS_TOKEN_ERROR_CODES:
+        return KIS_ERROR_AUTH
+    if resp.status_code == 429 or code in KIS_RATE_LIMIT_ERROR_CODES:
+        return KIS_ERROR_RATE_LIMIT
+    if resp.status_code >= 500:
+        return KIS_ERROR_UPSTREAM
+    return KIS_ERROR_REJECTED
+
+
+async def _kis_request(
     client: httpx.AsyncClient,
-    symbol: str,
-    token: str,
-    app_key: str,
-    app_secret: str,
-    base_url: str,
-    sem: asyncio.Semaphore,
-) -> Dict[str, Any]:
-    async with sem:
-        market, excd, code = _parse_symbol(symbol)
-        if market != "KR":
-            return _empty_quote_with_source(symbol, "kis")
-
-        max_attempts = 1 + _get_guard_retry_count()
-        latest_reasons: List[str] = []
-
-        if _is_kr_etf_etn_short_code(code):
-            print(f"[KIS ROUTE] symbol={symbol} route=KR_ETF_ETN code={code}")
-            endpoint_attempts = [
-                (KIS_ETF_ETN_PRICE_PATH, KIS_TR_ID_ETF_ETN_PRICE),
-                (KIS_PRICE_PATH, KIS_TR_ID_PRICE),
-            ]
-            for attempt in range(max_attempts):
-                suspect_seen = False
-                for path, tr_id in endpoint_attempts:
-                    params_list = [
-                        {"fid_cond_mrkt_div_code": "J", "fid_input_iscd": code},
-                        {"FID_COND_MRKT_DIV_CODE": "J", "FID_INPUT_ISCD": code},
-                        {"fid_cond_mrkt_div_code": "Q", "fid_input_iscd": code},
-                    ]
-                    for params in params_list:
-                        headers = {
-                            "Authorization": f"Bearer {token}",
-                            "appkey": app_key,
-                            "appsecret": app_secret,
-                            "tr_id": tr_id,
-                            "content-type": "application/json",
-                        }
-                        url = f"{base_url}{path}"
-                        try:
-                            resp = await client.get(url, params=params, headers=headers, timeout=10.0)
-                        except Exception as exc:
-                            print(
-                                f"[KIS ETF_ETN ERROR] symbol={symbol} path={path} tr_id={tr_id} params={params} err={repr(exc)}"
-                            )
-                            continue
-
-                        key_fields = ""
-                        data: Dict[str, Any] = {}
-                        if resp.status_code == 200:
-                            try:
-                                data = resp.json()
-                                price, change, change_percent, name = _parse_kis_quote(data)
-                                key_fields = f"price={price} change={change} pct={change_percent}"
-                            except Exception as exc:
-                                print(
-                                    f"[KIS ETF_ETN JSON ERROR] symbol={symbol} path={path} tr_id={tr_id} params={params} err={repr(exc)}"
-                                )
-                                continue
-                        print(
-                            f"[KIS ETF_ETN REQ] symbol={symbol} path={path} tr_id={tr_id} params={params} status={resp.status_code} {key_fields}"
-                        )
-                        if resp.status_code != 200:
-                            continue
-
-                        price, change, change_percent, name = _parse_kis_quote(data)
-                        if price is None:
-                            continue
-
-                        guard_context = _extract_kr_guard_context(data)
-                        guard_result = _evaluate_price_guard(
-                            symbol,
-                            {
-                                "price": float(price),
-                                "dayLow": guard_context.get("dayLow"),
-                                "dayHigh": guard_context.get("dayHigh"),
-                                "bid": guard_context.get("bid"),
-                                "ask": guard_context.get("ask"),
-                            },
-                        )
-                        if guard_result.get("suspect"):
-                            latest_reasons = list(guard_result.get("reasons") or ["suspect-price"])
-                            suspect_seen = True
-                            print(
-                                f"[PRICE GUARD SUSPECT] symbol={symbol} path={path} tr_id={tr_id} reasons={latest_reasons}"
-                            )
-                            continue
-
-                        accepted = _with_guard_fields(
-                            {
-                                "symbol": symbol,
-                                "price": float(price),
-                                "change": change,
-                                "changePercent": change_percent,
-                                "currency": "KRW",
-                                "marketTime": _iso_time(time.time()),
-                                "source": "kis",
-                                "name": name,
-                            },
-                            status=QUOTE_STATUS_VALID,
-                            guard_reason=None,
-                            warning=None,
-                            stale_age_sec=None,
-                        )
-                        _remember_last_good_quote(symbol, accepted)
-                        return accepted
+    settings: _Settings,
+    path: str,
+    tr_id: str,
+    params: Dict[str, str],
+    priority: int,
+    timeout: float = 10.0,
+    headers: Dict[str, str] | None = None,
+) -> httpx.Response:
+    # A rejected token is refreshed and the call repeated once; rate limits and refused connections are retried
+    # with backoff. Anything else is returned for the caller to classify with _kis_error_kind.
+    auth_budget = KIS_AUTH_RETRY_BUDGET
+    transient_budget = KIS_TRANSIENT_RETRY_BUDGET
+    url = f"{settings.kis_base_url}{path}"
+    while True:
+        _check_circuit(UPSTREAM_KIS, url)
+        try:
+            async with _kis_slot(client, settings, priority) as lease:
+                resp = await client.get(
+                    url, params=params, headers={**lease.headers(tr_id), **(headers or {})}, timeout=timeout
+                )
+        except (httpx.ConnectError, httpx.PoolTimeout):
+            if transient_budget <= 0:
+                raise
+            kind = "connect"
+        else:
+            kind = _kis_error_kind(resp)
+            if kind == KIS_ERROR_AUTH:
+                if auth_budget <= 0:
+                    raise _KisTokenUnavailable(f"KIS rejected the token for {tr_id} with HTTP {resp.status_code}")
+                auth_budget -= 1
+                _inc_metric("quote_kis_request_retries_total", reason=kind)
+                await _reject_kis_token(resp)
+                continue
+            if kind != KIS_ERROR_RATE_LIMIT or transient_budget <= 0:
+                return resp
+        _inc_metric("quote_kis_request_retries_total", reason=kind)
+        await asyncio.sleep(KIS_TRANSIENT_RETRY_DELAY_SECONDS * (KIS_TRANSIENT_RETRY_BUDGET - transient_budget + 1))
+        transient_budget -= 1
 
-                if suspect_seen and attempt < max_attempts - 1:
-                    await asyncio.sleep(_get_guard_retry_delay_seconds(attempt))
-                    continue
-                break
 
-            print(
-                f"[KIS ETF_ETN FAIL] symbol={symbol} endpoint={KIS_ETF_ETN_PRICE_PATH} tr_id={KIS_TR_ID_ETF_ETN_PRICE} code={code}"
+async def _run_kis_token_renewer() -> None:
+    client = _get_http_client(UPSTREAM_KIS)
+    while True:
+        settings = _get_settings()
+        now = time.time()
+        wake_at = now + KIS_TOKEN_RENEW_POLL_SECONDS
+        for credential in settings.kis_credentials():
+            entry = _kis_token_entry(credential.app_key)
+            due_at = max(entry["renew_at"], entry["failed_at"] + KIS_TOKEN_RETRY_SECONDS)
+            if due_at > now:
+                wake_at = min(wake_at, due_at)
+                continue
+            expires_at = entry["expires_at"]
+            # Ask for a token that outlives the current one so a fresh token persisted by another worker is
+            # adopted instead of issuing a new one.
+            min_ttl = max(0.0, expires_at - now) + 1.0 if entry["access_token"] else 0.0
+            try:
+                token = await _get_kis_token(client, credential, min_ttl)
+            except Exception as exc:
+                token = ""
+                _log("KIS TOKEN RENEW ERROR", key=_mask_app_key(credential.app_key), err=repr(exc))
+            _log(
+                "KIS TOKEN RENEW",
+                level=logging.INFO if token else logging.WARNING,
+                key=_mask_app_key(credential.app_key),
+                ok=bool(token),
+                expires_in=round(entry["expires_at"] - time.time()),
             )
-            return _fallback_quote_from_last_good(symbol, latest_reasons or ["price-unavailable"], source="kis")
+            wake_at = time.time()
+        await asyncio.sleep(max(1.0, wake_at - time.time()))
+
+
+def _start_kis_token_renewer() -> None:
+    global _kis_token_renewer
+    if _get_settings().kis_token_renew_seconds <= 0:
+        return
+    if _kis_token_renewer is None or _kis_token_renewer.done():
+        _kis_token_renewer = asyncio.create_task(_run_kis_token_renewer())
 
+
+async def _stop_kis_token_renewer() -> None:
+    global _kis_token_renewer
+    if _kis_token_renewer is not None:
+        _kis_token_renewer.cancel()
+        await asyncio.gather(_kis_token_renewer, return_exceptions=True)
+        _kis_token_renewer = None
+
+
+async def _fetch_kis_quote(
+    client: httpx.AsyncClient,
+    symbol: str,
+    settings: _Settings,
+    priority: int = PRIORITY_QUOTE,
+) -> Dict[str, Any]:
+    parsed = _classify_symbol(symbol)
+    if parsed.market != "KR":
+        return _empty_quote_with_source(symbol, "kis")
+    code = parsed.code
+
+    max_attempts = 1 + settings.guard_retry_count
+    latest_reasons: List[str] = []
+
+    if parsed.kind == QUOTE_CLASS_KR_ETF_ETN:
+        _log("KIS ROUTE", sample=True, symbol=symbol, kind="KR_ETF_ETN", code=code)
+        routes = await _ordered_kis_routes(
+            KIS_ROUTE_QUOTE,
+            code,
+            [
+                (path, tr_id, market_code, casing)
+                for path, tr_id in (
+                    (KIS_ETF_ETN_PRICE_PATH, KIS_TR_ID_ETF_ETN_PRICE),
+                    (KIS_PRICE_PATH, KIS_TR_ID_PRICE),
+                )
+                for market_code, casing in (("J", "lower"), ("J", "upper"), ("Q", "lower"))
+            ],
+        )
+        open_paths: Set[str] = set()
         for attempt in range(max_attempts):
             suspect_seen = False
-            for market_code in _kis_market_candidates(code):
-                params = {"fid_cond_mrkt_div_code": market_code, "fid_input_iscd": code}
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "appkey": app_key,
-                    "appsecret": app_secret,
-                    "tr_id": KIS_TR_ID_PRICE,
-                    "content-type": "application/json",
-                }
-                try:
-                    resp = await client.get(
-                        f"{base_url}{KIS_PRICE_PATH}", params=params, headers=headers, timeout=10.0
-                    )
-                except Exception as exc:
-                    print("[KIS QUOTE ERROR]", symbol, repr(exc))
-                    continue
-                if resp.status_code != 200:
-                    print(
-                        f"[KIS STOCK REQ] symbol={symbol} path={KIS_PRICE_PATH} tr_id={KIS_TR_ID_PRICE} params={params} status={resp.status_code} body={resp.text[:120]}"
-                    )
+            for route in routes:
+                path, tr_id = route[0], route[1]
+                if path in open_paths:
                     continue
+                params = _kis_route_params(route, code)
+                route_id = _kis_route_id(route)
+                started = time.perf_counter()
                 try:
-                    data = resp.json()
+                    resp = await _kis_request(client, settings, path, tr_id, params, priority)
+                except _KisTokenUnavailable as exc:
+                    _log("KIS ETF_ETN ERROR", symbol=symbol, route=route_id, err=repr(exc))
+                    return await _fallback_quote_from_last_good(symbol, ["token-unavailable"], source="kis")
                 except Exception as exc:
-                    print("[KIS QUOTE JSON ERROR]", symbol, repr(exc))
+                    _log("KIS ETF_ETN ERROR", symbol=symbol, route=route_id, err=repr(exc))
+                    if isinstance(exc, _CircuitOpenError):
+                        latest_reasons = ["circuit-open"]
+                        open_paths.add(path)
                     continue
 
-                price, change, change_percent, name = _parse_kis_quote(data)
-                print(
-                    f"[KIS STOCK REQ] symbol={symbol} path={KIS_PRICE_PATH} tr_id={KIS_TR_ID_PRICE} params={params} status=200 price={price} change={change} pct={change_percent}"
+                latency_ms = round((time.perf_counter() - started) * 1000, 1)
+                price = None
+                data: Dict[str, Any] = {}
+                if resp.status_code == 200:
+                    try:
+                        data = resp.json()
+                        price, change, change_percent, name = _parse_kis_quote(data, tr_id)
+                    except Exception as exc:
+                        _log("KIS ETF_ETN JSON ERROR", symbol=symbol, route=route_id, err=repr(exc))
+                        continue
+                _log(
+                    "KIS ETF_ETN REQ",
+                    sample=resp.status_code == 200 and price is not None,
+                    symbol=symbol,
+                    route=route_id,
+                    status=resp.status_code,
+                    latency_ms=latency_ms,
+                    price=price,
                 )
-                if price is None:
-                    print("[KIS QUOTE MISSING PRICE]", symbol, "keys=", ",".join(sorted(data.keys())))
+                if resp.status_code != 200 or price is None:
+                    if _kis_error_kind(resp) != KIS_ERROR_RATE_LIMIT:
+                        await _record_kis_route(KIS_ROUTE_QUOTE, code, route, False)
                     continue
 
-                guard_context = _extract_kr_guard_context(data)
-                guard_result = _evaluate_price_guard(
+                guard_context = _extract_kr_guard_context(data, tr_id)
+                guard_result = await _evaluate_price_guard(
                     symbol,
                     {
                         "price": float(price),
@@ -1037,13 +3231,12 @@ async def _fetch_kis_quote(
                         "bid": guard_context.get("bid"),
                         "ask": guard_context.get("ask"),
                     },
+                    settings,
                 )
                 if guard_result.get("suspect"):
                     latest_reasons = list(guard_result.get("reasons") or ["suspect-price"])
                     suspect_seen = True
-                    print(
-                        f"[PRICE GUARD SUSPECT] symbol={symbol} path={KIS_PRICE_PATH} market={market_code} reasons={latest_reasons}"
-                    )
+                    _log("PRICE GUARD SUSPECT", symbol=symbol, route=route_id, reasons=latest_reasons)
                     continue
 
                 accepted = _with_guard_fields(
@@ -1062,7 +3255,8 @@ async def _fetch_kis_quote(
                     warning=None,
                     stale_age_sec=None,
                 )
-                _remember_last_good_quote(symbol, accepted)
+                await _record_kis_route(KIS_ROUTE_QUOTE, code, route, True)
+                await _remember_last_good_quote(symbol, accepted)
                 return accepted
 
             if suspect_seen and attempt < max_attempts - 1:
@@ -1070,106 +3264,298 @@ async def _fetch_kis_quote(
                 continue
             break
 
-        return _fallback_quote_from_last_good(symbol, latest_reasons or ["price-unavailable"], source="kis")
-
-
-async def _fetch_kis_index_quote(
-    client: httpx.AsyncClient,
-    symbol: str,
-    token: str,
-    app_key: str,
-    app_secret: str,
-    base_url: str,
-    sem: asyncio.Semaphore,
-) -> Dict[str, Any]:
-    async with sem:
-        definition = _kr_index_definition(symbol)
-        if not definition:
-            return _empty_quote_with_source(symbol, "kis")
+        _log("KIS ETF_ETN FAIL", symbol=symbol, routes=len(routes))
+        return await _fallback_quote_from_last_good(symbol, latest_reasons or ["price-unavailable"], source="kis")
 
-        params = {
-            "FID_COND_MRKT_DIV_CODE": "U",
-            "FID_INPUT_ISCD": definition["code"],
-        }
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "appkey": app_key,
-            "appsecret": app_secret,
-            "tr_id": KIS_TR_ID_INDEX_PRICE,
-            "content-type": "application/json",
-        }
+    routes = await _ordered_kis_routes(
+        KIS_ROUTE_QUOTE,
+        code,
+        [(KIS_PRICE_PATH, KIS_TR_ID_PRICE, market_code, "lower") for market_code in _kis_market_candidates(symbol)],
+    )
+    for attempt in range(max_attempts):
+        suspect_seen = False
+        for route in routes:
+            market_code = route[2]
+            params = _kis_route_params(route, code)
+            route_id = _kis_route_id(route)
+            started = time.perf_counter()
+            try:
+                resp = await _kis_request(client, settings, KIS_PRICE_PATH, KIS_TR_ID_PRICE, params, priority)
+            except _KisTokenUnavailable as exc:
+                _log("KIS QUOTE ERROR", symbol=symbol, route=route_id, err=repr(exc))
+                return await _fallback_quote_from_last_good(symbol, ["token-unavailable"], source="kis")
+            except Exception as exc:
+                _log("KIS QUOTE ERROR", symbol=symbol, route=route_id, err=repr(exc))
+                if isinstance(exc, _CircuitOpenError):
+                    latest_reasons = ["circuit-open"]
+                    break
+                continue
+            latency_ms = round((time.perf_counter() - started) * 1000, 1)
+            if resp.status_code != 200:
+                _log(
+                    "KIS STOCK REQ",
+                    level=logging.WARNING,
+                    symbol=symbol,
+                    route=route_id,
+                    status=resp.status_code,
+                    latency_ms=latency_ms,
+                    body=resp.text[:120],
+                )
+                if _kis_error_kind(resp) != KIS_ERROR_RATE_LIMIT:
+                    await _record_kis_route(KIS_ROUTE_QUOTE, code, route, False)
+                continue
+            try:
+                data = resp.json()
+            except Exception as exc:
+                _log("KIS QUOTE JSON ERROR", symbol=symbol, route=route_id, err=repr(exc))
+                continue
 
-        async def _request(access_token: str) -> httpx.Response:
-            request_headers = {**headers, "Authorization": f"Bearer {access_token}"}
-            return await client.get(
-                f"{base_url}{KIS_INDEX_PRICE_PATH}", params=params, headers=request_headers, timeout=10.0
+            price, change, change_percent, name = _parse_kis_quote(data)
+            _log(
+                "KIS STOCK REQ",
+                sample=price is not None,
+                symbol=symbol,
+                route=route_id,
+                status=resp.status_code,
+                latency_ms=latency_ms,
+                price=price,
             )
+            if price is None:
+                _log("KIS QUOTE MISSING PRICE", level=logging.WARNING, symbol=symbol, keys=",".join(sorted(data.keys())))
+                await _record_kis_route(KIS_ROUTE_QUOTE, code, route, False)
+                continue
 
-        try:
-            resp = await _request(token)
-        except Exception as exc:
-            print("[KIS INDEX ERROR]", symbol, repr(exc))
-            return _fallback_quote_from_last_good(symbol, ["request-failed"], source="kis")
-
-        if resp.status_code in (401, 403):
-            await _invalidate_kis_token()
-            refreshed = await _get_kis_token(client)
-            if refreshed:
-                try:
-                    resp = await _request(refreshed)
-                except Exception as exc:
-                    print("[KIS INDEX RETRY ERROR]", symbol, repr(exc))
-                    return _fallback_quote_from_last_good(symbol, ["request-failed"], source="kis")
-
-        if resp.status_code != 200:
-            print(
-                f"[KIS INDEX HTTP ERROR] symbol={symbol} path={KIS_INDEX_PRICE_PATH} tr_id={KIS_TR_ID_INDEX_PRICE} status={resp.status_code} body={resp.text[:200]}"
+            guard_context = _extract_kr_guard_context(data)
+            guard_result = await _evaluate_price_guard(
+                symbol,
+                {
+                    "price": float(price),
+                    "dayLow": guard_context.get("dayLow"),
+                    "dayHigh": guard_context.get("dayHigh"),
+                    "bid": guard_context.get("bid"),
+                    "ask": guard_context.get("ask"),
+                },
+                settings,
             )
-            return _fallback_quote_from_last_good(symbol, ["http-error"], source="kis")
+            if guard_result.get("suspect"):
+                latest_reasons = list(guard_result.get("reasons") or ["suspect-price"])
+                suspect_seen = True
+                _log("PRICE GUARD SUSPECT", symbol=symbol, route=route_id, reasons=latest_reasons)
+                continue
 
-        try:
-            data = resp.json()
-        except Exception as exc:
-            print("[KIS INDEX JSON ERROR]", symbol, repr(exc))
-            return _fallback_quote_from_last_good(symbol, ["json-error"], source="kis")
+            accepted = _with_guard_fields(
+                {
+                    "symbol": symbol,
+                    "price": float(price),
+                    "change": change,
+                    "changePercent": change_percent,
+                    "currency": "KRW",
+                    "marketTime": _iso_time(time.time()),
+                    "source": "kis",
+                    "name": name,
+                },
+                status=QUOTE_STATUS_VALID,
+                guard_reason=None,
+                warning=None,
+                stale_age_sec=None,
+            )
+            await _record_kis_route(KIS_ROUTE_QUOTE, code, route, True)
+            await _remember_last_good_quote(symbol, accepted)
+            return accepted
 
-        price, change, change_percent, name = _parse_kis_index_quote(data)
-        if price is None:
-            print("[KIS INDEX MISSING PRICE]", symbol, "keys=", ",".join(sorted(data.keys())))
-            return _fallback_quote_from_last_good(symbol, ["price-unavailable"], source="kis")
+        if suspect_seen and attempt < max_attempts - 1:
+            await asyncio.sleep(_get_guard_retry_delay_seconds(attempt))
+            continue
+        break
 
-        accepted = _with_guard_fields(
-            {
-                "symbol": symbol,
-                "price": float(price),
-                "change": change,
-                "changePercent": change_percent,
-                "currency": "KRW",
-                "marketTime": _iso_time(time.time()),
-                "source": "kis",
-                "name": name or definition["name"],
-            },
-            status=QUOTE_STATUS_VALID,
-            guard_reason=None,
-            warning=None,
-            stale_age_sec=None,
-        )
-        _remember_last_good_quote(symbol, accepted)
-        return accepted
+    return await _fallback_quote_from_last_good(symbol, latest_reasons or ["price-unavailable"], source="kis")
 
 
-async def _fetch_us_index_quote(
+async def _fetch_kis_quotes_bulk(
     client: httpx.AsyncClient,
-    symbol: str,
-    sem: asyncio.Semaphore,
-) -> Dict[str, Any]:
-    async with sem:
-        definition = _us_index_definition(symbol)
-        if not definition:
-            return _empty_quote_with_source(symbol, "yahoo")
-        encoded = url_quote(definition["yahoo"], safe="")
-        url = YAHOO_CHART_URL.format(symbol=encoded)
-        try:
+    symbols: List[str],
+    settings: _Settings,
+    priority: int = PRIORITY_QUOTE,
+) -> Dict[str, Dict[str, Any]]:
+    symbols_by_code: Dict[str, List[str]] = {}
+    for symbol in symbols:
+        symbols_by_code.setdefault(_classify_symbol(symbol).code, []).append(symbol)
+    codes = list(symbols_by_code)[:KIS_MULTI_PRICE_MAX_CODES]
+    route = KIS_MULTI_PRICE_ROUTE
+    route_id = _kis_route_id(route)
+    params: Dict[str, str] = {}
+    for index, code in enumerate(codes, start=1):
+        params[f"FID_COND_MRKT_DIV_CODE_{index}"] = route[2]
+        params[f"FID_INPUT_ISCD_{index}"] = code
+
+    started = time.perf_counter()
+    try:
+        resp = await _kis_request(
+            client, settings, KIS_MULTI_PRICE_PATH, KIS_TR_ID_MULTI_PRICE, params, priority, headers={"custtype": "P"}
+        )
+    except Exception as exc:
+        _log("KIS BULK ERROR", route=route_id, codes=len(codes), err=repr(exc))
+        return {}
+    latency_ms = round((time.perf_counter() - started) * 1000, 1)
+    if resp.status_code != 200:
+        _log(
+            "KIS BULK REQ",
+            level=logging.WARNING,
+            route=route_id,
+            codes=len(codes),
+            status=resp.status_code,
+            latency_ms=latency_ms,
+            body=resp.text[:120],
+        )
+        if resp.status_code in (400, 404, 405):
+            await _record_kis_route(KIS_ROUTE_QUOTE_BULK, "*", route, False)
+        return {}
+    try:
+        data = resp.json()
+    except Exception as exc:
+        _log("KIS BULK JSON ERROR", route=route_id, err=repr(exc))
+        return {}
+    rows = _parse_kis_multi_price(data)
+    _log(
+        "KIS BULK REQ",
+        sample=bool(rows),
+        route=route_id,
+        codes=len(codes),
+        status=resp.status_code,
+        latency_ms=latency_ms,
+        found=len(rows),
+    )
+    if not rows:
+        if str(data.get("rt_cd", "0")) not in ("0", ""):
+            _log("KIS BULK API ERROR", route=route_id, message=_extract_error_summary(data))
+            await _record_kis_route(KIS_ROUTE_QUOTE_BULK, "*", route, False)
+        return {}
+    await _record_kis_route(KIS_ROUTE_QUOTE_BULK, "*", route, True)
+
+    accepted: Dict[str, Dict[str, Any]] = {}
+    for code, row in rows.items():
+        for symbol in symbols_by_code.get(code, []):
+            guard_result = await _evaluate_price_guard(
+                symbol,
+                {
+                    "price": row["price"],
+                    "dayLow": row["dayLow"],
+                    "dayHigh": row["dayHigh"],
+                    "bid": row["bid"],
+                    "ask": row["ask"],
+                },
+                settings,
+            )
+            if guard_result.get("suspect"):
+                _log("PRICE GUARD SUSPECT", symbol=symbol, route=route_id, reasons=guard_result.get("reasons"))
+                continue
+            quote = _with_guard_fields(
+                {
+                    "symbol": symbol,
+                    "price": float(row["price"]),
+                    "change": row["change"],
+                    "changePercent": row["changePercent"],
+                    "currency": "KRW",
+                    "marketTime": _iso_time(time.time()),
+                    "source": "kis",
+                    "name": row["name"],
+                },
+                status=QUOTE_STATUS_VALID,
+                guard_reason=None,
+                warning=None,
+                stale_age_sec=None,
+            )
+            await _remember_last_good_quote(symbol, quote)
+            accepted[symbol] = quote
+    return accepted
+
+
+async def _fetch_kis_quote_via_bulk(
+    batch: "asyncio.Future[Dict[str, Dict[str, Any]]]",
+    client: httpx.AsyncClient,
+    symbol: str,
+    settings: _Settings,
+    priority: int = PRIORITY_QUOTE,
+) -> Dict[str, Any]:
+    quote = (await asyncio.shield(batch)).get(symbol)
+    if quote is not None:
+        return quote
+    return await _fetch_kis_quote(client, symbol, settings, priority)
+
+
+async def _fetch_kis_index_quote(
+    client: httpx.AsyncClient,
+    symbol: str,
+    settings: _Settings,
+    priority: int = PRIORITY_QUOTE,
+) -> Dict[str, Any]:
+    definition = _kr_index_definition(symbol)
+    if not definition:
+        return _empty_quote_with_source(symbol, "kis")
+
+    params = {
+        "FID_COND_MRKT_DIV_CODE": "U",
+        "FID_INPUT_ISCD": definition["code"],
+    }
+    try:
+        resp = await _kis_request(client, settings, KIS_INDEX_PRICE_PATH, KIS_TR_ID_INDEX_PRICE, params, priority)
+    except Exception as exc:
+        _log("KIS INDEX ERROR", symbol=symbol, err=repr(exc))
+        return await _fallback_quote_from_last_good(symbol, [_request_failure_reason(exc)], source="kis")
+
+    if resp.status_code != 200:
+        _log(
+            "KIS INDEX HTTP ERROR",
+            symbol=symbol,
+            route=f"{KIS_INDEX_PRICE_PATH}|{KIS_TR_ID_INDEX_PRICE}",
+            status=resp.status_code,
+            body=resp.text[:200],
+        )
+        return await _fallback_quote_from_last_good(symbol, ["http-error"], source="kis")
+
+    try:
+        data = resp.json()
+    except Exception as exc:
+        _log("KIS INDEX JSON ERROR", symbol=symbol, err=repr(exc))
+        return await _fallback_quote_from_last_good(symbol, ["json-error"], source="kis")
+
+    price, change, change_percent, name = _parse_kis_index_quote(data)
+    if price is None:
+        _log("KIS INDEX MISSING PRICE", symbol=symbol, keys=",".join(sorted(data.keys())))
+        return await _fallback_quote_from_last_good(symbol, ["price-unavailable"], source="kis")
+
+    accepted = _with_guard_fields(
+        {
+            "symbol": symbol,
+            "price": float(price),
+            "change": change,
+            "changePercent": change_percent,
+            "currency": "KRW",
+            "marketTime": _iso_time(time.time()),
+            "source": "kis",
+            "name": name or definition["name"],
+        },
+        status=QUOTE_STATUS_VALID,
+        guard_reason=None,
+        warning=None,
+        stale_age_sec=None,
+    )
+    await _remember_last_good_quote(symbol, accepted)
+    return accepted
+
+
+async def _fetch_us_index_quote(
+    client: httpx.AsyncClient,
+    symbol: str,
+    priority: int = PRIORITY_QUOTE,
+) -> Dict[str, Any]:
+    definition = _us_index_definition(symbol)
+    if not definition:
+        return _empty_quote_with_source(symbol, "yahoo")
+    encoded = url_quote(definition["yahoo"], safe="")
+    url = YAHOO_CHART_URL.format(symbol=encoded)
+    try:
+        async with _upstream_slot(priority):
             resp = await client.get(
                 url,
                 headers={
@@ -1178,466 +3564,1353 @@ async def _fetch_us_index_quote(
                 },
                 timeout=10.0,
             )
+    except Exception as exc:
+        _log("YAHOO INDEX ERROR", symbol=symbol, err=repr(exc))
+        return await _fallback_quote_from_last_good(symbol, [_request_failure_reason(exc)], source="yahoo")
+    if resp.status_code != 200:
+        _log("YAHOO INDEX HTTP ERROR", symbol=symbol, status=resp.status_code, body=resp.text[:120])
+        return await _fallback_quote_from_last_good(symbol, ["http-error"], source="yahoo")
+    try:
+        data = resp.json()
+    except Exception as exc:
+        _log("YAHOO INDEX JSON ERROR", symbol=symbol, err=repr(exc))
+        return await _fallback_quote_from_last_good(symbol, ["json-error"], source="yahoo")
+    quote = _parse_yahoo_chart_quote(symbol, definition["name"], definition.get("currency", "USD"), data)
+    if not quote:
+        return await _fallback_quote_from_last_good(symbol, ["price-unavailable"], source="yahoo")
+    accepted = _with_guard_fields(
+        quote,
+        status=QUOTE_STATUS_VALID,
+        guard_reason=None,
+        warning=None,
+        stale_age_sec=None,
+    )
+    await _remember_last_good_quote(symbol, accepted)
+    return accepted
+
+
+async def _fetch_kis_investor_flows(
+    client: httpx.AsyncClient,
+    symbol: str,
+    settings: _Settings,
+    priority: int = PRIORITY_FLOW,
+) -> Dict[str, Any]:
+    code = _parse_kospi_stock_code(symbol)
+    if not code:
+        return {
+            "symbol": symbol,
+            "market": "KOSPI",
+            "flows": [],
+            "source": "kis",
+            "warning": "unsupported-symbol",
+        }
+
+    params = {
+        "FID_COND_MRKT_DIV_CODE": "J",
+        "FID_INPUT_ISCD": code,
+    }
+
+    try:
+        resp = await _kis_request(client, settings, KIS_INVESTOR_PATH, KIS_TR_ID_INVESTOR, params, priority)
+    except Exception as exc:
+        _log("KIS INVESTOR ERROR", symbol=symbol, err=repr(exc))
+        return {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "request-failed"}
+
+    if resp.status_code != 200:
+        _log(
+            "KIS INVESTOR HTTP ERROR",
+            symbol=symbol,
+            route=f"{KIS_INVESTOR_PATH}|{KIS_TR_ID_INVESTOR}",
+            status=resp.status_code,
+            body=resp.text[:200],
+        )
+        return {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "http-error"}
+
+    try:
+        data = resp.json()
+    except Exception as exc:
+        _log("KIS INVESTOR JSON ERROR", symbol=symbol, err=repr(exc))
+        return {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "json-error"}
+
+    if str(data.get("rt_cd", "0")) not in ("0", ""):
+        summary = _extract_error_summary(data)
+        _log("KIS INVESTOR API ERROR", symbol=symbol, route=f"{KIS_INVESTOR_PATH}|{KIS_TR_ID_INVESTOR}", message=summary)
+        return {
+            "symbol": symbol,
+            "market": "KOSPI",
+            "flows": [],
+            "source": "kis",
+            "warning": summary or "api-error",
+        }
+
+    flows = _parse_kis_investor_flows(code, data)
+    return {
+        "symbol": symbol,
+        "code": code,
+        "market": "KOSPI",
+        "flows": flows,
+        "source": "kis",
+        "warning": None if flows else "no-data",
+    }
+
+
+async def _fetch_kis_overseas_quote(
+    client: httpx.AsyncClient,
+    symbol: str,
+    settings: _Settings,
+    priority: int = PRIORITY_QUOTE,
+) -> Dict[str, Any]:
+    market, excd, symb = _parse_symbol(symbol)
+    if market != "US" or not excd or not symb:
+        return _empty_quote_with_source(symbol, "kis")
+
+    params = {"AUTH": "", "EXCD": excd, "SYMB": symb}
+
+    max_attempts = 1 + settings.guard_retry_count
+    latest_reasons: List[str] = []
+
+    for attempt in range(max_attempts):
+        try:
+            resp = await _kis_request(
+                client, settings, KIS_OVERSEAS_PRICE_PATH, KIS_TR_ID_OVERSEAS_PRICE, params, priority
+            )
+        except _KisTokenUnavailable as exc:
+            _log("KIS OVERSEAS QUOTE ERROR", symbol=symbol, err=repr(exc))
+            latest_reasons = ["token-refresh-failed"]
+            break
+        except _CircuitOpenError as exc:
+            _log("KIS OVERSEAS QUOTE ERROR", symbol=symbol, err=repr(exc))
+            latest_reasons = ["circuit-open"]
+            break
         except Exception as exc:
-            print("[YAHOO INDEX ERROR]", symbol, repr(exc))
-            return _fallback_quote_from_last_good(symbol, ["request-failed"], source="yahoo")
+            _log("KIS OVERSEAS QUOTE ERROR", symbol=symbol, err=repr(exc))
+            latest_reasons = ["request-failed"]
+            continue
+
         if resp.status_code != 200:
-            print("[YAHOO INDEX HTTP ERROR]", symbol, resp.status_code, resp.text[:120])
-            return _fallback_quote_from_last_good(symbol, ["http-error"], source="yahoo")
+            _log("KIS OVERSEAS QUOTE HTTP ERROR", symbol=symbol, status=resp.status_code, body=resp.text[:200])
+            latest_reasons = [f"http-{resp.status_code}"]
+            continue
         try:
             data = resp.json()
         except Exception as exc:
-            print("[YAHOO INDEX JSON ERROR]", symbol, repr(exc))
-            return _fallback_quote_from_last_good(symbol, ["json-error"], source="yahoo")
-        quote = _parse_yahoo_chart_quote(symbol, definition["name"], definition.get("currency", "USD"), data)
-        if not quote:
-            return _fallback_quote_from_last_good(symbol, ["price-unavailable"], source="yahoo")
+            _log("KIS OVERSEAS QUOTE JSON ERROR", symbol=symbol, err=repr(exc))
+            latest_reasons = ["json-error"]
+            continue
+
+        price, change, change_percent, currency = _parse_kis_overseas_quote(data)
+        if price is None or price <= 0:
+            _log("KIS OVERSEAS QUOTE MISSING PRICE", symbol=symbol, keys=",".join(sorted(data.keys())))
+            latest_reasons = ["missing-price"]
+            continue
+
+        guard_context = _extract_overseas_guard_context(data)
+        guard_result = await _evaluate_price_guard(
+            symbol,
+            {
+                "price": float(price),
+                "dayLow": guard_context.get("dayLow"),
+                "dayHigh": guard_context.get("dayHigh"),
+                "bid": guard_context.get("bid"),
+                "ask": guard_context.get("ask"),
+            },
+            settings,
+        )
+        if guard_result.get("suspect"):
+            latest_reasons = list(guard_result.get("reasons") or ["suspect-price"])
+            _log("PRICE GUARD SUSPECT", symbol=symbol, route=KIS_OVERSEAS_PRICE_PATH, reasons=latest_reasons)
+            if attempt < max_attempts - 1:
+                await asyncio.sleep(_get_guard_retry_delay_seconds(attempt))
+                continue
+            break
+
         accepted = _with_guard_fields(
-            quote,
+            {
+                "symbol": symbol,
+                "price": float(price),
+                "change": change,
+                "changePercent": change_percent,
+                "currency": currency or "USD",
+                "marketTime": _iso_time(time.time()),
+                "source": "kis",
+                "name": None,
+            },
             status=QUOTE_STATUS_VALID,
             guard_reason=None,
             warning=None,
             stale_age_sec=None,
         )
-        _remember_last_good_quote(symbol, accepted)
+        await _remember_last_good_quote(symbol, accepted)
         return accepted
 
+    return await _fallback_quote_from_last_good(symbol, latest_reasons or ["price-unavailable"], source="kis")
 
-async def _fetch_kis_investor_flows(
+
+async def _fetch_kis_daily_history_kr(
     client: httpx.AsyncClient,
     symbol: str,
-    token: str,
-    app_key: str,
-    app_secret: str,
-    base_url: str,
-    sem: asyncio.Semaphore,
+    settings: _Settings,
+    start_date: str,
+    end_date: str,
+    priority: int = PRIORITY_HISTORY,
 ) -> Dict[str, Any]:
-    async with sem:
-        code = _parse_kospi_stock_code(symbol)
-        if not code:
-            return {
-                "symbol": symbol,
-                "market": "KOSPI",
-                "flows": [],
-                "source": "kis",
-                "warning": "unsupported-symbol",
+    market, _, code = _parse_symbol(symbol)
+    if market != "KR":
+        return {"symbol": symbol, "points": [], "source": "kis", "warning": "invalid-market"}
+
+    routes = await _ordered_kis_routes(
+        KIS_ROUTE_HISTORY,
+        code,
+        [(KIS_DAILY_PRICE_PATH, KIS_TR_ID_DAILY_PRICE, market_code, "upper") for market_code in ("J", "Q")],
+    )
+    max_pages = _get_history_max_pages()
+
+    async def _fetch_partition(
+        market_code: str, path: str, partition_start: str, partition_end: str, page_budget: int
+    ) -> Tuple[List[List[Dict[str, Any]]], str | None]:
+        pages: List[List[Dict[str, Any]]] = []
+        cursor_end = partition_end
+        for _ in range(page_budget):
+            params = {
+                "FID_COND_MRKT_DIV_CODE": market_code,
+                "FID_INPUT_ISCD": code,
+                "FID_INPUT_DATE_1": _to_ymd_compact(partition_start),
+                "FID_INPUT_DATE_2": _to_ymd_compact(cursor_end),
+                "FID_PERIOD_DIV_CODE": "D",
+                "FID_ORG_ADJ_PRC": "1",
             }
+            try:
+                resp = await _single_flight(
+                    ("kis-daily-kr", code, market_code, partition_start, cursor_end),
+                    partial(_kis_request, client, settings, path, KIS_TR_ID_DAILY_PRICE, params, priority, 12.0),
+                )
+            except _KisTokenUnavailable:
+                raise
+            except Exception as exc:
+                _log("KIS DAILY KR ERROR", symbol=symbol, err=repr(exc))
+                return pages, _request_failure_reason(exc)
+            if resp.status_code != 200:
+                _log(
+                    "KIS DAILY KR REQ",
+                    level=logging.WARNING,
+                    symbol=symbol,
+                    route=f"{path}|{KIS_TR_ID_DAILY_PRICE}|{market_code}",
+                    status=resp.status_code,
+                )
+                return pages, "rate-limited" if _kis_error_kind(resp) == KIS_ERROR_RATE_LIMIT else "http-error"
+            try:
+                data = resp.json()
+            except Exception as exc:
+                _log("KIS DAILY KR JSON ERROR", symbol=symbol, err=repr(exc))
+                return pages, "json-error"
+            if str(data.get("rt_cd", "0")) not in ("0", ""):
+                _log("KIS DAILY KR API ERROR", symbol=symbol, message=_extract_error_summary(data))
+                return pages, "api-error"
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "appkey": app_key,
-            "appsecret": app_secret,
-            "tr_id": KIS_TR_ID_INVESTOR,
-            "content-type": "application/json",
-        }
+            points = _extract_history_points(
+                data,
+                schema=KIS_TR_ID_DAILY_PRICE,
+                date_keys=["stck_bsop_date", "bsop_date", "date", "trd_dd", "bas_dt"],
+                close_keys=["stck_clpr", "clpr", "close", "last", "stck_prpr"],
+                open_keys=["stck_oprc", "oprc", "open", "open_price"],
+                high_keys=["stck_hgpr", "hgpr", "high", "high_price"],
+                low_keys=["stck_lwpr", "lwpr", "low", "low_price"],
+                volume_keys=["acml_vol", "volume", "vol", "trd_vol", "acc_trdvol"],
+                start_date=partition_start,
+                end_date=cursor_end,
+            )
+            if not points:
+                break
+            pages.append(points)
+            earliest = points[0]["date"]
+            if earliest <= partition_start:
+                break
+            next_cursor = _date_before(earliest)
+            if next_cursor >= cursor_end or not _has_trading_day(MARKET_KR, partition_start, next_cursor):
+                break
+            cursor_end = next_cursor
+        else:
+            return pages, HISTORY_WARNING_TRUNCATED
+        return pages, None
+
+    # Partitions are sized to fit one page each, so after the newest one answers for the market code the
+    # rest are fetched concurrently; a partition that still overflows keeps paging within its own range.
+    # An empty newest partition is not the end of the series (a halted or delisted symbol stops trading),
+    # so the older partitions are still requested on that route. Only an HTTP or API error counts against
+    # a route; transport failures say nothing about the market code. Any error is still returned as the
+    # warning so an outage is not mistaken for a symbol without bars.
+    all_partitions = _history_partitions(start_date, end_date, _get_history_partition_days())
+    partitions = all_partitions[:max_pages]
+    failure: str | None = None
+    for route in routes:
+        path, market_code = route[0], route[2]
+        first_start, first_end = partitions[0]
+        try:
+            pages, warning = await _fetch_partition(market_code, path, first_start, first_end, max_pages)
+            if not pages and warning:
+                if warning in ("http-error", "api-error"):
+                    await _record_kis_route(KIS_ROUTE_HISTORY, code, route, False)
+                failure = failure or warning
+                continue
+            page_budget = max(1, max_pages - len(partitions) + 1)
+            rest = await asyncio.gather(
+                *(
+                    _fetch_partition(market_code, path, partition_start, partition_end, page_budget)
+                    for partition_start, partition_end in partitions[1:]
+                )
+            )
+        except _KisTokenUnavailable as exc:
+            _log("KIS DAILY KR ERROR", symbol=symbol, err=repr(exc))
+            return {"symbol": symbol, "points": [], "source": "kis", "warning": "token-unavailable"}
+        for partition_pages, partition_warning in rest:
+            pages.extend(partition_pages)
+            if partition_warning and warning in (None, HISTORY_WARNING_TRUNCATED):
+                warning = partition_warning
+        if len(all_partitions) > len(partitions):
+            warning = warning or HISTORY_WARNING_TRUNCATED
+
+        merged = _merge_history_pages(pages)
+        if merged:
+            await _record_kis_route(KIS_ROUTE_HISTORY, code, route, True)
+            result: Dict[str, Any] = {"symbol": symbol, "points": merged, "source": "kis"}
+            if warning:
+                result["warning"] = warning
+            return result
+        if warning:
+            failure = failure or warning
+
+    return {"symbol": symbol, "points": [], "source": "kis", "warning": failure or "no-history"}
+
+
+async def _fetch_kis_daily_history_us(
+    client: httpx.AsyncClient,
+    symbol: str,
+    settings: _Settings,
+    start_date: str,
+    end_date: str,
+    priority: int = PRIORITY_HISTORY,
+) -> Dict[str, Any]:
+    market, excd, symb = _parse_symbol(symbol)
+    if market != "US" or not excd or not symb:
+        return {"symbol": symbol, "points": [], "source": "kis", "warning": "invalid-market"}
+
+    async def _request_history(cursor_end: str) -> httpx.Response:
         params = {
-            "FID_COND_MRKT_DIV_CODE": "J",
-            "FID_INPUT_ISCD": code,
+            "AUTH": "",
+            "EXCD": excd,
+            "SYMB": symb,
+            "GUBN": "0",
+            "BYMD": _to_ymd_compact(cursor_end),
+            "MODP": "0",
         }
+        return await _kis_request(
+            client, settings, KIS_OVERSEAS_DAILY_PRICE_PATH, KIS_TR_ID_OVERSEAS_DAILY_PRICE, params, priority, 12.0
+        )
 
-        async def _request(access_token: str) -> httpx.Response:
-            request_headers = {**headers, "Authorization": f"Bearer {access_token}"}
-            return await client.get(
-                f"{base_url}{KIS_INVESTOR_PATH}",
-                params=params,
-                headers=request_headers,
-                timeout=10.0,
-            )
-
+    pages: List[List[Dict[str, Any]]] = []
+    cursor_end = end_date
+    truncated = False
+    for _ in range(_get_history_max_pages()):
         try:
-            resp = await _request(token)
+            resp = await _single_flight(("kis-daily-us", excd, symb, cursor_end), partial(_request_history, cursor_end))
         except Exception as exc:
-            print("[KIS INVESTOR ERROR]", symbol, repr(exc))
-            return {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "request-failed"}
-
-        if resp.status_code in (401, 403):
-            await _invalidate_kis_token()
-            refreshed = await _get_kis_token(client)
-            if refreshed:
-                try:
-                    resp = await _request(refreshed)
-                except Exception as exc:
-                    print("[KIS INVESTOR RETRY ERROR]", symbol, repr(exc))
-                    return {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "request-failed"}
+            _log("KIS DAILY US ERROR", symbol=symbol, err=repr(exc))
+            return {"symbol": symbol, "points": [], "source": "kis", "warning": "request-failed"}
 
         if resp.status_code != 200:
-            print(
-                f"[KIS INVESTOR HTTP ERROR] symbol={symbol} path={KIS_INVESTOR_PATH} tr_id={KIS_TR_ID_INVESTOR} status={resp.status_code} body={resp.text[:200]}"
-            )
-            return {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "http-error"}
+            _log("KIS DAILY US HTTP ERROR", symbol=symbol, status=resp.status_code, body=resp.text[:200])
+            return {"symbol": symbol, "points": [], "source": "kis", "warning": "http-error"}
 
         try:
             data = resp.json()
         except Exception as exc:
-            print("[KIS INVESTOR JSON ERROR]", symbol, repr(exc))
-            return {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "json-error"}
-
+            _log("KIS DAILY US JSON ERROR", symbol=symbol, err=repr(exc))
+            return {"symbol": symbol, "points": [], "source": "kis", "warning": "json-error"}
         if str(data.get("rt_cd", "0")) not in ("0", ""):
-            summary = _extract_error_summary(data)
-            print(
-                f"[KIS INVESTOR API ERROR] symbol={symbol} path={KIS_INVESTOR_PATH} tr_id={KIS_TR_ID_INVESTOR} message={summary}"
+            _log("KIS DAILY US API ERROR", symbol=symbol, message=_extract_error_summary(data))
+            return {"symbol": symbol, "points": [], "source": "kis", "warning": "api-error"}
+
+        points = _extract_history_points(
+            data,
+            schema=KIS_TR_ID_OVERSEAS_DAILY_PRICE,
+            date_keys=["xymd", "date", "trd_dd", "bas_dt", "stck_bsop_date"],
+            close_keys=["clos", "last", "ovrs_nmix_prpr", "ovrs_clpr", "close", "stck_clpr"],
+            open_keys=["open", "ovrs_oprc", "stck_oprc", "oprc", "open_price"],
+            high_keys=["high", "ovrs_hgpr", "stck_hgpr", "hgpr", "high_price"],
+            low_keys=["low", "stck_lwpr", "ovrs_lwpr", "lwpr", "low_price"],
+            volume_keys=["tvol", "evol", "acml_vol", "volume", "vol", "trd_vol"],
+            start_date=start_date,
+            end_date=cursor_end,
+        )
+        if not points:
+            break
+        pages.append(points)
+        earliest = points[0]["date"]
+        if earliest <= start_date:
+            break
+        next_cursor = _date_before(earliest)
+        if next_cursor >= cursor_end:
+            break
+        cursor_end = next_cursor
+    else:
+        truncated = True
+
+    merged = _merge_history_pages(pages)
+    if not merged:
+        return {"symbol": symbol, "points": [], "source": "kis", "warning": "no-history"}
+    if truncated:
+        return {"symbol": symbol, "points": merged, "source": "kis", "warning": HISTORY_WARNING_TRUNCATED}
+    return {"symbol": symbol, "points": merged, "source": "kis"}
+
+
+def _history_store_path(store_dir: Path, symbol: str) -> Path | None:
+    market, excd, code = _parse_symbol(symbol)
+    if market == "KR":
+        name = f"KR_{code}"
+    elif market == "US" and excd and code:
+        name = f"{excd}_{code}"
+    else:
+        return None
+    return store_dir / f"{HISTORY_STORE_NAME_RE.sub('_', name)}.sqlite3"
+
+
+def _open_history_store(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10.0)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS bars ("
+        "date TEXT PRIMARY KEY, open REAL, high REAL, low REAL, close REAL NOT NULL, volume REAL)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    return conn
+
+
+def _read_history_store(path: Path, start_date: str, end_date: str) -> Tuple[Dict[str, np.ndarray], str | None, str | None]:
+    if not path.exists():
+        return _history_columns([]), None, None
+    conn = _open_history_store(path)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        rows = conn.execute(
+            "SELECT date, open, high, low, close, volume FROM bars WHERE date >= ? AND date <= ? ORDER BY date",
+            (start_date, end_date),
+        ).fetchall()
+    finally:
+        conn.close()
+    # NULL optional fields become NaN, matching _history_columns for points without them.
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(HISTORY_COLUMN_FIELDS))
+    columns: Dict[str, np.ndarray] = {"dates": np.array([row[0] for row in rows], dtype="datetime64[D]")}
+    for index, field in enumerate(HISTORY_COLUMN_FIELDS):
+        columns[field] = np.ascontiguousarray(values[:, index])
+    return columns, meta.get("covered_start"), meta.get("covered_end")
+
+
+def _write_history_store(path: Path, points: List[Dict[str, Any]], covered_start: str | None, covered_end: str | None) -> None:
+    conn = _open_history_store(path)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars (date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (point["date"], point.get("open"), point.get("high"), point.get("low"), point["close"], point.get("volume"))
+                    for point in points
+                ],
             )
-            return {
-                "symbol": symbol,
-                "market": "KOSPI",
-                "flows": [],
-                "source": "kis",
-                "warning": summary or "api-error",
-            }
+            if covered_start and covered_end:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [("covered_start", covered_start), ("covered_end", covered_end)],
+                )
+    finally:
+        conn.close()
 
-        flows = _parse_kis_investor_flows(code, data)
-        return {
-            "symbol": symbol,
-            "code": code,
-            "market": "KOSPI",
-            "flows": flows,
-            "source": "kis",
-            "warning": None if flows else "no-data",
-        }
 
+def _merge_history_coverage(
+    current: Tuple[str | None, str | None], fetched: Tuple[str, str]
+) -> Tuple[str | None, str | None]:
+    current_start, current_end = current
+    fetched_start, fetched_end = fetched
+    if fetched_start > fetched_end:
+        return current
+    if not current_start or not current_end:
+        return fetched
+    if fetched_start <= _date_after(current_end) and current_start <= _date_after(fetched_end):
+        return min(current_start, fetched_start), max(current_end, fetched_end)
+    return fetched if fetched_end > current_end else current
 
-async def _fetch_kis_overseas_quote(
+
+async def _fetch_history_range(
     client: httpx.AsyncClient,
     symbol: str,
-    token: str,
-    app_key: str,
-    app_secret: str,
-    base_url: str,
-    sem: asyncio.Semaphore,
+    settings: _Settings,
+    start_date: str,
+    end_date: str,
 ) -> Dict[str, Any]:
-    async with sem:
-        market, excd, symb = _parse_symbol(symbol)
-        if market != "US" or not excd or not symb:
-            return _empty_quote_with_source(symbol, "kis")
-
-        params = {"AUTH": "", "EXCD": excd, "SYMB": symb}
-
-        async def _request_overseas(access_token: str) -> httpx.Response:
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "appkey": app_key,
-                "appsecret": app_secret,
-                "tr_id": KIS_TR_ID_OVERSEAS_PRICE,
-                "content-type": "application/json",
-            }
-            return await client.get(
-                f"{base_url}{KIS_OVERSEAS_PRICE_PATH}", params=params, headers=headers, timeout=10.0
+    if _parse_symbol(symbol)[0] == "KR":
+        return await _fetch_kis_daily_history_kr(client, symbol, settings, start_date, end_date)
+    return await _fetch_kis_daily_history_us(client, symbol, settings, start_date, end_date)
+
+
+async def _get_history_series(
+    client: httpx.AsyncClient,
+    symbol: str,
+    settings: _Settings,
+    start_date: str,
+    end_date: str,
+) -> Dict[str, Any]:
+    store_dir = _get_history_store_dir()
+    path = _history_store_path(store_dir, symbol) if store_dir else None
+    if path is None:
+        return _columnar_history_item(await _fetch_history_range(client, symbol, settings, start_date, end_date))
+
+    try:
+        stored, covered_start, covered_end = await asyncio.to_thread(_read_history_store, path, start_date, end_date)
+    except Exception as exc:
+        _log("HISTORY STORE READ ERROR", symbol=symbol, err=repr(exc))
+        return _columnar_history_item(await _fetch_history_range(client, symbol, settings, start_date, end_date))
+
+    gaps: List[Tuple[str, str]] = []
+    if not covered_start or not covered_end:
+        gaps.append((start_date, end_date))
+    else:
+        if start_date < covered_start:
+            gaps.append((start_date, min(end_date, _date_before(covered_start))))
+        if end_date > covered_end:
+            gaps.append((max(start_date, _date_after(covered_end)), end_date))
+    if not gaps:
+        if not stored["dates"].size:
+            return {"symbol": symbol, "columns": stored, "source": "kis", "warning": "no-history"}
+        return {"symbol": symbol, "columns": stored, "source": "kis"}
+
+    market = _parse_symbol(symbol)[0]
+    last_closed = _last_closed_session_date(market)
+    today = datetime.now(MARKET_SESSIONS[market][0]).strftime("%Y-%m-%d")
+    pages: List[Dict[str, np.ndarray]] = [stored]
+    closed_points: List[Dict[str, Any]] = []
+    coverage = (covered_start, covered_end)
+    warning: str | None = None
+    for gap_start, gap_end in gaps:
+        if gap_start > last_closed and not _has_trading_day(market, gap_start, min(gap_end, today)):
+            continue
+        fetched = await _fetch_history_range(client, symbol, settings, gap_start, gap_end)
+        points = fetched.get("points") or []
+        pages.append(_history_columns(points))
+        closed_points.extend(point for point in points if point["date"] <= last_closed)
+        # A successful fetch covers the whole gap even when bars start later (a symbol listed inside the range).
+        # no-history is only returned when every route answered rt_cd 0 with no bars; any HTTP, API or
+        # transport error comes back as its own warning and leaves the gap uncovered. A fetch that ran out of
+        # pages only covers what it reached.
+        gap_warning = fetched.get("warning")
+        effective_start = gap_start
+        if gap_warning == HISTORY_WARNING_TRUNCATED and points:
+            warning = warning or gap_warning
+            effective_start = points[0]["date"]
+        elif gap_warning and gap_warning != "no-history":
+            warning = gap_warning
+            continue
+        coverage = _merge_history_coverage(coverage, (effective_start, min(gap_end, last_closed)))
+
+    if closed_points or coverage != (covered_start, covered_end):
+        try:
+            await asyncio.to_thread(_write_history_store, path, closed_points, coverage[0], coverage[1])
+        except Exception as exc:
+            _log("HISTORY STORE WRITE ERROR", symbol=symbol, err=repr(exc))
+
+    merged = _merge_history_columns(pages, start_date, end_date)
+    if not merged["dates"].size:
+        return {"symbol": symbol, "columns": merged, "source": "kis", "warning": warning or "no-history"}
+    result: Dict[str, Any] = {"symbol": symbol, "columns": merged, "source": "kis"}
+    if warning:
+        result["warning"] = warning
+    return result
+
+
+async def _get_usd_krw_rate(client: httpx.AsyncClient) -> Dict[str, Any]:
+    pair = "USD/KRW"
+    cached = await _cache_get(CACHE_NS_FX, pair)
+    if cached is not None:
+        return cached
+    return await _single_flight(("naver-fx", pair), partial(_scrape_usd_krw_rate, client, pair))
+
+
+async def _scrape_usd_krw_rate(client: httpx.AsyncClient, pair: str) -> Dict[str, Any]:
+    now = time.time()
+    url = NAVER_FX_URL
+    headers = {
+        "User-Agent": (
+            "Mozilla/5.0 (iPhone; CPU iPhone OS 16_5 like Mac OS X) "
+            "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Mobile/15E148 Safari/604.1"
+        ),
+        "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.8",
+        "Referer": "https://m.search.naver.com/",
+    }
+    _log("FX NAVER REQ", sample=True, url=url)
+    try:
+        async with _upstream_slot(PRIORITY_QUOTE):
+            resp = await client.get(url, headers=headers, timeout=10.0)
+    except Exception as exc:
+        _log("FX NAVER ERROR", err=repr(exc))
+        last_good = await _cache_get(CACHE_NS_FX_LAST_GOOD, pair)
+        if last_good:
+            return {**last_good, "error": "FX request failed"}
+        return {"pair": pair, "rate": None, "change": None, "changePercent": None, "ts": None, "source": "naver", "error": "FX request failed"}
+
+    _log("FX NAVER RES", sample=resp.status_code == 200, status=resp.status_code, body_length=len(resp.text))
+    if resp.status_code != 200:
+        last_good = await _cache_get(CACHE_NS_FX_LAST_GOOD, pair)
+        if last_good:
+            return {**last_good, "error": f"FX http {resp.status_code}"}
+        return {"pair": pair, "rate": None, "change": None, "changePercent": None, "ts": None, "source": "naver", "error": f"FX http {resp.status_code}"}
+
+    body = resp.text or ""
+    rate, change, change_percent, candidate_count = _parse_naver_fx(body)
+    _log("FX NAVER PARSE", sample=rate is not None, rate=rate, candidates=candidate_count)
+    if rate is None or not (500 <= rate <= 5000):
+        last_good = await _cache_get(CACHE_NS_FX_LAST_GOOD, pair)
+        if last_good:
+            return {**last_good, "error": "FX rate missing"}
+        return {"pair": pair, "rate": None, "change": None, "changePercent": None, "ts": None, "source": "naver", "error": "FX rate missing"}
+
+    ttl = _get_quote_ttl_seconds(pair)
+    result = {
+        "pair": pair,
+        "rate": rate,
+        "change": change,
+        "changePercent": change_percent,
+        "ts": now,
+        "source": "naver",
+    }
+    global _persisted_cache_dirty
+    await _cache_set(CACHE_NS_FX, pair, result, ttl)
+    await _cache_set(CACHE_NS_FX_LAST_GOOD, pair, result, STATE_LAST_GOOD_MAX_AGE)
+    _persisted_cache_dirty = True
+    return result
+
+
+async def _fetch_quotes_uncached(normalized: List[str], priority: int = PRIORITY_QUOTE) -> List[Dict[str, Any]]:
+    fx_symbols: List[str] = []
+    kr_index_symbols: List[str] = []
+    us_index_symbols: List[str] = []
+    kr_symbols: List[str] = []
+    us_symbols: List[str] = []
+    for symbol in normalized:
+        parsed = _classify_symbol(symbol)
+        if parsed.kind == QUOTE_CLASS_FX:
+            fx_symbols.append(symbol)
+        elif parsed.us_index is not None:
+            us_index_symbols.append(symbol)
+        elif parsed.kr_index is not None:
+            kr_index_symbols.append(symbol)
+        elif parsed.market == "KR":
+            kr_symbols.append(symbol)
+        elif parsed.market == "US":
+            us_symbols.append(symbol)
+
+    settings = _get_settings()
+    if (kr_symbols or us_symbols or kr_index_symbols) and not settings.kis_credentials():
+        raise HTTPException(status_code=500, detail="KIS credentials not configured")
+
+    client = _get_http_client(UPSTREAM_KIS)
+    tasks: List[asyncio.Task] = []
+
+    kis_token = ""
+    if kr_symbols or us_symbols or kr_index_symbols:
+        kis_token = await _get_kis_token(client)
+        if not kis_token:
+            for symbol in kr_index_symbols:
+                tasks.append(
+                    asyncio.create_task(
+                        asyncio.sleep(
+                            0,
+                            result=_with_guard_fields(
+                                {
+                                    "symbol": symbol,
+                                    "price": None,
+                                    "change": None,
+                                    "changePercent": None,
+                                    "currency": "KRW",
+                                    "marketTime": None,
+                                    "source": "kis",
+                                    "name": _kr_index_definition(symbol)["name"] if _kr_index_definition(symbol) else None,
+                                },
+                                status=QUOTE_STATUS_ERROR,
+                                guard_reason="token-unavailable",
+                                warning="kis-token-unavailable",
+                                stale_age_sec=None,
+                            ),
+                        )
+                    )
+                )
+            for symbol in [*kr_symbols, *us_symbols]:
+                tasks.append(
+                    asyncio.create_task(_fallback_quote_from_last_good(symbol, ["token-unavailable"], source="kis"))
+                )
+
+    if kis_token:
+        for symbol in kr_index_symbols:
+            tasks.append(
+                asyncio.create_task(
+                    _single_flight(
+                        ("kis-index", symbol),
+                        partial(
+                            _fetch_kis_index_quote, client, symbol, settings, priority
+                        ),
+                    )
+                )
             )
 
-        max_attempts = 1 + _get_guard_retry_count()
-        latest_reasons: List[str] = []
+    for symbol in us_index_symbols:
+        tasks.append(
+            asyncio.create_task(
+                _single_flight(
+                    ("yahoo-index", symbol),
+                    partial(_fetch_us_index_quote, _get_http_client(UPSTREAM_YAHOO), symbol, priority),
+                )
+            )
+        )
 
-        for attempt in range(max_attempts):
+    if kis_token:
+        batches: Dict[str, "asyncio.Future[Dict[str, Dict[str, Any]]]"] = {}
+        bulk_symbols = [
+            symbol
+            for symbol in kr_symbols
+            if ("kis-quote", symbol) not in _inflight_requests and _classify_symbol(symbol).kind == QUOTE_CLASS_KR_STOCK
+        ]
+        if (
+            len(bulk_symbols) > 1
+            and _get_kis_bulk_enabled()
+            and not await _kis_route_recently_failed(KIS_ROUTE_QUOTE_BULK, "*", KIS_MULTI_PRICE_ROUTE)
+        ):
+            chunk: List[str] = []
+            chunk_codes: Set[str] = set()
+            chunks: List[List[str]] = []
+            for symbol in bulk_symbols:
+                code = _classify_symbol(symbol).code
+                if code not in chunk_codes and len(chunk_codes) >= KIS_MULTI_PRICE_MAX_CODES:
+                    chunks.append(chunk)
+                    chunk, chunk_codes = [], set()
+                chunk.append(symbol)
+                chunk_codes.add(code)
+            chunks.append(chunk)
+            for chunk in chunks:
+                batch = asyncio.ensure_future(
+                    _fetch_kis_quotes_bulk(client, chunk, settings, priority)
+                )
+                for symbol in chunk:
+                    batches[symbol] = batch
+
+        for symbol in kr_symbols:
+            batch = batches.get(symbol)
+            fetch = (
+                partial(_fetch_kis_quote_via_bulk, batch, client, symbol, settings, priority)
+                if batch is not None
+                else partial(_fetch_kis_quote, client, symbol, settings, priority)
+            )
+            tasks.append(asyncio.create_task(_single_flight(("kis-quote", symbol), fetch)))
+
+        for symbol in us_symbols:
+            tasks.append(
+                asyncio.create_task(
+                    _single_flight(
+                        ("kis-overseas-quote", symbol),
+                        partial(
+                            _fetch_kis_overseas_quote, client, symbol, settings, priority
+                        ),
+                    )
+                )
+            )
+
+    if fx_symbols:
+        fx_result = await _get_usd_krw_rate(_get_http_client(UPSTREAM_NAVER))
+        for symbol in fx_symbols:
+            tasks.append(
+                asyncio.create_task(
+                    asyncio.sleep(0, result={
+                        "symbol": symbol,
+                        "price": fx_result.get("rate"),
+                        "change": fx_result.get("change"),
+                        "changePercent": fx_result.get("changePercent"),
+                        "currency": "KRW",
+                        "marketTime": _iso_time(time.time()) if fx_result.get("rate") else None,
+                        "source": fx_result.get("source") or "naver",
+                        "name": None,
+                        "status": QUOTE_STATUS_VALID if fx_result.get("rate") else QUOTE_STATUS_ERROR,
+                        "guardReason": None,
+                        "staleAgeSec": None,
+                    })
+                )
+            )
+
+    return list(await asyncio.gather(*tasks))
+
+
+async def _store_quotes(symbols: List[str], fetched: List[Dict[str, Any]]) -> Dict[str, Tuple[float, Dict[str, Any]]]:
+    fetched_by_symbol = {quote["symbol"].upper(): quote for quote in fetched}
+    stored_at = time.time()
+    max_stale = _get_swr_max_stale_seconds()
+    stored: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    entries_by_ttl: Dict[int, Dict[str, Any]] = {}
+    for symbol in symbols:
+        quote = fetched_by_symbol.get(symbol)
+        if quote is None:
+            continue
+        ttl = _get_quote_ttl_seconds(symbol)
+        if quote.get("status") != QUOTE_STATUS_VALID:
+            # Fallback and error quotes keep the open-market TTL so a transient failure outside trading hours
+            # is retried soon instead of being pinned for QUOTE_CACHE_TTL_CLOSED.
+            ttl = min(ttl, _get_quote_class_ttl_seconds(_classify_symbol(symbol).kind))
+        entries_by_ttl.setdefault(ttl, {})[symbol] = {
+            "expires_at": stored_at + ttl,
+            "fetched_at": stored_at,
+            "quote": quote,
+        }
+        stored[symbol] = (stored_at, quote)
+    for ttl, entries in entries_by_ttl.items():
+        await _cache_set_many(CACHE_NS_QUOTES, entries, ttl + max_stale)
+    return stored
+
+
+async def _refresh_quotes(symbols: List[str]) -> None:
+    try:
+        await _store_quotes(symbols, await _fetch_quotes_uncached(symbols, PRIORITY_REFRESH))
+    except Exception as exc:
+        _log("QUOTE REFRESH ERROR", symbols=",".join(symbols), err=repr(exc))
+    finally:
+        _quote_refreshing.difference_update(symbols)
+
+
+def _spawn_quote_refresh(symbols: List[str]) -> None:
+    pending = [symbol for symbol in symbols if symbol not in _quote_refreshing]
+    if not pending:
+        return
+    _quote_refreshing.update(pending)
+    task = asyncio.create_task(_refresh_quotes(pending))
+    _quote_refresh_tasks.add(task)
+    task.add_done_callback(_quote_refresh_tasks.discard)
+
+
+async def _schedule_hot_quote_refreshes(now: float) -> None:
+    hot_window = _get_refresh_hot_window_seconds()
+    lead_ratio = _get_refresh_lead_ratio()
+    for symbol, last_access in list(_quote_hot_symbols.items()):
+        if now - last_access > hot_window:
+            _quote_hot_symbols.pop(symbol, None)
+    cached_by_symbol = await _cache_get_many(CACHE_NS_QUOTES, list(_quote_hot_symbols))
+    due: List[str] = []
+    for symbol, cached in cached_by_symbol.items():
+        expires_at, fetched_at = cached["expires_at"], cached["fetched_at"]
+        if expires_at - now <= (expires_at - fetched_at) * lead_ratio:
+            due.append(symbol)
+    if due:
+        _spawn_quote_refresh(due)
+
+
+async def _run_quote_refresh_scheduler() -> None:
+    while True:
+        await asyncio.sleep(REFRESH_TICK_SECONDS)
+        try:
+            await _schedule_hot_quote_refreshes(time.time())
+        except Exception as exc:
+            _log("QUOTE REFRESH SCHEDULER ERROR", err=repr(exc))
+
+
+def _start_quote_refresh_scheduler() -> None:
+    global _quote_refresh_scheduler
+    if _get_refresh_hot_window_seconds() <= 0:
+        return
+    if _quote_refresh_scheduler is None or _quote_refresh_scheduler.done():
+        _quote_refresh_scheduler = asyncio.create_task(_run_quote_refresh_scheduler())
+
+
+async def _stop_quote_refresh_scheduler() -> None:
+    global _quote_refresh_scheduler
+    tasks = [*_quote_refresh_tasks]
+    if _quote_refresh_scheduler is not None:
+        tasks.append(_quote_refresh_scheduler)
+        _quote_refresh_scheduler = None
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _with_age(quote: Dict[str, Any], fetched_at: float, now: float) -> Dict[str, Any]:
+    return {**quote, "ageSec": int(max(0.0, now - fetched_at))}
+
+
+async def _get_quotes(normalized: List[str]) -> List[Dict[str, Any]]:
+    now = time.time()
+    max_stale = _get_swr_max_stale_seconds()
+    cached_by_symbol: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+    stale: List[str] = []
+    missing: List[str] = []
+    cached_entries = await _cache_get_many(CACHE_NS_QUOTES, normalized)
+    # Only the refresh scheduler prunes the hot set, so nothing is tracked while it is not running.
+    track_hot = _quote_refresh_scheduler is not None and not _quote_refresh_scheduler.done()
+    for symbol in normalized:
+        if track_hot:
+            _quote_hot_symbols[symbol] = now
+        cached = cached_entries.get(symbol)
+        if cached is None:
+            missing.append(symbol)
+            continue
+        expires_at, fetched_at, quote = cached["expires_at"], cached["fetched_at"], cached["quote"]
+        if expires_at > now:
+            cached_by_symbol[symbol] = (fetched_at, quote)
+        elif now - fetched_at <= max_stale and quote.get("status") != QUOTE_STATUS_ERROR:
+            cached_by_symbol[symbol] = (fetched_at, quote)
+            stale.append(symbol)
+        else:
+            missing.append(symbol)
+
+    if stale:
+        _spawn_quote_refresh(stale)
+    if missing:
+        cached_by_symbol.update(await _store_quotes(missing, await _fetch_quotes_uncached(missing)))
+
+    now = time.time()
+    quotes = []
+    for symbol in normalized:
+        cached = cached_by_symbol.get(symbol)
+        if cached is None:
+            quotes.append(_empty_quote_with_source(symbol, "kis"))
+        else:
+            quotes.append(_with_age(cached[1], cached[0], now))
+    return quotes
+
+
+class _QuoteStreamSubscription:
+    def __init__(self, symbols: List[str]) -> None:
+        self.symbols = symbols
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.event = asyncio.Event()
+
+    def push(self, symbol: str, quote: Dict[str, Any]) -> None:
+        self.pending[symbol] = quote
+        self.event.set()
+
+    def drain(self) -> List[Dict[str, Any]]:
+        self.event.clear()
+        quotes = [self.pending[symbol] for symbol in self.symbols if symbol in self.pending]
+        self.pending.clear()
+        return quotes
+
+
+def _quote_fingerprint(quote: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (quote.get("price"), quote.get("change"), quote.get("changePercent"), quote.get("status"))
+
+
+def _stream_interval_seconds(symbol: str) -> int:
+    parsed = _classify_symbol(symbol)
+    is_open, seconds_until_change = _market_state(parsed.quote_market)
+    if is_open:
+        return _get_stream_open_interval(parsed.kind)
+    return int(max(1.0, min(_get_stream_closed_interval(), seconds_until_change)))
+
+
+def _publish_stream_quote(symbol: str, quote: Dict[str, Any]) -> None:
+    previous = _stream_latest.get(symbol)
+    if previous is not None and _quote_fingerprint(previous) == _quote_fingerprint(quote):
+        return
+    _stream_latest[symbol] = quote
+    for subscription in list(_stream_subscriptions.get(symbol, ())):
+        subscription.push(symbol, quote)
+
+
+async def _run_stream_poller() -> None:
+    # One poller serves every streamed symbol: symbols that come due together are read through one
+    # _get_quotes call, so misses use the bulk KIS path and stale entries go to the SWR refresh.
+    assert _stream_wakeup is not None
+    while _stream_due:
+        now = time.time()
+        due = [symbol for symbol, due_at in _stream_due.items() if due_at <= now]
+        if due:
             try:
-                resp = await _request_overseas(token)
+                quotes = await _get_quotes(due)
             except Exception as exc:
-                print("[KIS OVERSEAS QUOTE ERROR]", symbol, repr(exc))
-                latest_reasons = ["request-failed"]
+                _log("QUOTE STREAM POLL ERROR", symbols=",".join(due), err=repr(exc))
+                quotes = []
+            for symbol, quote in zip(due, quotes):
+                _publish_stream_quote(symbol, quote)
+            now = time.time()
+            for symbol in due:
+                if symbol in _stream_due:
+                    _stream_due[symbol] = now + _stream_interval_seconds(symbol)
+        _stream_wakeup.clear()
+        wake_at = min(_stream_due.values(), default=now)
+        try:
+            await asyncio.wait_for(_stream_wakeup.wait(), timeout=max(0.0, wake_at - time.time()))
+        except asyncio.TimeoutError:
+            pass
+
+
+def _subscribe_quote_stream(symbols: List[str]) -> _QuoteStreamSubscription:
+    global _stream_poller, _stream_wakeup
+    subscription = _QuoteStreamSubscription(symbols)
+    for symbol in symbols:
+        _stream_subscriptions.setdefault(symbol, set()).add(subscription)
+        latest = _stream_latest.get(symbol)
+        if latest is not None:
+            subscription.push(symbol, latest)
+        _stream_due.setdefault(symbol, 0.0)
+    if _stream_poller is None or _stream_poller.done():
+        _stream_wakeup = asyncio.Event()
+        _stream_poller = asyncio.create_task(_run_stream_poller())
+    else:
+        assert _stream_wakeup is not None
+        _stream_wakeup.set()
+    return subscription
+
+
+def _unsubscribe_quote_stream(subscription: _QuoteStreamSubscription) -> None:
+    global _stream_poller
+    for symbol in subscription.symbols:
+        subscribers = _stream_subscriptions.get(symbol)
+        if subscribers is None:
+            continue
+        subscribers.discard(subscription)
+        if subscribers:
+            continue
+        _stream_subscriptions.pop(symbol, None)
+        _stream_latest.pop(symbol, None)
+        _stream_due.pop(symbol, None)
+    if not _stream_due and _stream_poller is not None:
+        _stream_poller.cancel()
+        _stream_poller = None
+
+
+async def _stop_quote_stream_poller() -> None:
+    global _stream_poller
+    poller = _stream_poller
+    _stream_poller = None
+    _stream_due.clear()
+    _stream_subscriptions.clear()
+    _stream_latest.clear()
+    if poller is not None:
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+
+
+async def _quote_stream_events(request: Request, symbols: List[str]) -> AsyncIterator[str]:
+    subscription = _subscribe_quote_stream(symbols)
+    heartbeat = _get_stream_heartbeat_seconds()
+    try:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            try:
+                await asyncio.wait_for(subscription.event.wait(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
                 continue
+            quotes = subscription.drain()
+            if quotes:
+                yield f"event: quotes\ndata: {json.dumps({'quotes': quotes}, ensure_ascii=False)}\n\n"
+    finally:
+        _unsubscribe_quote_stream(subscription)
+
+
+def _create_http_client(upstream: str) -> httpx.AsyncClient:
+    ssl_verify = _get_ssl_verify()
+    if not ssl_verify:
+        _log("HTTP POOL WARNING", "SSL verification disabled", upstream=upstream)
+    http2 = _get_http2_enabled()
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            _log("HTTP POOL WARNING", "QUOTE_HTTP2 requires httpx[http2], using HTTP/1.1", upstream=upstream)
+            http2 = False
+    transport = httpx.AsyncHTTPTransport(verify=ssl_verify, limits=_get_http_limits(), http2=http2)
+    return httpx.AsyncClient(
+        headers={"Accept": "application/json"},
+        transport=_CircuitBreakerTransport(upstream, _MetricsTransport(upstream, transport)),
+    )
+
+
+def _get_http_client(upstream: str) -> httpx.AsyncClient:
+    client = _http_clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _create_http_client(upstream)
+        _http_clients[upstream] = client
+    return client
+
+
+async def _close_http_clients() -> None:
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as exc:
+            _log("HTTP POOL CLOSE ERROR", err=repr(exc))
+
+
+async def _load_history_series(normalized: List[str], start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    kr_symbols: List[str] = []
+    us_symbols: List[str] = []
+    for symbol in normalized:
+        market = _classify_symbol(symbol).market
+        if market == "KR":
+            kr_symbols.append(symbol)
+        elif market == "US":
+            us_symbols.append(symbol)
+
+    settings = _get_settings()
+    if (kr_symbols or us_symbols) and not settings.kis_credentials():
+        raise HTTPException(status_code=500, detail="KIS credentials not configured")
+
+    client = _get_http_client(UPSTREAM_KIS)
+    token = await _get_kis_token(client)
+    if not token:
+        raise HTTPException(status_code=500, detail="KIS token acquisition failed")
+
+    tasks: List[asyncio.Task] = []
+    for symbol in [*kr_symbols, *us_symbols]:
+        tasks.append(
+            asyncio.create_task(
+                _get_history_series(client, symbol, settings, start_date, end_date)
+            )
+        )
+
+    fetched = await asyncio.gather(*tasks)
+    by_symbol = {item["symbol"].upper(): item for item in fetched}
+    ordered = []
+    for symbol in normalized:
+        ordered.append(
+            by_symbol.get(symbol.upper())
+            or {"symbol": symbol, "columns": _history_columns([]), "source": "kis", "warning": "not-found"}
+        )
+    return ordered
+
+
+def _history_columns(points: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    columns: Dict[str, np.ndarray] = {
+        "dates": np.array([point["date"] for point in points], dtype="datetime64[D]"),
+    }
+    for field in HISTORY_COLUMN_FIELDS:
+        columns[field] = np.fromiter(
+            (point.get(field, np.nan) for point in points), dtype=np.float64, count=len(points)
+        )
+    return columns
+
 
-            if resp.status_code in (401, 403):
-                await _invalidate_kis_token()
-                refreshed = await _get_kis_token(client)
-                if refreshed:
-                    try:
-                        resp = await _request_overseas(refreshed)
-                    except Exception as exc:
-                        print("[KIS OVERSEAS QUOTE RETRY ERROR]", symbol, repr(exc))
-                        latest_reasons = ["token-refresh-failed"]
-                        continue
+def _columnar_history_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    series = {key: value for key, value in item.items() if key != "points"}
+    series["columns"] = _history_columns(item.get("points") or [])
+    return series
 
-            if resp.status_code != 200:
-                print("[KIS OVERSEAS QUOTE HTTP ERROR]", resp.status_code, symbol, resp.text[:200])
-                latest_reasons = [f"http-{resp.status_code}"]
-                continue
-            try:
-                data = resp.json()
-            except Exception as exc:
-                print("[KIS OVERSEAS QUOTE JSON ERROR]", symbol, repr(exc))
-                latest_reasons = ["json-error"]
-                continue
 
-            price, change, change_percent, currency = _parse_kis_overseas_quote(data)
-            if price is None or price <= 0:
-                print("[KIS OVERSEAS QUOTE MISSING PRICE]", symbol, "keys=", ",".join(sorted(data.keys())))
-                latest_reasons = ["missing-price"]
-                continue
+def _merge_history_columns(pages: List[Dict[str, np.ndarray]], start_date: str, end_date: str) -> Dict[str, np.ndarray]:
+    merged = {key: np.concatenate([page[key] for page in pages]) for key in ("dates", *HISTORY_COLUMN_FIELDS)}
+    # Later pages win on a repeated date, as in _merge_history_pages; np.unique keeps the first hit, so scan reversed.
+    _, first = np.unique(merged["dates"][::-1], return_index=True)
+    order = merged["dates"].size - 1 - first
+    dates = merged["dates"][order]
+    order = order[(dates >= np.datetime64(start_date)) & (dates <= np.datetime64(end_date))]
+    return {key: values[order] for key, values in merged.items()}
 
-            guard_context = _extract_overseas_guard_context(data)
-            guard_result = _evaluate_price_guard(
-                symbol,
-                {
-                    "price": float(price),
-                    "dayLow": guard_context.get("dayLow"),
-                    "dayHigh": guard_context.get("dayHigh"),
-                    "bid": guard_context.get("bid"),
-                    "ask": guard_context.get("ask"),
-                },
-            )
-            if guard_result.get("suspect"):
-                latest_reasons = list(guard_result.get("reasons") or ["suspect-price"])
-                print(
-                    f"[PRICE GUARD SUSPECT] symbol={symbol} path={KIS_OVERSEAS_PRICE_PATH} reasons={latest_reasons}"
-                )
-                if attempt < max_attempts - 1:
-                    await asyncio.sleep(_get_guard_retry_delay_seconds(attempt))
-                    continue
-                break
 
-            accepted = _with_guard_fields(
-                {
-                    "symbol": symbol,
-                    "price": float(price),
-                    "change": change,
-                    "changePercent": change_percent,
-                    "currency": currency or "USD",
-                    "marketTime": _iso_time(time.time()),
-                    "source": "kis",
-                    "name": None,
-                },
-                status=QUOTE_STATUS_VALID,
-                guard_reason=None,
-                warning=None,
-                stale_age_sec=None,
-            )
-            _remember_last_good_quote(symbol, accepted)
-            return accepted
+def _history_points(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    values = {field: columns[field].tolist() for field in HISTORY_COLUMN_FIELDS}
+    points: List[Dict[str, Any]] = []
+    for index, date in enumerate(np.datetime_as_string(columns["dates"], unit="D").tolist()):
+        point: Dict[str, Any] = {"date": date, "close": values["close"][index]}
+        for field in ("open", "high", "low", "volume"):
+            value = values[field][index]
+            if value == value:
+                point[field] = value
+        points.append(point)
+    return points
 
-        return _fallback_quote_from_last_good(symbol, latest_reasons or ["price-unavailable"], source="kis")
 
+def _history_series_rows(item: Dict[str, Any]) -> Dict[str, Any]:
+    series = {key: value for key, value in item.items() if key != "columns"}
+    series["points"] = _history_points(item["columns"])
+    return series
 
-async def _fetch_kis_daily_history_kr(
-    client: httpx.AsyncClient,
-    symbol: str,
-    token: str,
-    app_key: str,
-    app_secret: str,
-    base_url: str,
-    start_date: str,
-    end_date: str,
-    sem: asyncio.Semaphore,
-) -> Dict[str, Any]:
-    async with sem:
-        market, _, code = _parse_symbol(symbol)
-        if market != "KR":
-            return {"symbol": symbol, "points": [], "source": "kis", "warning": "invalid-market"}
-
-        endpoint_attempts = [("J", KIS_DAILY_PRICE_PATH), ("Q", KIS_DAILY_PRICE_PATH)]
-        max_pages = _get_history_max_pages()
-
-        for market_code, path in endpoint_attempts:
-            pages: List[List[Dict[str, Any]]] = []
-            cursor_end = end_date
-            for _ in range(max_pages):
-                params = {
-                    "FID_COND_MRKT_DIV_CODE": market_code,
-                    "FID_INPUT_ISCD": code,
-                    "FID_INPUT_DATE_1": _to_ymd_compact(start_date),
-                    "FID_INPUT_DATE_2": _to_ymd_compact(cursor_end),
-                    "FID_PERIOD_DIV_CODE": "D",
-                    "FID_ORG_ADJ_PRC": "1",
-                }
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "appkey": app_key,
-                    "appsecret": app_secret,
-                    "tr_id": KIS_TR_ID_DAILY_PRICE,
-                    "content-type": "application/json",
-                }
-                try:
-                    resp = await client.get(f"{base_url}{path}", params=params, headers=headers, timeout=12.0)
-                except Exception as exc:
-                    print("[KIS DAILY KR ERROR]", symbol, repr(exc))
-                    break
-                if resp.status_code != 200:
-                    print(
-                        f"[KIS DAILY KR REQ] symbol={symbol} path={path} tr_id={KIS_TR_ID_DAILY_PRICE} params={params} status={resp.status_code}"
-                    )
-                    break
-                try:
-                    data = resp.json()
-                except Exception as exc:
-                    print("[KIS DAILY KR JSON ERROR]", symbol, repr(exc))
-                    break
 
-                points = _extract_history_points(
-                    data,
-                    date_keys=["stck_bsop_date", "bsop_date", "date", "trd_dd", "bas_dt"],
-                    close_keys=["stck_clpr", "clpr", "close", "last", "stck_prpr"],
-                    open_keys=["stck_oprc", "oprc", "open", "open_price"],
-                    high_keys=["stck_hgpr", "hgpr", "high", "high_price"],
-                    low_keys=["stck_lwpr", "lwpr", "low", "low_price"],
-                    volume_keys=["acml_vol", "volume", "vol", "trd_vol", "acc_trdvol"],
-                    start_date=start_date,
-                    end_date=cursor_end,
-                )
-                if not points:
-                    break
-                pages.append(points)
-                earliest = points[0]["date"]
-                if earliest <= start_date:
-                    break
-                next_cursor = _date_before(earliest)
-                if next_cursor >= cursor_end:
-                    break
-                cursor_end = next_cursor
+def _column_to_json(values: np.ndarray) -> List[float | None]:
+    return [None if value != value else value for value in values.tolist()]
 
-            merged = _merge_history_pages(pages)
-            if merged:
-                return {"symbol": symbol, "points": merged, "source": "kis"}
 
-        return {"symbol": symbol, "points": [], "source": "kis", "warning": "no-history"}
+def _history_series_columns(item: Dict[str, Any]) -> Dict[str, Any]:
+    columns = item["columns"]
+    series = {key: value for key, value in item.items() if key != "columns"}
+    series["count"] = int(columns["dates"].size)
+    series["dates"] = np.datetime_as_string(columns["dates"], unit="D").tolist()
+    for field in HISTORY_COLUMN_FIELDS:
+        series[field] = _column_to_json(columns[field])
+    return series
 
 
-async def _fetch_kis_daily_history_us(
-    client: httpx.AsyncClient,
-    symbol: str,
-    token: str,
-    app_key: str,
-    app_secret: str,
-    base_url: str,
-    start_date: str,
-    end_date: str,
-    sem: asyncio.Semaphore,
-) -> Dict[str, Any]:
-    async with sem:
-        market, excd, symb = _parse_symbol(symbol)
-        if market != "US" or not excd or not symb:
-            return {"symbol": symbol, "points": [], "source": "kis", "warning": "invalid-market"}
+def _encode_history_binary(series: List[Dict[str, Any]]) -> bytes:
+    parts = [HISTORY_BINARY_MAGIC, np.array([HISTORY_BINARY_VERSION, len(series)], dtype="<u2").tobytes()]
+    for item in series:
+        columns = item["columns"]
+        symbol = item["symbol"].encode("utf-8")
+        parts.append(np.array([len(symbol)], dtype="<u2").tobytes())
+        parts.append(symbol)
+        parts.append(np.array([columns["dates"].size], dtype="<u4").tobytes())
+        parts.append(columns["dates"].astype("<i4").tobytes())
+        for field in HISTORY_COLUMN_FIELDS:
+            parts.append(columns[field].astype("<f8").tobytes())
+    return b"".join(parts)
 
-        async def _request_history(access_token: str, cursor_end: str) -> httpx.Response:
-            params = {
-                "AUTH": "",
-                "EXCD": excd,
-                "SYMB": symb,
-                "GUBN": "0",
-                "BYMD": _to_ymd_compact(cursor_end),
-                "MODP": "0",
-            }
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "appkey": app_key,
-                "appsecret": app_secret,
-                "tr_id": KIS_TR_ID_OVERSEAS_DAILY_PRICE,
-                "content-type": "application/json",
-            }
-            return await client.get(
-                f"{base_url}{KIS_OVERSEAS_DAILY_PRICE_PATH}", params=params, headers=headers, timeout=12.0
-            )
 
-        pages: List[List[Dict[str, Any]]] = []
-        cursor_end = end_date
-        access_token = token
-        for _ in range(_get_history_max_pages()):
-            try:
-                resp = await _request_history(access_token, cursor_end)
-            except Exception as exc:
-                print("[KIS DAILY US ERROR]", symbol, repr(exc))
-                return {"symbol": symbol, "points": [], "source": "kis", "warning": "request-failed"}
-
-            if resp.status_code in (401, 403):
-                await _invalidate_kis_token()
-                refreshed = await _get_kis_token(client)
-                if refreshed:
-                    access_token = refreshed
-                    try:
-                        resp = await _request_history(access_token, cursor_end)
-                    except Exception as exc:
-                        print("[KIS DAILY US RETRY ERROR]", symbol, repr(exc))
-                        return {"symbol": symbol, "points": [], "source": "kis", "warning": "request-failed"}
+def _round_or_none(value: float, digits: int = 6) -> float | None:
+    return round(float(value), digits) if np.isfinite(value) else None
 
-            if resp.status_code != 200:
-                print("[KIS DAILY US HTTP ERROR]", symbol, resp.status_code, resp.text[:200])
-                return {"symbol": symbol, "points": [], "source": "kis", "warning": "http-error"}
 
-            try:
-                data = resp.json()
-            except Exception as exc:
-                print("[KIS DAILY US JSON ERROR]", symbol, repr(exc))
-                return {"symbol": symbol, "points": [], "source": "kis", "warning": "json-error"}
+def _history_closes(item: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    columns = item["columns"]
+    mask = np.isfinite(columns["close"]) & (columns["close"] > 0)
+    return columns["dates"][mask], columns["close"][mask]
 
-            points = _extract_history_points(
-                data,
-                date_keys=["xymd", "date", "trd_dd", "bas_dt", "stck_bsop_date"],
-                close_keys=["clos", "last", "ovrs_nmix_prpr", "ovrs_clpr", "close", "stck_clpr"],
-                open_keys=["open", "ovrs_oprc", "stck_oprc", "oprc", "open_price"],
-                high_keys=["high", "ovrs_hgpr", "stck_hgpr", "hgpr", "high_price"],
-                low_keys=["low", "stck_lwpr", "ovrs_lwpr", "lwpr", "low_price"],
-                volume_keys=["tvol", "evol", "acml_vol", "volume", "vol", "trd_vol"],
-                start_date=start_date,
-                end_date=cursor_end,
-            )
-            if not points:
-                break
-            pages.append(points)
-            earliest = points[0]["date"]
-            if earliest <= start_date:
-                break
-            next_cursor = _date_before(earliest)
-            if next_cursor >= cursor_end:
-                break
-            cursor_end = next_cursor
 
-        merged = _merge_history_pages(pages)
-        if not merged:
-            return {"symbol": symbol, "points": [], "source": "kis", "warning": "no-history"}
-        return {"symbol": symbol, "points": merged, "source": "kis"}
+def _drawdown_stats(dates: np.ndarray, closes: np.ndarray) -> Dict[str, Any]:
+    drawdowns = closes / np.maximum.accumulate(closes) - 1.0
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(closes[: trough + 1]))
+    return {
+        "max": _round_or_none(drawdowns[trough]),
+        "peakDate": str(dates[peak]),
+        "troughDate": str(dates[trough]),
+        "current": _round_or_none(drawdowns[-1]),
+    }
 
 
-async def _get_usd_krw_rate(client: httpx.AsyncClient) -> Dict[str, Any]:
-    pair = "USD/KRW"
-    now = time.time()
-    cached = _fx_cache.get(pair)
-    if cached and cached[0] > now:
-        return cached[1]
+def _rolling_volatility(returns: np.ndarray, window: int) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"window": window, "latest": None, "min": None, "max": None}
+    if returns.size < window:
+        return result
+    rolling = np.lib.stride_tricks.sliding_window_view(returns, window).std(axis=1, ddof=1)
+    rolling *= np.sqrt(TRADING_DAYS_PER_YEAR)
+    result.update(
+        latest=_round_or_none(rolling[-1]),
+        min=_round_or_none(rolling.min()),
+        max=_round_or_none(rolling.max()),
+    )
+    return result
 
-    url = NAVER_FX_URL
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 16_5 like Mac OS X) "
-            "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Mobile/15E148 Safari/604.1"
+
+def _series_analytics(item: Dict[str, Any], window: int, usd_krw: float | None) -> Dict[str, Any]:
+    symbol = item["symbol"]
+    dates, closes = _history_closes(item)
+    currency = None if _is_index_symbol(symbol) else {MARKET_KR: "KRW", MARKET_US: "USD"}.get(_parse_symbol(symbol)[0])
+    result: Dict[str, Any] = {"symbol": symbol, "currency": currency, "count": int(closes.size)}
+    if item.get("warning"):
+        result["warning"] = item["warning"]
+    if closes.size < 2:
+        result.setdefault("warning", "insufficient-history")
+        return result
+
+    returns = closes[1:] / closes[:-1] - 1.0
+    total_return = closes[-1] / closes[0] - 1.0
+    years = returns.size / TRADING_DAYS_PER_YEAR
+    result.update(
+        firstDate=str(dates[0]),
+        lastDate=str(dates[-1]),
+        firstClose=float(closes[0]),
+        lastClose=float(closes[-1]),
+        totalReturn=_round_or_none(total_return),
+        annualizedReturn=_round_or_none((1.0 + total_return) ** (1.0 / years) - 1.0) if total_return > -1.0 else None,
+        meanDailyReturn=_round_or_none(returns.mean(), 8),
+        annualizedVolatility=(
+            _round_or_none(returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)) if returns.size > 1 else None
         ),
-        "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.8",
-        "Referer": "https://m.search.naver.com/",
-    }
-    print("[FX NAVER REQ]", f"url={url}")
-    try:
-        resp = await client.get(url, headers=headers, timeout=10.0)
-    except Exception as exc:
-        print("[FX NAVER ERROR]", repr(exc))
-        last_good = _fx_last_good.get(pair)
-        if last_good:
-            return {**last_good, "error": "FX request failed"}
-        return {"pair": pair, "rate": None, "change": None, "changePercent": None, "ts": None, "source": "naver", "error": "FX request failed"}
+        rollingVolatility=_rolling_volatility(returns, window),
+        drawdown=_drawdown_stats(dates, closes),
+    )
+    if currency == "USD" and usd_krw:
+        result["krw"] = {
+            "fxRate": usd_krw,
+            "firstClose": round(float(closes[0]) * usd_krw, 2),
+            "lastClose": round(float(closes[-1]) * usd_krw, 2),
+        }
+    return result
 
-    print("[FX NAVER RES]", "status=", resp.status_code, "bodyLength=", len(resp.text))
-    if resp.status_code != 200:
-        last_good = _fx_last_good.get(pair)
-        if last_good:
-            return {**last_good, "error": f"FX http {resp.status_code}"}
-        return {"pair": pair, "rate": None, "change": None, "changePercent": None, "ts": None, "source": "naver", "error": f"FX http {resp.status_code}"}
 
-    body = resp.text or ""
-    rate, change, change_percent, candidate_count = _parse_naver_fx(body)
-    print("[FX NAVER PARSE]", "rate=", rate, "candidates=", candidate_count)
-    if rate is None or not (500 <= rate <= 5000):
-        last_good = _fx_last_good.get(pair)
-        if last_good:
-            return {**last_good, "error": "FX rate missing"}
-        return {"pair": pair, "rate": None, "change": None, "changePercent": None, "ts": None, "source": "naver", "error": "FX rate missing"}
+def _correlation_matrix(series: List[Dict[str, Any]]) -> Dict[str, Any]:
+    usable: List[Tuple[str, np.ndarray, np.ndarray]] = []
+    for item in series:
+        dates, closes = _history_closes(item)
+        if closes.size >= 3:
+            usable.append((item["symbol"], dates, closes))
+    symbols = [symbol for symbol, _, _ in usable]
+    if len(usable) < 2:
+        return {"symbols": symbols, "observations": 0, "matrix": None}
+
+    common = usable[0][1]
+    for _, dates, _ in usable[1:]:
+        common = np.intersect1d(common, dates, assume_unique=True)
+    if common.size < 3:
+        return {"symbols": symbols, "observations": 0, "matrix": None}
+
+    rows = []
+    for _, dates, closes in usable:
+        aligned = closes[np.searchsorted(dates, common)]
+        rows.append(aligned[1:] / aligned[:-1] - 1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matrix = np.corrcoef(np.vstack(rows))
+    return {
+        "symbols": symbols,
+        "observations": int(common.size - 1),
+        "matrix": [[_round_or_none(value, 4) for value in row] for row in matrix.tolist()],
+    }
 
-    ttl = _get_fx_cache_ttl()
-    result = {
-        "pair": pair,
-        "rate": rate,
-        "change": change,
-        "changePercent": change_percent,
-        "ts": now,
-        "source": "naver",
+
+async def _compute_history_analytics(
+    normalized: List[str], start_date: str, end_date: str, window: int
+) -> Dict[str, Any]:
+    series = await _load_history_series(normalized, start_date, end_date)
+    usd_krw: float | None = None
+    if any(_parse_symbol(symbol)[0] == MARKET_US for symbol in normalized):
+        fx = await _get_usd_krw_rate(_get_http_client(UPSTREAM_NAVER))
+        usd_krw = _to_positive_float(fx.get("rate"))
+    return {
+        "start": start_date,
+        "end": end_date,
+        "asOf": _iso_time(time.time()),
+        "usdKrw": usd_krw,
+        "series": [_series_analytics(item, window, usd_krw) for item in series],
+        "correlation": _correlation_matrix(series),
     }
-    _fx_cache[pair] = (now + ttl, result)
-    _fx_last_good[pair] = result
-    return result
+
+
+def _history_analytics_ttl(normalized: List[str], end_date: str) -> int:
+    markets = {_parse_symbol(symbol)[0] for symbol in normalized} & {MARKET_KR, MARKET_US}
+    today = min(
+        (datetime.now(MARKET_SESSIONS[market][0]).strftime("%Y-%m-%d") for market in markets),
+        default=end_date,
+    )
+    if end_date < today:
+        return _get_closed_market_ttl_seconds()
+    return min(_get_quote_ttl_seconds(symbol) for symbol in normalized)
+
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    _start_settings()
+    for upstream in (UPSTREAM_KIS, UPSTREAM_YAHOO, UPSTREAM_NAVER):
+        _get_http_client(upstream)
+    _get_cache_backend()
+    _start_cache_sweeper()
+    await _start_persisted_state()
+    _start_kis_token_renewer()
+    _start_quote_refresh_scheduler()
+    try:
+        yield
+    finally:
+        await _stop_quote_refresh_scheduler()
+        await _stop_kis_token_renewer()
+        await _stop_quote_stream_poller()
+        await _stop_persisted_state()
+        await _stop_cache_sweeper()
+        await _close_cache_backend()
+        await _close_http_clients()
+        await _stop_settings()
+
+
+app = FastAPI(lifespan=_lifespan)
 
 
 @app.get("/health")
@@ -1647,17 +4920,54 @@ async def health() -> Dict[str, Any]:
         "ok": True,
         "kisConfigured": bool(app_key and app_secret),
         "kisBaseUrlSet": bool(base_url),
+        "kisKeys": len(_get_settings().kis_credentials()),
+        "openCircuits": sorted(
+            f"{upstream} {endpoint}" for (upstream, endpoint), breaker in _circuit_breakers.items() if breaker.open
+        ),
+    }
+
+
+@app.get("/cache/stats")
+async def cache_stats() -> Dict[str, Any]:
+    return await _cache_stats_snapshot()
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    return Response(content=_render_metrics(), media_type=METRICS_MEDIA_TYPE)
+
+
+def _require_admin(token: str | None) -> None:
+    expected = _get_settings().admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="admin token required")
+
+
+@app.get("/admin/settings")
+async def get_settings(x_admin_token: str | None = Header(None)) -> Dict[str, Any]:
+    _require_admin(x_admin_token)
+    return {
+        "settings": _settings_view(_get_settings()),
+        "issues": _settings_issues,
+        "loadedAt": _iso_time(_settings_loaded_at),
     }
 
 
+@app.post("/admin/settings/reload")
+async def reload_settings(x_admin_token: str | None = Header(None)) -> Dict[str, Any]:
+    _require_admin(x_admin_token)
+    result = _reload_settings()
+    return {**result, "settings": _settings_view(_get_settings()), "loadedAt": _iso_time(_settings_loaded_at)}
+
+
 @app.get("/fx")
 async def get_fx(pair: str = Query("USD/KRW", description="Currency pair, e.g. USD/KRW")) -> Dict[str, Any]:
     normalized = pair.strip().upper()
     if normalized != "USD/KRW":
         raise HTTPException(status_code=400, detail="Unsupported pair")
-    ssl_verify = _get_ssl_verify()
-    async with httpx.AsyncClient(headers={"Accept": "application/json"}, verify=ssl_verify) as client:
-        result = await _get_usd_krw_rate(client)
+    result = await _get_usd_krw_rate(_get_http_client(UPSTREAM_NAVER))
     return {"fx": result}
 
 
@@ -1667,135 +4977,29 @@ async def get_quotes(symbols: str = Query("", description="Comma-separated symbo
     if not _env_logged:
         _env_logged = True
         app_key, app_secret, base_url = _get_kis_config()
-        print("[KIS ENV] configured=", bool(app_key and app_secret), "baseUrlSet=", bool(base_url))
+        _log("KIS ENV", configured=bool(app_key and app_secret), base_url_set=bool(base_url))
 
     raw_symbols = symbols.split(",") if symbols else []
     normalized = _normalize_symbols(raw_symbols)
     if not normalized:
         return {"quotes": []}
 
-    key = _cache_key(normalized)
-    now = time.time()
-    cached = _cache.get(key)
-    if cached and cached[0] > now:
-        return {"quotes": cached[1]}
-
-    fx_symbols = [symbol for symbol in normalized if symbol.strip().upper() == "USD/KRW"]
-    kr_index_symbols = [symbol for symbol in normalized if _kr_index_definition(symbol) and not _us_index_definition(symbol)]
-    us_index_symbols = [symbol for symbol in normalized if _us_index_definition(symbol)]
-    kr_symbols = [symbol for symbol in normalized if not _is_index_symbol(symbol) and _parse_symbol(symbol)[0] == "KR"]
-    us_symbols = [
-        symbol
-        for symbol in normalized
-        if not _is_index_symbol(symbol) and _parse_symbol(symbol)[0] == "US" and symbol.strip().upper() != "USD/KRW"
-    ]
-
-    app_key, app_secret, base_url = _get_kis_config()
-    if (kr_symbols or us_symbols or kr_index_symbols) and not (app_key and app_secret and base_url):
-        raise HTTPException(status_code=500, detail="KIS credentials not configured")
-
-    sem = asyncio.Semaphore(_get_concurrency())
-    ssl_verify = _get_ssl_verify()
-    if not ssl_verify:
-        print("[QUOTE SERVICE WARNING] SSL verification disabled")
-    async with httpx.AsyncClient(headers={"Accept": "application/json"}, verify=ssl_verify) as client:
-        tasks: List[asyncio.Task] = []
-
-        kis_token = ""
-        if kr_symbols or us_symbols or kr_index_symbols:
-            kis_token = await _get_kis_token(client)
-            if not kis_token:
-                for symbol in kr_index_symbols:
-                    tasks.append(
-                        asyncio.create_task(
-                            asyncio.sleep(
-                                0,
-                                result=_with_guard_fields(
-                                    {
-                                        "symbol": symbol,
-                                        "price": None,
-                                        "change": None,
-                                        "changePercent": None,
-                                        "currency": "KRW",
-                                        "marketTime": None,
-                                        "source": "kis",
-                                        "name": _kr_index_definition(symbol)["name"] if _kr_index_definition(symbol) else None,
-                                    },
-                                    status=QUOTE_STATUS_ERROR,
-                                    guard_reason="token-unavailable",
-                                    warning="kis-token-unavailable",
-                                    stale_age_sec=None,
-                                ),
-                            )
-                        )
-                    )
-                for symbol in [*kr_symbols, *us_symbols]:
-                    tasks.append(asyncio.create_task(asyncio.sleep(0, result=_empty_quote_with_source(symbol, "kis"))))
-
-        if kis_token:
-            for symbol in kr_index_symbols:
-                tasks.append(
-                    asyncio.create_task(
-                        _fetch_kis_index_quote(
-                            client, symbol, kis_token, app_key, app_secret, base_url, sem
-                        )
-                    )
-                )
-
-        for symbol in us_index_symbols:
-            tasks.append(asyncio.create_task(_fetch_us_index_quote(client, symbol, sem)))
-
-        if kis_token:
-            for symbol in kr_symbols:
-                tasks.append(
-                    asyncio.create_task(
-                        _fetch_kis_quote(
-                            client, symbol, kis_token, app_key, app_secret, base_url, sem
-                        )
-                    )
-                )
-
-            for symbol in us_symbols:
-                tasks.append(
-                    asyncio.create_task(
-                        _fetch_kis_overseas_quote(
-                            client, symbol, kis_token, app_key, app_secret, base_url, sem
-                        )
-                    )
-                )
-
-        if fx_symbols:
-            fx_result = await _get_usd_krw_rate(client)
-            for symbol in fx_symbols:
-                tasks.append(
-                    asyncio.create_task(
-                        asyncio.sleep(0, result={
-                            "symbol": symbol,
-                            "price": fx_result.get("rate"),
-                            "change": fx_result.get("change"),
-                            "changePercent": fx_result.get("changePercent"),
-                            "currency": "KRW",
-                            "marketTime": _iso_time(time.time()) if fx_result.get("rate") else None,
-                            "source": fx_result.get("source") or "naver",
-                            "name": None,
-                            "status": QUOTE_STATUS_VALID if fx_result.get("rate") else QUOTE_STATUS_ERROR,
-                            "guardReason": None,
-                            "staleAgeSec": None,
-                        })
-                    )
-                )
+    return {"quotes": await _get_quotes(normalized)}
 
-        fetched = await asyncio.gather(*tasks)
-        quotes_by_symbol = {quote["symbol"].upper(): quote for quote in fetched}
-        quotes = []
-        for symbol in normalized:
-            quote = quotes_by_symbol.get(symbol.upper())
-            if quote is None:
-                quote = _empty_quote_with_source(symbol, "kis")
-            quotes.append(quote)
 
-    _cache[key] = (now + _get_ttl_seconds(), quotes)
-    return {"quotes": quotes}
+@app.get("/quotes/stream")
+async def stream_quotes(
+    request: Request, symbols: str = Query("", description="Comma-separated symbols")
+) -> StreamingResponse:
+    raw_symbols = symbols.split(",") if symbols else []
+    normalized = _normalize_symbols(raw_symbols)
+    if not normalized:
+        raise HTTPException(status_code=400, detail="No symbols")
+    return StreamingResponse(
+        _quote_stream_events(request, normalized),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/history")
@@ -1803,65 +5007,76 @@ async def get_history(
     symbols: str = Query("", description="Comma-separated symbols"),
     start: str = Query("", description="Start date YYYY-MM-DD"),
     end: str = Query("", description="End date YYYY-MM-DD"),
-) -> Dict[str, Any]:
+    format: str = Query(HISTORY_FORMAT_ROWS, description="rows | columns | binary"),
+) -> Any:
+    response_format = format.strip().lower() or HISTORY_FORMAT_ROWS
+    if response_format not in (HISTORY_FORMAT_ROWS, HISTORY_FORMAT_COLUMNS, HISTORY_FORMAT_BINARY):
+        raise HTTPException(status_code=400, detail="format must be rows, columns or binary")
     raw_symbols = symbols.split(",") if symbols else []
     normalized = _normalize_symbols(raw_symbols)
     if not normalized:
+        if response_format == HISTORY_FORMAT_BINARY:
+            return Response(_encode_history_binary([]), media_type=HISTORY_BINARY_MEDIA_TYPE)
         return {"series": [], "start": None, "end": None, "asOf": _iso_time(time.time())}
 
     start_date, end_date = _resolve_history_range(start, end)
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="Invalid date range")
 
-    kr_symbols = [symbol for symbol in normalized if _parse_symbol(symbol)[0] == "KR"]
-    us_symbols = [symbol for symbol in normalized if _parse_symbol(symbol)[0] == "US"]
-
-    app_key, app_secret, base_url = _get_kis_config()
-    if (kr_symbols or us_symbols) and not (app_key and app_secret and base_url):
-        raise HTTPException(status_code=500, detail="KIS credentials not configured")
-
-    sem = asyncio.Semaphore(_get_concurrency())
-    ssl_verify = _get_ssl_verify()
-    if not ssl_verify:
-        print("[HISTORY SERVICE WARNING] SSL verification disabled")
-
-    async with httpx.AsyncClient(headers={"Accept": "application/json"}, verify=ssl_verify) as client:
-        token = await _get_kis_token(client)
-        if not token:
-            raise HTTPException(status_code=500, detail="KIS token acquisition failed")
-
-        tasks: List[asyncio.Task] = []
-        for symbol in kr_symbols:
-            tasks.append(
-                asyncio.create_task(
-                    _fetch_kis_daily_history_kr(
-                        client, symbol, token, app_key, app_secret, base_url, start_date, end_date, sem
-                    )
-                )
-            )
-        for symbol in us_symbols:
-            tasks.append(
-                asyncio.create_task(
-                    _fetch_kis_daily_history_us(
-                        client, symbol, token, app_key, app_secret, base_url, start_date, end_date, sem
-                    )
-                )
-            )
-
-        fetched = await asyncio.gather(*tasks)
-        by_symbol = {item["symbol"].upper(): item for item in fetched}
-        ordered = []
-        for symbol in normalized:
-            ordered.append(by_symbol.get(symbol.upper()) or {"symbol": symbol, "points": [], "source": "kis", "warning": "not-found"})
+    ordered = await _load_history_series(normalized, start_date, end_date)
 
+    if response_format == HISTORY_FORMAT_BINARY:
+        return Response(
+            _encode_history_binary(ordered),
+            media_type=HISTORY_BINARY_MEDIA_TYPE,
+            headers={"x-history-start": start_date, "x-history-end": end_date},
+        )
+    if response_format == HISTORY_FORMAT_COLUMNS:
+        return {
+            "start": start_date,
+            "end": end_date,
+            "asOf": _iso_time(time.time()),
+            "format": HISTORY_FORMAT_COLUMNS,
+            "series": [_history_series_columns(item) for item in ordered],
+        }
     return {
         "start": start_date,
         "end": end_date,
         "asOf": _iso_time(time.time()),
-        "series": ordered,
+        "series": [_history_series_rows(item) for item in ordered],
     }
 
 
+@app.get("/history/analytics")
+async def get_history_analytics(
+    symbols: str = Query("", description="Comma-separated symbols"),
+    start: str = Query("", description="Start date YYYY-MM-DD"),
+    end: str = Query("", description="End date YYYY-MM-DD"),
+    window: int = Query(DEFAULT_ANALYTICS_VOL_WINDOW, ge=2, le=TRADING_DAYS_PER_YEAR, description="Rolling volatility window"),
+) -> Dict[str, Any]:
+    raw_symbols = symbols.split(",") if symbols else []
+    normalized = _normalize_symbols(raw_symbols)
+    if not normalized:
+        return {"series": [], "correlation": None, "start": None, "end": None, "asOf": _iso_time(time.time())}
+
+    start_date, end_date = _resolve_history_range(start, end)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Invalid date range")
+
+    key = f"{','.join(normalized)}|{start_date}|{end_date}|{window}"
+    cached = await _cache_get(CACHE_NS_HISTORY_ANALYTICS, key)
+    if cached is not None:
+        return {**cached, "cached": True}
+
+    async def _compute_and_store() -> Dict[str, Any]:
+        result = await _compute_history_analytics(normalized, start_date, end_date, window)
+        await _cache_set(CACHE_NS_HISTORY_ANALYTICS, key, result, _history_analytics_ttl(normalized, end_date))
+        return result
+
+    result = await _single_flight(("history-analytics", key), _compute_and_store)
+    return {**result, "cached": False}
+
+
 @app.get("/investor-flows")
 async def get_investor_flows(
     symbols: str = Query("", description="Comma-separated KOSPI stock symbols, e.g. 005930,000660"),
@@ -1871,7 +5086,7 @@ async def get_investor_flows(
     if not normalized:
         return {"series": [], "asOf": _iso_time(time.time())}
 
-    valid_symbols = [symbol for symbol in normalized if _parse_kospi_stock_code(symbol)]
+    valid_symbols = [symbol for symbol in normalized if _classify_symbol(symbol).kospi_code]
     invalid_symbols = [symbol for symbol in normalized if symbol not in valid_symbols]
     if invalid_symbols:
         raise HTTPException(
@@ -1884,39 +5099,37 @@ async def get_investor_flows(
 
     key = f"investor:{_cache_key(valid_symbols)}"
     now = time.time()
-    cached = _investor_flow_cache.get(key)
-    if cached and cached[0] > now:
-        return {"series": cached[1], "asOf": _iso_time(now), "cached": True}
+    cached = await _cache_get(CACHE_NS_INVESTOR_FLOWS, key)
+    if cached is not None:
+        return {"series": cached, "asOf": _iso_time(now), "cached": True}
 
-    app_key, app_secret, base_url = _get_kis_config()
-    if not (app_key and app_secret and base_url):
+    settings = _get_settings()
+    if not settings.kis_credentials():
         raise HTTPException(status_code=500, detail="KIS credentials not configured")
 
-    sem = asyncio.Semaphore(_get_concurrency())
-    ssl_verify = _get_ssl_verify()
-    if not ssl_verify:
-        print("[INVESTOR FLOW SERVICE WARNING] SSL verification disabled")
-
-    async with httpx.AsyncClient(headers={"Accept": "application/json"}, verify=ssl_verify) as client:
-        token = await _get_kis_token(client)
-        if not token:
-            raise HTTPException(status_code=500, detail="KIS token acquisition failed")
+    client = _get_http_client(UPSTREAM_KIS)
+    token = await _get_kis_token(client)
+    if not token:
+        raise HTTPException(status_code=500, detail="KIS token acquisition failed")
 
-        tasks = [
-            asyncio.create_task(
-                _fetch_kis_investor_flows(client, symbol, token, app_key, app_secret, base_url, sem)
+    tasks = [
+        asyncio.create_task(
+            _single_flight(
+                ("kis-investor", symbol),
+                partial(_fetch_kis_investor_flows, client, symbol, settings),
             )
-            for symbol in valid_symbols
-        ]
-        fetched = await asyncio.gather(*tasks)
-        by_symbol = {item["symbol"].upper(): item for item in fetched}
-        series = [
-            by_symbol.get(symbol.upper())
-            or {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "not-found"}
-            for symbol in valid_symbols
-        ]
+        )
+        for symbol in valid_symbols
+    ]
+    fetched = await asyncio.gather(*tasks)
+    by_symbol = {item["symbol"].upper(): item for item in fetched}
+    series = [
+        by_symbol.get(symbol.upper())
+        or {"symbol": symbol, "market": "KOSPI", "flows": [], "source": "kis", "warning": "not-found"}
+        for symbol in valid_symbols
+    ]
 
-    _investor_flow_cache[key] = (now + _get_ttl_seconds(), series)
+    await _cache_set(CACHE_NS_INVESTOR_FLOWS, key, series, _get_ttl_seconds())
     return {"series": series, "asOf": _iso_time(time.time()), "cached": False}
 
 
@@ -1927,24 +5140,21 @@ async def search_symbols(q: str = Query("", description="Search query")) -> Dict
         return {"results": []}
 
     cache_key = f"search:{query.upper()}"
-    now = time.time()
-    cached = _search_cache.get(cache_key)
-    if cached and cached[0] > now:
-        return {"results": cached[1]}
-
-    is_kr = _is_kr_symbol(query) or _has_hangul(query)
-    ssl_verify = _get_ssl_verify()
-    async with httpx.AsyncClient(headers={"Accept": "application/json"}, verify=ssl_verify) as client:
-        if is_kr:
-            results = []
-            normalized_kr = _normalize_kr_code(query)
-            if _is_kr_stock_code(normalized_kr) or _is_kr_etf_etn_short_code(normalized_kr):
-                results = [{"symbol": normalized_kr, "name": None, "market": "KR"}]
-        else:
-            results = []
-            if query:
-                excd = _get_default_excd()
-                results = [{"symbol": f"{excd}:{query.upper()}", "name": None, "market": "US"}]
-
-    _search_cache[cache_key] = (now + _get_ttl_seconds(), results)
+    cached = await _cache_get(CACHE_NS_SEARCH, cache_key)
+    if cached is not None:
+        return {"results": cached}
+
+    parsed = _classify_symbol(query)
+    is_kr = parsed.kr_like or _has_hangul(query)
+    if is_kr:
+        results = []
+        if parsed.market == "KR":
+            results = [{"symbol": parsed.code, "name": None, "market": "KR"}]
+    else:
+        results = []
+        if query:
+            excd = _get_default_excd()
+            results = [{"symbol": f"{excd}:{query.upper()}", "name": None, "market": "US"}]
+
+    await _cache_set(CACHE_NS_SEARCH, cache_key, results, _get_ttl_seconds())
     return {"results": results}